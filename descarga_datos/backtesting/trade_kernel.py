@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Kernel de backtesting basado en arrays para UltraDetailedHeikinAshiMLStrategy.
+
+Simula la misma máquina de estados que el bucle original de
+UltraDetailedHeikinAshiMLStrategy._run_backtest (entrada por señal + ML,
+trailing stop del 50%, take profit, stop loss y time exit) pero sobre arrays
+NumPy pre-extraídos, sin .iloc ni materializar filas por vela. Los trades se
+guardan en arrays tipados y la estrategia los convierte a diccionarios al final.
+"""
+
+from functools import partial
+from typing import Callable, Dict, Optional
+
+import numpy as np
+
+from utils.jit import jit_compile
+
+# Códigos de motivo de salida (ver EXIT_REASONS)
+EXIT_SIGNAL_REVERSAL = 0
+EXIT_TAKE_PROFIT = 1
+EXIT_STOP_LOSS = 2
+EXIT_TIME = 3
+
+EXIT_REASONS = {
+    EXIT_SIGNAL_REVERSAL: 'signal_reversal',
+    EXIT_TAKE_PROFIT: 'take_profit',
+    EXIT_STOP_LOSS: 'stop_loss',
+    EXIT_TIME: 'time_exit',
+}
+
+# Posiciones del array de estado de simulate_trades_range (ver new_state)
+STATE_CAPITAL = 0
+STATE_PEAK = 1
+STATE_MAX_DRAWDOWN = 2
+STATE_POSITION = 3
+STATE_ENTRY_PRICE = 4
+STATE_ENTRY_INDEX = 5
+STATE_STOP_LOSS = 6
+STATE_TAKE_PROFIT = 7
+STATE_N_ENTRIES = 8
+STATE_N_CLOSED = 9
+STATE_HALTED = 10
+STATE_SIZE = 11
+
+# Estructura de cada trade en los arrays de resultados
+TRADE_DTYPE = np.dtype([
+    ('entry_idx', np.int64),
+    ('exit_idx', np.int64),
+    ('entry_price', np.float64),
+    ('exit_price', np.float64),
+    ('position_size', np.float64),
+    ('signal', np.int64),
+    ('stop_loss', np.float64),
+    ('take_profit', np.float64),
+    ('ml_confidence', np.float64),
+    ('atr_at_entry', np.float64),
+    ('pnl', np.float64),
+    ('exit_reason', np.int64),
+])
+
+
+def liquidity_mask(volume_ratio: np.ndarray, atr: np.ndarray, close: np.ndarray,
+                   liquidity_score_min: float) -> np.ndarray:
+    """
+    Versión vectorizada de UltraDetailedHeikinAshiMLStrategy._check_liquidity_score.
+
+    Returns:
+        Array booleano: True si la vela supera el score de liquidez mínimo
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        volume_score = np.minimum(volume_ratio * 10, 100)
+        volatility_pct = (atr / close) * 100
+        volatility_score = np.minimum(volatility_pct * 10, 100)
+        liquidity_score = (volume_score + volatility_score) / 2
+        return liquidity_score > liquidity_score_min
+
+
+def new_state(initial_capital: float) -> np.ndarray:
+    """Estado inicial de simulate_trades_range (array STATE_SIZE de float64)"""
+    state = np.zeros(STATE_SIZE, dtype=np.float64)
+    state[STATE_CAPITAL] = initial_capital
+    state[STATE_PEAK] = initial_capital
+    state[STATE_ENTRY_INDEX] = -1
+    return state
+
+
+def simulate_trades_range(close, atr, signals, ml_confidence, liquidity_ok, out, state, start, stop,
+                          ml_threshold, kelly_fraction, max_drawdown_limit,
+                          entries_blocked=False, risk_per_trade=0.02, stop_atr_multiplier=1.5,
+                          min_rr_ratio=2.5, max_bars_in_trade=80):
+    """
+    Simular las velas [start, stop) continuando desde `state`.
+
+    Llamadas sucesivas sobre rangos consecutivos equivalen a una sola pasada por
+    todo el histórico; entre ellas se puede inspeccionar el estado (checkpoints).
+    Solo usa indexación escalar y aritmética de floats, por lo que acepta tanto
+    listas de Python (más rápidas en CPython) como arrays NumPy.
+
+    Args:
+        close, atr, ml_confidence: Secuencias de floats por vela
+        signals: Secuencia de enteros (1 long, -1 short, 0 sin señal)
+        liquidity_ok: Secuencia de booleanos (ver liquidity_mask)
+        out: Array estructurado TRADE_DTYPE con capacidad para todos los trades
+        state: Estado de la simulación (ver new_state); se actualiza in-place
+        start, stop: Rango de velas a simular
+        ml_threshold: Confianza ML mínima para entrar
+        kelly_fraction: Fracción Kelly aplicada al tamaño de posición
+        max_drawdown_limit: Drawdown que detiene el trading
+        entries_blocked: True si el límite de trades concurrentes ya está alcanzado
+    """
+    if state[STATE_HALTED] != 0:
+        return
+
+    capital = float(state[STATE_CAPITAL])
+    peak_value = float(state[STATE_PEAK])
+    max_drawdown = float(state[STATE_MAX_DRAWDOWN])
+    position = float(state[STATE_POSITION])
+    entry_price = float(state[STATE_ENTRY_PRICE])
+    entry_index = int(state[STATE_ENTRY_INDEX])
+    stop_loss_price = float(state[STATE_STOP_LOSS])
+    take_profit_price = float(state[STATE_TAKE_PROFIT])
+    n_entries = int(state[STATE_N_ENTRIES])
+    n_closed = int(state[STATE_N_CLOSED])
+    halted = 0.0
+
+    for i in range(start, stop):
+        current_price = close[i]
+        current_atr = atr[i]
+
+        # SKIP si ATR es NaN o cero
+        if current_atr != current_atr or current_atr == 0:
+            continue
+
+        signal = signals[i]
+
+        if position == 0 and signal != 0:
+            ml_conf = ml_confidence[i]
+            if ml_conf < ml_threshold:
+                continue
+
+            stop_distance = current_atr * stop_atr_multiplier
+            take_profit_distance = stop_distance * min_rr_ratio
+
+            risk_amount = capital * risk_per_trade
+            position_size = risk_amount / stop_distance
+            kelly_adjustment = kelly_fraction * ml_conf
+            position_size *= kelly_adjustment
+
+            if entries_blocked or not liquidity_ok[i]:
+                continue
+
+            entry_price = current_price
+            entry_index = i
+            position = signal * position_size
+            take_profit_price = entry_price + (signal * take_profit_distance)
+            stop_loss_price = entry_price - (signal * stop_distance)
+
+            out[n_entries]['entry_idx'] = i
+            out[n_entries]['entry_price'] = entry_price
+            out[n_entries]['position_size'] = position_size
+            out[n_entries]['signal'] = signal
+            out[n_entries]['stop_loss'] = stop_loss_price
+            out[n_entries]['take_profit'] = take_profit_price
+            out[n_entries]['ml_confidence'] = ml_conf
+            out[n_entries]['atr_at_entry'] = current_atr
+            n_entries += 1
+
+        elif position != 0:
+            # TRAILING STOP DEL 50%
+            unrealized_pnl = (current_price - entry_price) * position
+            if unrealized_pnl > 0:
+                profit_amount = abs(current_price - entry_price)
+                new_stop_distance = profit_amount * 0.5
+                if position > 0:
+                    new_stop = entry_price + new_stop_distance
+                    if new_stop > stop_loss_price:
+                        stop_loss_price = new_stop
+                else:
+                    new_stop = entry_price - new_stop_distance
+                    if new_stop < stop_loss_price:
+                        stop_loss_price = new_stop
+
+            if signal == -position:
+                exit_price = current_price
+                exit_reason = EXIT_SIGNAL_REVERSAL
+            elif (position > 0 and current_price >= take_profit_price) or (position < 0 and current_price <= take_profit_price):
+                exit_price = take_profit_price
+                exit_reason = EXIT_TAKE_PROFIT
+            elif (position > 0 and current_price <= stop_loss_price) or (position < 0 and current_price >= stop_loss_price):
+                exit_price = stop_loss_price
+                exit_reason = EXIT_STOP_LOSS
+            elif entry_index >= 0 and (i - entry_index) > max_bars_in_trade:
+                exit_price = current_price
+                exit_reason = EXIT_TIME
+            else:
+                continue
+
+            pnl = (exit_price - entry_price) * position
+            out[n_closed]['exit_idx'] = i
+            out[n_closed]['exit_price'] = exit_price
+            out[n_closed]['pnl'] = pnl
+            out[n_closed]['exit_reason'] = exit_reason
+            n_closed += 1
+
+            capital += pnl
+            position = 0.0
+            entry_price = 0.0
+
+            peak_value = max(peak_value, capital)
+            current_drawdown = (peak_value - capital) / peak_value
+            max_drawdown = max(max_drawdown, current_drawdown)
+
+            if current_drawdown > max_drawdown_limit:
+                halted = 1.0
+                break
+
+    state[STATE_CAPITAL] = capital
+    state[STATE_PEAK] = peak_value
+    state[STATE_MAX_DRAWDOWN] = max_drawdown
+    state[STATE_POSITION] = position
+    state[STATE_ENTRY_PRICE] = entry_price
+    state[STATE_ENTRY_INDEX] = entry_index
+    state[STATE_STOP_LOSS] = stop_loss_price
+    state[STATE_TAKE_PROFIT] = take_profit_price
+    state[STATE_N_ENTRIES] = n_entries
+    state[STATE_N_CLOSED] = n_closed
+    state[STATE_HALTED] = halted
+
+
+def _simulate_whole(range_kernel, close, atr, signals, ml_confidence, liquidity_ok, out,
+                    initial_capital, ml_threshold, kelly_fraction, max_drawdown_limit,
+                    entries_blocked=False, risk_per_trade=0.02, stop_atr_multiplier=1.5,
+                    min_rr_ratio=2.5, max_bars_in_trade=80):
+    state = new_state(initial_capital)
+    range_kernel(close, atr, signals, ml_confidence, liquidity_ok, out, state, 0, len(close),
+                 ml_threshold, kelly_fraction, max_drawdown_limit, entries_blocked, risk_per_trade,
+                 stop_atr_multiplier, min_rr_ratio, max_bars_in_trade)
+    return (int(state[STATE_N_ENTRIES]), int(state[STATE_N_CLOSED]),
+            float(state[STATE_CAPITAL]), float(state[STATE_MAX_DRAWDOWN]))
+
+
+def simulate_trades(close, atr, signals, ml_confidence, liquidity_ok, out,
+                    initial_capital, ml_threshold, kelly_fraction, max_drawdown_limit,
+                    entries_blocked=False, risk_per_trade=0.02, stop_atr_multiplier=1.5,
+                    min_rr_ratio=2.5, max_bars_in_trade=80):
+    """
+    Recorrer las velas una sola vez y simular entradas/salidas.
+
+    Args:
+        Ver simulate_trades_range; initial_capital es el capital inicial
+
+    Returns:
+        Tupla (n_entries, n_closed, capital, max_drawdown). Si n_entries > n_closed
+        el último trade de `out` quedó abierto al final de los datos.
+    """
+    return _simulate_whole(simulate_trades_range, close, atr, signals, ml_confidence, liquidity_ok, out,
+                           initial_capital, ml_threshold, kelly_fraction, max_drawdown_limit,
+                           entries_blocked, risk_per_trade, stop_atr_multiplier, min_rr_ratio,
+                           max_bars_in_trade)
+
+
+# Métricas por candidato de simulate_batch (columnas de la matriz `metrics`)
+BATCH_METRICS = ('total_trades', 'winning_trades', 'total_pnl', 'gross_profit', 'gross_loss',
+                 'capital', 'max_drawdown')
+
+
+def _batch_simulator(range_kernel):
+    """Construir simulate_batch sobre una versión (Python o compilada) de simulate_trades_range"""
+
+    def simulate_batch(close, atr, signals, ml_confidence, entry_masks, kelly_fractions,
+                       max_drawdown_limits, initial_capital, out, metrics):
+        """
+        Simular K candidatos sobre las mismas velas y resumir sus trades cerrados.
+
+        Args:
+            close, atr, signals, ml_confidence: Entradas comunes a todos los candidatos
+            entry_masks: Matriz [K, n_velas] de velas donde cada candidato puede entrar
+                (señal, umbral ML y liquidez ya aplicados; ver run_batch_backtest)
+            kelly_fractions, max_drawdown_limits: Parámetros por candidato
+            initial_capital: Capital inicial
+            out: Array TRADE_DTYPE de trabajo (reutilizado entre candidatos)
+            metrics: Matriz [K, len(BATCH_METRICS)] de salida
+        """
+        n_bars = len(close)
+        for k in range(len(kelly_fractions)):
+            state = np.zeros(STATE_SIZE)
+            state[STATE_CAPITAL] = initial_capital
+            state[STATE_PEAK] = initial_capital
+            state[STATE_ENTRY_INDEX] = -1
+            # Umbral ML -inf: el filtro ya está en entry_masks (mismo `continue` que en el kernel)
+            range_kernel(close, atr, signals, ml_confidence, entry_masks[k], out, state, 0, n_bars,
+                         -np.inf, kelly_fractions[k], max_drawdown_limits[k], False, 0.02, 1.5, 2.5, 80)
+
+            n_closed = int(state[STATE_N_CLOSED])
+            total_pnl = 0.0
+            gross_profit = 0.0
+            losses = 0.0
+            winning = 0
+            # Mismo orden de suma que _compile_backtest_results
+            for j in range(n_closed):
+                pnl = out[j]['pnl']
+                total_pnl += pnl
+                if pnl > 0:
+                    gross_profit += pnl
+                    winning += 1
+                elif pnl < 0:
+                    losses += pnl
+            metrics[k, 0] = n_closed
+            metrics[k, 1] = winning
+            metrics[k, 2] = total_pnl
+            metrics[k, 3] = gross_profit
+            metrics[k, 4] = abs(losses)
+            metrics[k, 5] = state[STATE_CAPITAL]
+            metrics[k, 6] = state[STATE_MAX_DRAWDOWN]
+
+    return simulate_batch
+
+
+# Versión compilada (None si Numba no está disponible)
+simulate_trades_range_jit = jit_compile(simulate_trades_range)
+simulate_trades_jit = (partial(_simulate_whole, simulate_trades_range_jit)
+                       if simulate_trades_range_jit is not None else None)
+simulate_batch = _batch_simulator(simulate_trades_range)
+simulate_batch_jit = (jit_compile(_batch_simulator(simulate_trades_range_jit))
+                      if simulate_trades_range_jit is not None else None)
+
+
+def checkpoint_report(state: np.ndarray, bar: int, n_bars: int) -> Dict:
+    """Valores intermedios de la simulación tras procesar las velas [0, bar)"""
+    capital = float(state[STATE_CAPITAL])
+    peak_value = float(state[STATE_PEAK])
+    return {
+        'bar': int(bar),
+        'progress': bar / n_bars if n_bars else 1.0,
+        'equity': capital,  # Capital realizado (trades cerrados)
+        'drawdown': (peak_value - capital) / peak_value if peak_value else 0.0,
+        'max_drawdown': float(state[STATE_MAX_DRAWDOWN]),
+        'n_trades': int(state[STATE_N_CLOSED]),
+        'open_position': bool(state[STATE_POSITION] != 0),
+        'halted': bool(state[STATE_HALTED]),
+    }
+
+
+def run_array_backtest(close: np.ndarray, atr: np.ndarray, signals: np.ndarray,
+                       ml_confidence: np.ndarray, liquidity_ok: np.ndarray,
+                       initial_capital: float, ml_threshold: float, kelly_fraction: float,
+                       max_drawdown_limit: float, entries_blocked: bool = False,
+                       checkpoints: int = 0,
+                       on_checkpoint: Optional[Callable[[Dict], bool]] = None) -> Dict:
+    """
+    Ejecutar simulate_trades sobre arrays y devolver los trades en un array tipado.
+
+    Con `on_checkpoint`, el histórico se simula en `checkpoints` tramos iguales y
+    tras cada tramo (salvo el último) se llama on_checkpoint(checkpoint_report(...));
+    si devuelve True la simulación se aborta.
+
+    Returns:
+        Dict con 'trades' (array TRADE_DTYPE con todas las entradas), 'n_closed',
+        'capital', 'max_drawdown', 'pruned' (True si on_checkpoint abortó) y
+        'checkpoints' (informes emitidos)
+    """
+    signals = np.asarray(signals, dtype=np.int64)
+    capacity = int(np.count_nonzero(signals)) + 1
+    out = np.zeros(capacity, dtype=TRADE_DTYPE)
+    out['exit_idx'] = -1
+
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    atr = np.ascontiguousarray(atr, dtype=np.float64)
+    ml_confidence = np.ascontiguousarray(ml_confidence, dtype=np.float64)
+    liquidity_ok = np.ascontiguousarray(liquidity_ok, dtype=bool)
+    scalars = (float(ml_threshold), float(kelly_fraction), float(max_drawdown_limit), bool(entries_blocked))
+
+    if simulate_trades_range_jit is not None:
+        kernel = simulate_trades_range_jit
+        inputs = (close, atr, signals, ml_confidence, liquidity_ok)
+    else:
+        # En CPython indexar listas es bastante más rápido que indexar arrays NumPy
+        kernel = simulate_trades_range
+        inputs = (close.tolist(), atr.tolist(), signals.tolist(), ml_confidence.tolist(), liquidity_ok.tolist())
+
+    n_bars = len(close)
+    if on_checkpoint is not None and checkpoints > 1:
+        bounds = np.linspace(0, n_bars, checkpoints + 1).astype(np.int64)[1:].tolist()
+    else:
+        bounds = [n_bars]
+
+    state = new_state(float(initial_capital))
+    reports = []
+    pruned = False
+    start = 0
+    for stop in bounds:
+        kernel(*inputs, out, state, start, stop, *scalars)
+        start = stop
+        if on_checkpoint is not None and stop < n_bars:
+            report = checkpoint_report(state, stop, n_bars)
+            reports.append(report)
+            if on_checkpoint(report):
+                pruned = True
+                break
+
+    n_entries = int(state[STATE_N_ENTRIES])
+    return {
+        'trades': out[:n_entries],
+        'n_closed': int(state[STATE_N_CLOSED]),
+        'capital': float(state[STATE_CAPITAL]),
+        'max_drawdown': float(state[STATE_MAX_DRAWDOWN]),
+        'pruned': pruned,
+        'checkpoints': reports,
+    }
+
+
+def run_batch_backtest(close: np.ndarray, atr: np.ndarray, signals: np.ndarray,
+                       ml_confidence: np.ndarray, entry_masks: np.ndarray,
+                       kelly_fractions: np.ndarray, max_drawdown_limits: np.ndarray,
+                       initial_capital: float) -> np.ndarray:
+    """
+    Backtest de K candidatos en una sola llamada al kernel.
+
+    Cada fila de `entry_masks` debe combinar señal != 0, el umbral ML (una
+    confianza NaN no descarta, como en simulate_trades_range), la liquidez y el
+    límite de trades concurrentes del candidato.
+
+    Returns:
+        Matriz [K, len(BATCH_METRICS)] float64
+    """
+    signals = np.ascontiguousarray(signals, dtype=np.int64)
+    entry_masks = np.ascontiguousarray(entry_masks, dtype=bool)
+    kelly_fractions = np.ascontiguousarray(kelly_fractions, dtype=np.float64)
+    max_drawdown_limits = np.ascontiguousarray(max_drawdown_limits, dtype=np.float64)
+    out = np.zeros(int(np.count_nonzero(signals)) + 1, dtype=TRADE_DTYPE)
+    metrics = np.zeros((len(kelly_fractions), len(BATCH_METRICS)), dtype=np.float64)
+    if len(kelly_fractions) == 0:
+        return metrics
+
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    atr = np.ascontiguousarray(atr, dtype=np.float64)
+    ml_confidence = np.ascontiguousarray(ml_confidence, dtype=np.float64)
+    if simulate_batch_jit is not None:
+        simulate_batch_jit(close, atr, signals, ml_confidence, entry_masks, kelly_fractions,
+                           max_drawdown_limits, float(initial_capital), out, metrics)
+    else:
+        # En CPython indexar listas es bastante más rápido que indexar arrays NumPy
+        simulate_batch(close.tolist(), atr.tolist(), signals.tolist(), ml_confidence.tolist(),
+                       entry_masks.tolist(), kelly_fractions.tolist(), max_drawdown_limits.tolist(),
+                       float(initial_capital), out, metrics)
+    return metrics
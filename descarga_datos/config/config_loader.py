@@ -48,6 +48,10 @@ class BacktestingConfig:
     )  # Selección de símbolos para backtesting
     # Nueva configuración de calidad de datos (opcional)
     data_quality: Any = None  # Se llenará con DataQualityConfig si existe en YAML
+    # Motor de backtesting de la estrategia ML: 'array' (kernel NumPy) o 'legacy' (bucle por vela)
+    backtest_engine: str = "array"
+    # Procesos para tareas en paralelo (entrenamiento walk-forward)
+    max_workers: int = 4
 
 
 @dataclass
@@ -153,6 +157,7 @@ class LiveTradingConfig:
     update_interval_seconds: int = 5
     initial_history_bars: int = 1000
     apply_risk_management: bool = True
+    incremental_indicators: bool = False  # Indicadores incrementales en live (validar paridad antes de activar)
     validation: Dict[str, Any] = field(default_factory=dict)
     strategy_mapping: Dict[str, Any] = field(default_factory=dict)
 
@@ -178,6 +183,12 @@ class MLTrainingConfig:
     """Configuración para entrenamiento y optimización ML"""
 
     safe_mode: bool = False
+    # Cargar los bosques exportados como arrays mapeados en memoria (compartidos entre procesos)
+    mmap_models: bool = True
+    # Backend de inferencia de los bosques exportados: 'auto' (Numba si está disponible), 'jit' o 'numpy'
+    forest_backend: str = "auto"
+    # Cargar los modelos compactos cuantizados sin sklearn (models.compact_model) cuando existan
+    compact_models: bool = False
     enabled_models: Dict[str, bool] = field(
         default_factory=lambda: {
             "random_forest": True,
@@ -387,6 +398,9 @@ def load_config_from_yaml(config_path: Optional[str] = None) -> Config:
                 ml_data = yaml_data["ml_training"]
                 config.ml_training = MLTrainingConfig(
                     safe_mode=ml_data.get("safe_mode", False),
+                    mmap_models=ml_data.get("mmap_models", True),
+                    forest_backend=ml_data.get("forest_backend", "auto"),
+                    compact_models=ml_data.get("compact_models", False),
                     enabled_models=ml_data.get("enabled_models", {}),
                     training=ml_data.get("training", {}),
                     optimization=ml_data.get("optimization", {}),
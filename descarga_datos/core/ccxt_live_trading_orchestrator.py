@@ -85,6 +85,10 @@ class CCXTLiveTradingOrchestrator:
         self.strategy_classes = {}
         self.strategy_instances = {}
 
+        # Inferencia ML por lotes (se crea al primer tick) y última confianza por símbolo
+        self.inference_service = None
+        self.ml_confidences = {}
+
         # Cola para procesamiento seguro de señales
         self.signal_queue = queue.Queue()
 
@@ -223,6 +227,9 @@ class CCXTLiveTradingOrchestrator:
         symbols = self.backtesting_config.get('symbols', [])
         logger.debug(f"📊 Símbolos configurados: {symbols}")
         
+        # 1) Recoger los datos recientes de todos los símbolos con mercado abierto
+        timeframe = '4h'
+        frames = {}
         for symbol in symbols:
             logger.debug(f"📈 Analizando {symbol}...")
             
@@ -236,14 +243,22 @@ class CCXTLiveTradingOrchestrator:
 
             # Obtener datos históricos recientes
             logger.debug(f"📥 Obteniendo datos históricos para {symbol}...")
-            data = self.data_provider.get_historical_data(symbol, '4h', limit=100)
+            data = self.data_provider.get_historical_data(symbol, timeframe, limit=100)
             
             if data is None or data.empty:
                 logger.warning(f"⚠️ No hay datos disponibles para {symbol}")
                 continue
             
             logger.info(f"✅ Datos obtenidos para {symbol}: {len(data)} barras")
+            frames[symbol] = data
+
+        # 2) Confianza ML de la última vela por símbolo (una llamada a predict_proba por artefacto
+        #    de modelo; con modelos por símbolo sigue siendo una llamada por símbolo). Solo se
+        #    registra en self.ml_confidences: las estrategias no la usan para generar órdenes.
+        self.ml_confidences = self._predict_ml_confidences(frames, timeframe)
 
+        # 3) Estrategias por símbolo
+        for symbol, data in frames.items():
             # Aplicar cada estrategia habilitada
             logger.debug(f"🎯 Estrategias disponibles: {list(self.strategy_classes.keys())}")
             
@@ -257,6 +272,11 @@ class CCXTLiveTradingOrchestrator:
                         module = __import__(module_path, fromlist=[class_name])
                         strategy_class = getattr(module, class_name)
                         self.strategy_instances[strategy_name] = strategy_class()
+                        # Indicadores incrementales solo si live_trading.incremental_indicators está activo
+                        # (desactivado por defecto hasta validar la paridad con el feed real)
+                        if (self.live_config.get('incremental_indicators', False)
+                                and hasattr(self.strategy_instances[strategy_name], 'incremental_indicators')):
+                            self.strategy_instances[strategy_name].incremental_indicators = True
                         logger.debug(f"✅ Estrategia {strategy_name} instanciada")
 
                     strategy = self.strategy_instances[strategy_name]
@@ -272,6 +292,37 @@ class CCXTLiveTradingOrchestrator:
                 except Exception as e:
                     logger.error(f"Error procesando estrategia {strategy_name} para {symbol}: {e}")
 
+    def _predict_ml_confidences(self, frames: Dict[str, pd.DataFrame], timeframe: str) -> Dict[str, float]:
+        """
+        Confianza ML de la última vela de cada símbolo (ver BatchInferenceService).
+
+        Las features salen del motor incremental del MLModelManager del servicio,
+        que se conserva entre ticks: solo se procesan las velas nuevas.
+
+        Args:
+            frames: Datos recientes por símbolo
+            timeframe: Timeframe de las velas
+
+        Returns:
+            Dict símbolo -> confianza (vacío si la inferencia no está disponible)
+        """
+        if not frames:
+            return {}
+        try:
+            if self.inference_service is None:
+                from models.inference_service import BatchInferenceService
+                from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+                self.inference_service = BatchInferenceService(MLModelManager(config=self.config))
+
+            start = time.perf_counter()
+            confidences = self.inference_service.predict_latest(frames, timeframe)
+            logger.info(f"🧠 Inferencia ML: {len(confidences)} símbolos en "
+                        f"{(time.perf_counter() - start) * 1000:.1f} ms")
+            return confidences
+        except Exception as e:
+            logger.error(f"Error en la inferencia ML por lotes: {e}")
+            return {}
+
     def _handle_strategy_signal(self, strategy_name: str, symbol: str, result: Dict[str, Any]):
         """
         Maneja las señales generadas por una estrategia.
@@ -0,0 +1,255 @@
+"""
+Pipeline único de features ML para entrenamiento e inferencia.
+
+MLTrainer.prepare_features y MLModelManager.prepare_features calculaban las
+mismas features por separado, creando muchas columnas intermedias en DataFrames.
+FeaturePipeline calcula todas las features en una pasada y las escribe
+directamente en una matriz NumPy contigua con un esquema de columnas fijo, de
+modo que entrenamiento y predicción comparten exactamente el mismo cálculo.
+
+Esquema:
+    FEATURE_COLUMNS    -> 18 features base (las del entrenamiento de MLTrainer)
+    BOLLINGER_COLUMNS  -> bandas de Bollinger opcionales (usadas por MLModelManager)
+
+Versiones del esquema (FEATURE_SCHEMA_VERSION, se guarda con cada modelo):
+    1 -> ha_open de la vela anterior ((open + close) / 2); modelos sin versión guardada
+    2 -> ha_open recursivo (indicators.heikin_ashi)
+Un modelo se sirve siempre con las features de su versión: cambiar el cálculo
+de una feature exige una versión nueva, no basta con la clave de la caché de
+indicadores.
+
+Winsorizing: compute_clip_bounds calcula los límites de recorte (percentiles
+1-99) de todas las columnas en una sola llamada a np.nanquantile. Se calculan una
+vez al entrenar y se guardan con el modelo; en inferencia apply_clip_bounds solo
+los aplica.
+"""
+
+import warnings
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from indicators.heikin_ashi import heikin_ashi_arrays
+from indicators.rolling import rolling_min_max, rolling_std
+from indicators.technical_indicators import TechnicalIndicators
+
+try:
+    import talib  # type: ignore
+    TALIB_AVAILABLE = True
+except ImportError:
+    talib = None
+    TALIB_AVAILABLE = False
+
+FEATURE_COLUMNS = [
+    'ha_close', 'ha_open', 'ha_high', 'ha_low', 'ema_10', 'ema_20', 'ema_200',
+    'adx', 'sar', 'atr', 'volatility', 'momentum_5', 'momentum_10', 'volume_ratio',
+    'price_position', 'trend_strength', 'returns', 'log_returns',
+]
+
+BOLLINGER_COLUMNS = ['bb_upper', 'bb_middle', 'bb_lower', 'bb_width']
+
+# Versión del cálculo de features (ver docstring del módulo)
+FEATURE_SCHEMA_VERSION = 2
+FEATURE_SCHEMA_VERSIONS = (1, 2)
+# Versión de los modelos guardados sin versión (anteriores al versionado)
+LEGACY_FEATURE_SCHEMA_VERSION = 1
+
+WINSOR_QUANTILES = (0.01, 0.99)
+
+
+def compute_clip_bounds(values: np.ndarray, columns: Sequence[str],
+                        quantiles: Sequence[float] = WINSOR_QUANTILES) -> Dict:
+    """
+    Límites de winsorizing por columna con una única llamada vectorizada.
+
+    Equivale a Series.quantile(q) columna a columna (interpolación lineal, NaN ignorados).
+
+    Args:
+        values: Matriz [n_velas, n_features]
+        columns: Nombres de las columnas de `values`
+        quantiles: Percentiles (inferior, superior)
+
+    Returns:
+        Dict serializable {'columns', 'lower', 'upper', 'quantiles'}
+    """
+    with warnings.catch_warnings():
+        # Columnas sin datos válidos -> NaN (sin recorte al aplicar)
+        warnings.simplefilter('ignore', RuntimeWarning)
+        lower, upper = np.nanquantile(np.asarray(values, dtype=np.float64), list(quantiles), axis=0)
+    return {
+        'columns': list(columns),
+        'lower': lower.tolist(),
+        'upper': upper.tolist(),
+        'quantiles': [float(q) for q in quantiles],
+    }
+
+
+def apply_clip_bounds(values: np.ndarray, columns: Sequence[str], bounds: Optional[Dict]) -> np.ndarray:
+    """
+    Recortar `values` (in place) a los límites guardados.
+
+    Las columnas que no figuran en `bounds` (o todas si bounds es None) se recortan
+    con límites calculados sobre los propios `values`, como hacía el cálculo original.
+    """
+    if values.size == 0:
+        return values
+
+    lower = np.full(len(columns), np.nan)
+    upper = np.full(len(columns), np.nan)
+    if bounds:
+        stored = {col: i for i, col in enumerate(bounds['columns'])}
+        for i, col in enumerate(columns):
+            if col in stored:
+                lower[i] = bounds['lower'][stored[col]]
+                upper[i] = bounds['upper'][stored[col]]
+        missing = [i for i, col in enumerate(columns) if col not in stored]
+    else:
+        missing = list(range(len(columns)))
+
+    if missing:
+        local = compute_clip_bounds(values[:, missing], [columns[i] for i in missing])
+        lower[missing] = local['lower']
+        upper[missing] = local['upper']
+
+    # Límites NaN (columna sin datos) -> no recortar
+    lower = np.where(np.isnan(lower), -np.inf, lower).astype(values.dtype)
+    upper = np.where(np.isnan(upper), np.inf, upper).astype(values.dtype)
+    np.clip(values, lower, upper, out=values)
+    return values
+
+
+@dataclass
+class FeatureMatrix:
+    """Matriz de features [n_velas, n_features] con su índice y nombres de columna."""
+    values: np.ndarray
+    index: pd.Index
+    columns: List[str]
+
+    def to_frame(self) -> pd.DataFrame:
+        """Vista DataFrame de la matriz (sin copiar los datos)"""
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns, copy=False)
+
+    def column_positions(self, columns: Sequence[str]) -> List[int]:
+        return [self.columns.index(col) for col in columns]
+
+    def complete_rows(self, columns: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Máscara de filas sin NaN en `columns` (todas si None), como DataFrame.dropna()"""
+        values = self.values if columns is None else self.values[:, self.column_positions(columns)]
+        return ~np.isnan(values).any(axis=1)
+
+    def take(self, mask: np.ndarray) -> 'FeatureMatrix':
+        """Subconjunto de filas (copia contigua)"""
+        return FeatureMatrix(np.ascontiguousarray(self.values[mask]), self.index[mask], list(self.columns))
+
+
+class FeaturePipeline:
+    """
+    Calcula las features ML a partir de datos OHLCV.
+
+    Usado por MLTrainer (entrenamiento) y MLModelManager (predicción) para
+    garantizar que ambos ven exactamente las mismas features.
+
+    Args:
+        schema_version: Versión del cálculo de features (FEATURE_SCHEMA_VERSIONS);
+            para predecir, la guardada con el modelo
+    """
+
+    def __init__(self, config=None, include_bollinger: bool = True, dtype=np.float64,
+                 schema_version: int = FEATURE_SCHEMA_VERSION):
+        if schema_version not in FEATURE_SCHEMA_VERSIONS:
+            raise ValueError(f"Versión de esquema de features no soportada: {schema_version}")
+        self.indicators = TechnicalIndicators(config)
+        self.include_bollinger = include_bollinger
+        self.dtype = dtype
+        self.schema_version = schema_version
+        self.columns = FEATURE_COLUMNS + (BOLLINGER_COLUMNS if include_bollinger else [])
+
+    def transform(self, data: pd.DataFrame, tail: Optional[int] = None) -> FeatureMatrix:
+        """
+        Calcular la matriz de features para todas las velas de `data`.
+
+        Las primeras velas contienen NaN donde las ventanas aún no están completas;
+        cada llamador decide cómo tratarlas (ver FeatureMatrix.complete_rows).
+
+        Args:
+            data: DataFrame con columnas open, high, low, close, volume
+            tail: Si se indica, solo se devuelven las últimas `tail` velas. Los
+                indicadores recursivos (EMA, ATR, ADX, SAR, ha_open) se siguen
+                calculando sobre todo `data`, así que las filas son idénticas a
+                las últimas de transform(data).
+
+        Returns:
+            FeatureMatrix con self.columns como esquema
+        """
+        n = len(data)
+        start = n - min(tail, n) if tail is not None else 0
+        matrix = np.empty((n - start, len(self.columns)), dtype=self.dtype)
+        position = {col: i for i, col in enumerate(self.columns)}
+
+        def put(column: str, values: np.ndarray) -> None:
+            matrix[:, position[column]] = values[start:]
+
+        open_ = data['open'].to_numpy(dtype=np.float64)
+        high = data['high'].to_numpy(dtype=np.float64)
+        low = data['low'].to_numpy(dtype=np.float64)
+        close = data['close'].to_numpy(dtype=np.float64)
+        volume = data['volume'].to_numpy(dtype=np.float64)
+
+        prev_close = np.concatenate(([np.nan], close[:-1]))
+
+        # === HEIKIN ASHI (ha_open recursivo desde el esquema 2) ===
+        ha = heikin_ashi_arrays(open_, high, low, close, recursive=self.schema_version >= 2)
+        for column in ('ha_close', 'ha_open', 'ha_high', 'ha_low'):
+            put(column, ha[column])
+
+        # === INDICADORES DE TechnicalIndicators (EMA adjust=False, ATR ewm, ADX, SAR normalizado) ===
+        ema_10 = self.indicators.calculate_ema(data, 10).to_numpy(dtype=np.float64)
+        ema_20 = self.indicators.calculate_ema(data, 20).to_numpy(dtype=np.float64)
+        atr = self.indicators.calculate_atr(data).to_numpy(dtype=np.float64)
+        put('ema_10', ema_10)
+        put('ema_20', ema_20)
+        put('ema_200', self.indicators.calculate_ema(data, 200).to_numpy(dtype=np.float64))
+        put('adx', self.indicators.calculate_adx(data).to_numpy(dtype=np.float64))
+        sar = self.indicators.calculate_sar(data)
+        put('sar', self.indicators.normalize_sar(sar, data).to_numpy(dtype=np.float64))
+        put('atr', atr)
+
+        # === RETORNOS Y VOLATILIDAD ===
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = close / prev_close
+            returns = ratio - 1
+            put('returns', returns)
+            put('log_returns', np.log(ratio))
+        put('volatility', rolling_std(returns, [20])[0])
+
+        # === MOMENTUM Y POSICIÓN DEL PRECIO ===
+        put('momentum_5', close - np.concatenate((np.full(min(5, n), np.nan), close[:-5])))
+        put('momentum_10', close - np.concatenate((np.full(min(10, n), np.nan), close[:-10])))
+        (rolling_min,), (rolling_max,) = rolling_min_max(close, [50])
+        volume_mean = pd.Series(volume).rolling(20).mean().to_numpy()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            put('price_position', (close - rolling_min) / (rolling_max - rolling_min))
+            put('volume_ratio', volume / volume_mean)
+            put('trend_strength', np.abs(ema_10 - ema_20) / atr)
+
+        # === BANDAS DE BOLLINGER ===
+        if self.include_bollinger:
+            upper, middle, lower = self._bollinger_bands(close)
+            put('bb_upper', upper)
+            put('bb_middle', middle)
+            put('bb_lower', lower)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                put('bb_width', (upper - lower) / middle)
+
+        return FeatureMatrix(matrix, data.index[start:], list(self.columns))
+
+    @staticmethod
+    def _bollinger_bands(close: np.ndarray, period: int = 20, deviations: float = 2.0):
+        """Bandas de Bollinger (TA-Lib si está disponible, si no media y desviación poblacional)"""
+        if TALIB_AVAILABLE:
+            return talib.BBANDS(close, timeperiod=period)
+        middle = pd.Series(close).rolling(period).mean().to_numpy()
+        std = rolling_std(close, [period], ddof=0)[0]
+        return middle + deviations * std, middle, middle - deviations * std
@@ -0,0 +1,148 @@
+"""
+Kernel único de velas Heikin Ashi.
+
+El ha_open real es recursivo:
+
+    ha_open[0] = (open[0] + close[0]) / 2
+    ha_open[i] = (ha_open[i-1] + ha_close[i-1]) / 2
+
+calculate_heikin_ashi y calculate_all_indicators_unified usaban aproximaciones
+distintas (open/close de la vela anterior). heikin_ashi_arrays calcula la serie
+recursiva en una sola pasada lineal sobre arrays NumPy, junto con ha_high,
+ha_low, ha_color_change y ha_trend, sin crear un DataFrame por columna.
+
+Velas con NaN: no actualizan la recursión. Si ha_close[i-1] es NaN, ha_open[i]
+conserva ha_open[i-1]; si aún no hay ningún ha_open válido, la serie arranca de
+nuevo con (open[i] + close[i]) / 2. El incremental sigue la misma regla.
+
+La recursión se compila con Numba si está disponible (ver utils.jit). Sin Numba,
+si no hay NaN se usa ewm(alpha=0.5, adjust=False) de pandas, que aplica la misma
+recurrencia en código compilado con valores idénticos; con NaN (ewm los trata de
+otra forma) se usa el bucle en Python puro.
+
+Los modelos entrenados antes del ha_open recursivo usan el ha_open de la vela
+anterior ((open[i-1] + close[i-1]) / 2): heikin_ashi_arrays(recursive=False)
+lo reproduce para el esquema de features 1 (ver feature_pipeline).
+"""
+
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+from utils.jit import jit_compile
+
+HEIKIN_ASHI_COLUMNS = ['ha_close', 'ha_open', 'ha_high', 'ha_low', 'ha_color_change', 'ha_trend']
+
+
+def _ha_open_loop(seed, ha_close):
+    """Recursión de ha_open (Python puro; se compila con Numba si está disponible)"""
+    n = len(ha_close)
+    ha_open = np.empty(n)
+    for i in range(n):
+        if i == 0 or ha_open[i - 1] != ha_open[i - 1]:
+            # Sin ha_open previo válido: semilla (open + close) / 2
+            ha_open[i] = seed[i]
+        elif ha_close[i - 1] != ha_close[i - 1]:
+            # Vela anterior con NaN: se conserva el último ha_open
+            ha_open[i] = ha_open[i - 1]
+        else:
+            ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2
+    return ha_open
+
+
+_ha_open_loop_jit = jit_compile(_ha_open_loop)
+
+
+def recursive_ha_open(open_: np.ndarray, close: np.ndarray, ha_close: np.ndarray) -> np.ndarray:
+    """
+    Serie ha_open recursiva en O(n).
+
+    Args:
+        open_: Aperturas
+        close: Cierres
+        ha_close: Cierres Heikin Ashi ((open + high + low + close) / 4)
+
+    Returns:
+        Array ha_open
+    """
+    n = len(ha_close)
+    if n == 0:
+        return np.empty(0)
+    seed = (np.asarray(open_, dtype=np.float64) + np.asarray(close, dtype=np.float64)) / 2
+    ha_close = np.ascontiguousarray(ha_close, dtype=np.float64)
+    if _ha_open_loop_jit is not None:
+        return _ha_open_loop_jit(seed, ha_close)
+    if np.isnan(seed[0]) or np.isnan(ha_close[:-1]).any():
+        return _ha_open_loop(seed, ha_close)
+
+    # ha_open[i] = 0.5 * ha_open[i-1] + 0.5 * ha_close[i-1] es un EWM con alpha=0.5
+    source = np.empty(n)
+    source[0] = seed[0]
+    source[1:] = ha_close[:-1]
+    return pd.Series(source).ewm(alpha=0.5, adjust=False).mean().to_numpy()
+
+
+def next_ha_open(prev_ha_open: float, prev_ha_close: float, open_: float, close: float) -> float:
+    """Un paso de la recursión de ha_open para los motores incrementales (misma regla de NaN que _ha_open_loop)"""
+    if prev_ha_open != prev_ha_open:
+        return (open_ + close) / 2
+    if prev_ha_close != prev_ha_close:
+        return prev_ha_open
+    return (prev_ha_open + prev_ha_close) / 2
+
+
+def previous_candle_ha_open(open_: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """ha_open no recursivo del esquema de features 1: (open + close) / 2 de la vela anterior (NaN en la primera)"""
+    open_ = np.asarray(open_, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    return np.concatenate(([np.nan], (open_[:-1] + close[:-1]) / 2))[:len(close)]
+
+
+def heikin_ashi_arrays(open_: np.ndarray, high: np.ndarray, low: np.ndarray,
+                       close: np.ndarray, recursive: bool = True) -> Dict[str, np.ndarray]:
+    """
+    Calcular todas las columnas Heikin Ashi sobre arrays OHLC.
+
+    Args:
+        recursive: ha_open recursivo (por defecto) o el de la vela anterior
+            (previous_candle_ha_open, esquema de features 1)
+
+    Returns:
+        Dict columna -> array con las columnas de HEIKIN_ASHI_COLUMNS:
+            ha_color_change: 1 si la vela pasa a alcista, -1 si pasa a bajista, 0 si no
+            ha_trend: 1 si la vela es alcista (ha_close > ha_open), -1 si no
+    """
+    open_ = np.asarray(open_, dtype=np.float64)
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+
+    ha_close = (open_ + high + low + close) / 4
+    ha_open = recursive_ha_open(open_, close, ha_close) if recursive else previous_candle_ha_open(open_, close)
+
+    with np.errstate(invalid='ignore'):
+        bullish = ha_close > ha_open
+        bearish = ha_close < ha_open
+        prev_not_bullish = np.concatenate(([False], ha_close[:-1] <= ha_open[:-1]))
+        prev_not_bearish = np.concatenate(([False], ha_close[:-1] >= ha_open[:-1]))
+
+    color_change = np.where(bullish & prev_not_bullish, 1,
+                            np.where(bearish & prev_not_bearish, -1, 0))
+
+    return {
+        'ha_close': ha_close,
+        'ha_open': ha_open,
+        # max/min ignorando NaN, como DataFrame.max(axis=1)
+        'ha_high': np.fmax(np.fmax(high, ha_open), ha_close),
+        'ha_low': np.fmin(np.fmin(low, ha_open), ha_close),
+        'ha_color_change': color_change.astype(np.int64),
+        'ha_trend': np.where(bullish, 1, -1).astype(np.int64),
+    }
+
+
+def heikin_ashi_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """heikin_ashi_arrays sobre un DataFrame OHLC (un único DataFrame de salida)"""
+    arrays = heikin_ashi_arrays(df['open'].to_numpy(), df['high'].to_numpy(),
+                                df['low'].to_numpy(), df['close'].to_numpy())
+    return pd.DataFrame(arrays, index=df.index, columns=HEIKIN_ASHI_COLUMNS)
@@ -0,0 +1,287 @@
+"""
+Features ML de las últimas velas en streaming (modo live).
+
+En cada tick FeaturePipeline.transform recalcula todas las features de la
+ventana recibida (EMAs, ATR, ADX, SAR, Heikin Ashi...) aunque solo se puntúa la
+última vela. IncrementalFeatureEngine mantiene el estado de cada feature por
+(símbolo, timeframe), igual que IncrementalIndicatorEngine, y procesa solo las
+velas nuevas en O(1).
+
+Los valores coinciden con FeaturePipeline.transform aplicado sobre toda la
+historia de velas que ha recibido el motor (no solo sobre la última ventana):
+las EMAs, el ATR, el ADX, el SAR y el ha_open dependen de toda la historia y el
+SAR se normaliza con el rango de precios de esa historia. El esquema de features
+(ha_open recursivo o de la vela anterior) es el de pipeline.schema_version.
+
+El ADX y las bandas de Bollinger reproducen la recurrencia de TA-Lib, que es lo
+que usa FeaturePipeline cuando TA-Lib está instalado; sin TA-Lib
+(INCREMENTAL_FEATURES_AVAILABLE es False) hay que usar FeaturePipeline.transform.
+"""
+
+import math
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from indicators.feature_pipeline import TALIB_AVAILABLE, FeatureMatrix, FeaturePipeline
+from indicators.heikin_ashi import next_ha_open
+from indicators.incremental_indicators import (IncrementalIndicatorEngine, _EwmMean, _ParabolicSar,
+                                               _div, _nanmax, _nanmin)
+from indicators.rolling import RollingExtreme, RollingMean, RollingStd
+
+NAN = float('nan')
+
+INCREMENTAL_FEATURES_AVAILABLE = TALIB_AVAILABLE
+
+# Tolerancia de TA-Lib para considerar un valor nulo (TA_IS_ZERO)
+TALIB_EPSILON = 1e-8
+
+
+def _true_range(high: float, low: float, prev_close: float) -> float:
+    """Rango verdadero como la macro TRUE_RANGE de TA-Lib"""
+    value = high - low
+    value = max(value, abs(high - prev_close))
+    return max(value, abs(low - prev_close))
+
+
+class _TalibAdx:
+    """Versión incremental de talib.ADX (suavizado de Wilder, NaN durante 2 * period - 1 velas)"""
+
+    def __init__(self, period: int = 14):
+        self.period = period
+        self.n_bars = 0
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.prev_close = NAN
+        self.plus_dm = 0.0
+        self.minus_dm = 0.0
+        self.true_range = 0.0
+        self.sum_dx = 0.0
+        self.adx = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        position = self.n_bars
+        self.n_bars += 1
+        if position == 0:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return NAN
+
+        period = self.period
+        diff_plus = high - self.prev_high
+        diff_minus = self.prev_low - low
+        true_range = _true_range(high, low, self.prev_close)
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        if position >= period:
+            self.minus_dm -= self.minus_dm / period
+            self.plus_dm -= self.plus_dm / period
+        if diff_minus > 0 and diff_plus < diff_minus:
+            self.minus_dm += diff_minus
+        elif diff_plus > 0 and diff_plus > diff_minus:
+            self.plus_dm += diff_plus
+
+        if position < period:
+            # Acumulación inicial de DM y TR
+            self.true_range += true_range
+            return NAN
+        self.true_range = self.true_range - (self.true_range / period) + true_range
+
+        dx = None
+        if abs(self.true_range) >= TALIB_EPSILON:
+            minus_di = 100.0 * (self.minus_dm / self.true_range)
+            plus_di = 100.0 * (self.plus_dm / self.true_range)
+            total = minus_di + plus_di
+            if abs(total) >= TALIB_EPSILON:
+                dx = 100.0 * (abs(minus_di - plus_di) / total)
+
+        if position < 2 * period:
+            # El primer ADX es la media de los primeros `period` DX
+            if dx is not None:
+                self.sum_dx += dx
+            if position < 2 * period - 1:
+                return NAN
+            self.adx = self.sum_dx / period
+        elif dx is not None:
+            self.adx = ((self.adx * (period - 1)) + dx) / period
+        return self.adx
+
+
+class _TalibBollinger:
+    """Versión incremental de talib.BBANDS con SMA (sumas móviles en el mismo orden que TA-Lib)"""
+
+    def __init__(self, period: int = 20, deviations: float = 2.0):
+        self.period = period
+        self.deviations = deviations
+        self.values = deque()
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def update(self, close: float):
+        self.values.append(close)
+        self.total += close
+        self.total_squares += close * close
+        if len(self.values) < self.period:
+            return NAN, NAN, NAN
+
+        middle = self.total / self.period
+        variance = self.total_squares / self.period - middle * middle
+        std = math.sqrt(variance) if variance >= TALIB_EPSILON else 0.0
+
+        oldest = self.values.popleft()
+        self.total -= oldest
+        self.total_squares -= oldest * oldest
+
+        band = std * self.deviations
+        return middle + band, middle, middle - band
+
+
+class IncrementalFeatureState:
+    """
+    Estado de las features de FeaturePipeline para una serie.
+
+    update() procesa una vela nueva y devuelve su fila en el orden de
+    pipeline.columns con el SAR sin normalizar: la normalización depende del
+    rango de precios de toda la historia y se aplica al leer las filas.
+    """
+
+    def __init__(self, pipeline: FeaturePipeline):
+        indicators = pipeline.indicators
+        self.columns = pipeline.columns
+        self.include_bollinger = pipeline.include_bollinger
+        self.recursive_ha = pipeline.schema_version >= 2
+        self.n_bars = 0
+        self.prev_open = NAN
+        self.prev_close = NAN
+        self.prev_ha_open = NAN
+        self.prev_ha_close = NAN
+        self.price_min = NAN
+        self.price_max = NAN
+
+        self.ema_10 = _EwmMean(10, adjust=False)
+        self.ema_20 = _EwmMean(20, adjust=False)
+        self.ema_200 = _EwmMean(200, adjust=False)
+        self.atr = _EwmMean(indicators.atr_period, adjust=False)
+        self.adx = _TalibAdx(14)
+        self.sar = _ParabolicSar(float(indicators.sar_acceleration), float(indicators.sar_maximum))
+        self.volatility = RollingStd(20)
+        self.closes = deque(maxlen=11)
+        self.close_min = RollingExtreme(50, 'min')
+        self.close_max = RollingExtreme(50, 'max')
+        self.volume_mean = RollingMean(20)
+        self.bollinger = _TalibBollinger(20) if self.include_bollinger else None
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> List[float]:
+        row: Dict[str, float] = {}
+
+        # === HEIKIN ASHI (ha_open recursivo desde el esquema 2) ===
+        ha_close = (open_ + high + low + close) / 4
+        if self.recursive_ha:
+            ha_open = next_ha_open(self.prev_ha_open, self.prev_ha_close, open_, close)
+        else:
+            ha_open = (self.prev_open + self.prev_close) / 2
+        row['ha_close'] = ha_close
+        row['ha_open'] = ha_open
+        row['ha_high'] = _nanmax(high, ha_open, ha_close)
+        row['ha_low'] = _nanmin(low, ha_open, ha_close)
+
+        # === INDICADORES DE TechnicalIndicators ===
+        ema_10 = self.ema_10.update(close)
+        ema_20 = self.ema_20.update(close)
+        atr = self.atr.update(_nanmax(high - low, abs(high - self.prev_close), abs(low - self.prev_close)))
+        adx = self.adx.update(high, low, close)
+        row['ema_10'] = ema_10
+        row['ema_20'] = ema_20
+        row['ema_200'] = self.ema_200.update(close)
+        # calculate_adx rellena con 0 las velas de calentamiento
+        row['adx'] = adx if adx == adx else 0.0
+        row['sar'] = self.sar.update(high, low)
+        row['atr'] = atr
+        self.price_min = _nanmin(self.price_min, low)
+        self.price_max = _nanmax(self.price_max, high)
+
+        # === RETORNOS Y VOLATILIDAD ===
+        ratio = _div(close, self.prev_close)
+        returns = ratio - 1
+        row['returns'] = returns
+        row['log_returns'] = math.log(ratio) if ratio > 0 else (-math.inf if ratio == 0 else NAN)
+        row['volatility'] = self.volatility.update(returns)
+
+        # === MOMENTUM Y POSICIÓN DEL PRECIO ===
+        self.closes.append(close)
+        row['momentum_5'] = close - self.closes[-6] if len(self.closes) > 5 else NAN
+        row['momentum_10'] = close - self.closes[-11] if len(self.closes) > 10 else NAN
+        close_min = self.close_min.update(close)
+        close_max = self.close_max.update(close)
+        row['price_position'] = _div(close - close_min, close_max - close_min)
+        row['volume_ratio'] = _div(volume, self.volume_mean.update(volume))
+        row['trend_strength'] = _div(abs(ema_10 - ema_20), atr)
+
+        # === BANDAS DE BOLLINGER ===
+        if self.bollinger is not None:
+            upper, middle, lower = self.bollinger.update(close)
+            row['bb_upper'] = upper
+            row['bb_middle'] = middle
+            row['bb_lower'] = lower
+            row['bb_width'] = _div(upper - lower, middle)
+
+        self.prev_open = open_
+        self.prev_close = close
+        self.prev_ha_open = ha_open
+        self.prev_ha_close = ha_close
+        self.n_bars += 1
+        return [row[column] for column in self.columns]
+
+    def normalize_sar(self, sar: float) -> float:
+        """Misma normalización que TechnicalIndicators.normalize_sar con el rango de toda la historia"""
+        price_range = self.price_max - self.price_min
+        if price_range == 0:
+            return 0.0
+        normalized = (sar - self.price_min) / price_range
+        return min(max(normalized, 0.0), 1.0) if normalized == normalized else NAN
+
+
+class IncrementalFeatureEngine(IncrementalIndicatorEngine):
+    """
+    Registro de estados de features por (símbolo, timeframe).
+
+    transform() recibe la ventana de velas más reciente, procesa solo las velas
+    nuevas y devuelve las features de las últimas `tail` velas.
+
+    Args:
+        pipeline: FeaturePipeline cuyas features se reproducen (esquema y configuración)
+        max_history: Velas guardadas por serie
+    """
+
+    def __init__(self, pipeline: FeaturePipeline, max_history: int = 5000):
+        super().__init__(pipeline.indicators.sar_acceleration, pipeline.indicators.sar_maximum, max_history)
+        self.pipeline = pipeline
+        self.columns = list(pipeline.columns)
+        self._sar_position = self.columns.index('sar')
+
+    def _new_state(self) -> IncrementalFeatureState:
+        return IncrementalFeatureState(self.pipeline)
+
+    def _rows(self, series: Dict, timestamps: List) -> List:
+        state = series['state']
+        rows = []
+        for ts in timestamps:
+            row = list(series['rows'][ts])
+            row[self._sar_position] = state.normalize_sar(row[self._sar_position])
+            rows.append(row)
+        return rows
+
+    def transform(self, symbol: str, timeframe: str, data: pd.DataFrame, tail: int = 1) -> FeatureMatrix:
+        """
+        Features de las últimas `tail` velas de `data`.
+
+        Args:
+            data: DataFrame OHLCV con índice temporal creciente y sin duplicados
+
+        Returns:
+            FeatureMatrix con el esquema de pipeline.columns
+        """
+        rows = self._sync(symbol, timeframe, data, tail=tail)
+        values = np.array(rows, dtype=self.pipeline.dtype).reshape(len(rows), len(self.columns))
+        return FeatureMatrix(values, data.index[len(data) - len(rows):], list(self.columns))
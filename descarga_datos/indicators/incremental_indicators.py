@@ -0,0 +1,410 @@
+"""
+Cálculo incremental (append-only) de indicadores para velas en streaming.
+
+En modo live se descargan las últimas N velas cada minuto y
+calculate_all_indicators_unified recalcula todo desde cero. Este módulo mantiene
+el estado de cada indicador por (símbolo, timeframe) y lo actualiza en O(1) por
+vela nueva (las ventanas son de tamaño fijo: 3, 14 o 20 velas).
+
+Una vez caliente, los valores coinciden con calculate_all_indicators_unified
+aplicado sobre la misma historia de velas que ha recibido el motor. Las EMAs
+(ewm adjust=True), el ha_open recursivo y el SAR dependen de toda la historia, por lo que sobre una
+ventana de 100 velas el batch y el incremental difieren en esas columnas: el
+incremental es el que conserva la historia completa.
+
+La última vela de un feed live suele estar en formación; si llega de nuevo con
+el mismo timestamp, se recalcula a partir del estado anterior a esa vela.
+"""
+
+import math
+import pickle
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from indicators.heikin_ashi import next_ha_open
+from indicators.rolling import RollingExtreme, RollingMean
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NAN = float('nan')
+
+# Columnas generadas, en el mismo orden que calculate_all_indicators_unified
+EMA_PERIODS = (9, 10, 21, 20, 50, 200)
+INDICATOR_COLUMNS = (
+    ['ha_close', 'ha_open', 'ha_high', 'ha_low', 'ha_color_change', 'atr', 'sar']
+    + [f'ema_{period}' for period in EMA_PERIODS]
+    + ['rsi', 'stoch_k', 'stoch_d', 'cci', 'macd', 'macd_signal', 'macd_hist',
+       'volume_sma', 'volume_ratio']
+)
+
+
+def _nanmax(*values: float) -> float:
+    """max ignorando NaN (como DataFrame.max(axis=1))"""
+    valid = [v for v in values if v == v]
+    return max(valid) if valid else NAN
+
+
+def _nanmin(*values: float) -> float:
+    """min ignorando NaN (como DataFrame.min(axis=1))"""
+    valid = [v for v in values if v == v]
+    return min(valid) if valid else NAN
+
+
+def _div(numerator: float, denominator: float) -> float:
+    """División con semántica NumPy/pandas (x/0 -> ±inf, 0/0 -> NaN)"""
+    if denominator == 0:
+        if numerator == 0 or numerator != numerator:
+            return NAN
+        return math.copysign(math.inf, numerator) * math.copysign(1.0, denominator)
+    return numerator / denominator
+
+
+def _copy_state(state):
+    """Copia profunda del estado (pickle es bastante más rápido que copy.deepcopy en cada tick)"""
+    return pickle.loads(pickle.dumps(state, pickle.HIGHEST_PROTOCOL))
+
+
+class _EwmMean:
+    """Media exponencial ewm(span, adjust).mean() (misma recurrencia que pandas)"""
+
+    def __init__(self, span: int, adjust: bool = True):
+        alpha = 2.0 / (span + 1.0)
+        self.old_wt_factor = 1.0 - alpha
+        self.new_wt = 1.0 if adjust else alpha
+        self.adjust = adjust
+        self.weighted = None
+        self.old_wt = 1.0
+
+    def update(self, value: float) -> float:
+        if self.weighted is None:
+            self.weighted = value
+            return value
+
+        if self.weighted == self.weighted:
+            self.old_wt *= self.old_wt_factor
+            if value == value:
+                # Evitar errores numéricos en series constantes
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.new_wt * value
+                    self.weighted /= (self.old_wt + self.new_wt)
+                self.old_wt = self.old_wt + self.new_wt if self.adjust else 1.0
+        elif value == value:
+            self.weighted = value
+        return self.weighted
+
+
+class _ParabolicSar:
+    """Versión incremental de indicators.technical_indicators._parabolic_sar_loop"""
+
+    def __init__(self, acceleration: float, maximum: float):
+        self.acceleration = acceleration
+        self.maximum = maximum
+        self.prev_sar = None
+        self.prev_high = NAN
+        self.prev_low = NAN
+        self.trend = 1
+        self.extreme_point = NAN
+        self.acceleration_factor = acceleration
+        self.last_valid = NAN
+
+    def update(self, high: float, low: float) -> float:
+        if self.prev_sar is None:
+            sar = low
+            self.extreme_point = high
+        else:
+            sar = self.prev_sar + self.acceleration_factor * (self.extreme_point - self.prev_sar)
+            if self.trend == 1:
+                if low <= sar:
+                    self.trend = -1
+                    sar = self.extreme_point
+                    self.extreme_point = low
+                    self.acceleration_factor = self.acceleration
+                else:
+                    if high > self.extreme_point:
+                        self.extreme_point = high
+                        self.acceleration_factor = min(self.acceleration_factor + self.acceleration, self.maximum)
+                    sar = min(sar, self.prev_low, low)
+            else:
+                if high >= sar:
+                    self.trend = 1
+                    sar = self.extreme_point
+                    self.extreme_point = high
+                    self.acceleration_factor = self.acceleration
+                else:
+                    if low < self.extreme_point:
+                        self.extreme_point = low
+                        self.acceleration_factor = min(self.acceleration_factor + self.acceleration, self.maximum)
+                    sar = max(sar, self.prev_high, high)
+
+        self.prev_sar = sar
+        self.prev_high = high
+        self.prev_low = low
+
+        # calculate_sar aplica ffill().fillna(0.0)
+        if sar == sar:
+            self.last_valid = sar
+        return self.last_valid if self.last_valid == self.last_valid else 0.0
+
+
+class IncrementalIndicatorState:
+    """
+    Estado de todos los indicadores de calculate_all_indicators_unified para una serie.
+
+    Cada llamada a update() procesa una vela nueva y devuelve los valores de los
+    indicadores para esa vela.
+    """
+
+    def __init__(self, sar_acceleration: float = 0.02, sar_maximum: float = 0.2):
+        self.prev_close = NAN
+        self.prev_ha_open = NAN
+        self.prev_ha_close = NAN
+        self.n_bars = 0
+
+        self.tr_mean = RollingMean(14)
+        self.sar = _ParabolicSar(sar_acceleration, sar_maximum)
+        self.emas = {period: _EwmMean(period) for period in EMA_PERIODS}
+        self.gain_mean = RollingMean(14)
+        self.loss_mean = RollingMean(14)
+        self.low_min = RollingExtreme(14, 'min')
+        self.high_max = RollingExtreme(14, 'max')
+        self.stoch_d_mean = RollingMean(3)
+        self.tp_mean = RollingMean(20)
+        self.tp_dev_mean = RollingMean(20)
+        self.ema_12 = _EwmMean(12)
+        self.ema_26 = _EwmMean(26)
+        self.macd_signal = _EwmMean(9)
+        self.volume_mean = RollingMean(20)
+
+    def update(self, open_: float, high: float, low: float, close: float, volume: float) -> Dict[str, float]:
+        """
+        Procesar una vela nueva.
+
+        Returns:
+            Dict columna -> valor con las columnas de INDICATOR_COLUMNS
+        """
+        row = {}
+
+        # === HEIKIN ASHI ===
+        ha_close = (open_ + high + low + close) / 4
+        # ha_open recursivo (mismo cálculo que indicators.heikin_ashi)
+        ha_open = next_ha_open(self.prev_ha_open, self.prev_ha_close, open_, close)
+        row['ha_close'] = ha_close
+        row['ha_open'] = ha_open
+        row['ha_high'] = _nanmax(high, ha_open, ha_close)
+        row['ha_low'] = _nanmin(low, ha_open, ha_close)
+        if ha_close > ha_open and self.prev_ha_close <= self.prev_ha_open:
+            row['ha_color_change'] = 1
+        elif ha_close < ha_open and self.prev_ha_close >= self.prev_ha_open:
+            row['ha_color_change'] = -1
+        else:
+            row['ha_color_change'] = 0
+
+        # === ATR ===
+        true_range = _nanmax(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        row['atr'] = self.tr_mean.update(true_range)
+
+        # === SAR ===
+        row['sar'] = self.sar.update(high, low)
+
+        # === EMAS ===
+        for period, ema in self.emas.items():
+            row[f'ema_{period}'] = ema.update(close)
+
+        # === RSI ===
+        delta = close - self.prev_close
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+        rs = _div(self.gain_mean.update(gain), self.loss_mean.update(loss))
+        row['rsi'] = 100 - _div(100, 1 + rs)
+
+        # === STOCHASTIC ===
+        low_14 = self.low_min.update(low)
+        high_14 = self.high_max.update(high)
+        stoch_k = _div(100 * (close - low_14), high_14 - low_14)
+        row['stoch_k'] = stoch_k
+        row['stoch_d'] = self.stoch_d_mean.update(stoch_k)
+
+        # === CCI ===
+        tp = (high + low + close) / 3
+        sma_tp = self.tp_mean.update(tp)
+        mad = self.tp_dev_mean.update(abs(tp - sma_tp))
+        row['cci'] = _div(tp - sma_tp, 0.015 * mad)
+
+        # === MACD ===
+        macd = self.ema_12.update(close) - self.ema_26.update(close)
+        macd_signal = self.macd_signal.update(macd)
+        row['macd'] = macd
+        row['macd_signal'] = macd_signal
+        row['macd_hist'] = macd - macd_signal
+
+        # === VOLUMEN ===
+        volume_sma = self.volume_mean.update(volume)
+        row['volume_sma'] = volume_sma
+        row['volume_ratio'] = _div(volume, volume_sma)
+
+        self.prev_close = close
+        self.prev_ha_open = ha_open
+        self.prev_ha_close = ha_close
+        self.n_bars += 1
+        return row
+
+
+class IncrementalIndicatorEngine:
+    """
+    Registro de estados incrementales por (símbolo, timeframe).
+
+    update() recibe la ventana de velas más reciente (p.ej. las 100 últimas del
+    feed live), procesa solo las velas nuevas y devuelve el mismo DataFrame que
+    calculate_all_indicators_unified.
+    """
+
+    def __init__(self, sar_acceleration: float = 0.02, sar_maximum: float = 0.2, max_history: int = 5000):
+        self.sar_acceleration = sar_acceleration
+        self.sar_maximum = sar_maximum
+        self.max_history = max_history
+        self._series: Dict[Tuple[str, str], Dict] = {}
+        self._lock = threading.Lock()
+
+    def reset(self, symbol: Optional[str] = None, timeframe: Optional[str] = None) -> None:
+        """Olvidar el estado de una serie (o de todas si no se indica)"""
+        with self._lock:
+            if symbol is None:
+                self._series.clear()
+            else:
+                self._series.pop((symbol, timeframe), None)
+
+    def _new_state(self):
+        """Estado vacío de una serie (las subclases pueden calcular otras columnas)"""
+        return IncrementalIndicatorState(self.sar_acceleration, self.sar_maximum)
+
+    def _new_series(self) -> Dict:
+        return {
+            'state': self._new_state(),
+            'state_before_last': None,
+            'last_timestamp': None,
+            'rows': {},
+            # Número de orden de cada vela del historial (para comprobar el solape en O(1))
+            'positions': {},
+            'count': 0,
+            'order': deque(),
+        }
+
+    def _apply_bar(self, series: Dict, timestamp, bar: Tuple[float, ...], keep_snapshot: bool = True) -> None:
+        """
+        Aplicar una vela al estado de la serie.
+
+        keep_snapshot guarda el estado previo para poder recalcular la vela si
+        vuelve a llegar con el mismo timestamp (solo hace falta para la última).
+        """
+        if series['last_timestamp'] is not None and timestamp == series['last_timestamp']:
+            # Vela en formación actualizada: recalcular desde el estado previo
+            series['state'] = series['state_before_last']
+        else:
+            series['positions'][timestamp] = series['count']
+            series['count'] += 1
+            series['order'].append(timestamp)
+            while len(series['order']) > self.max_history:
+                oldest = series['order'].popleft()
+                series['rows'].pop(oldest, None)
+                series['positions'].pop(oldest, None)
+        series['state_before_last'] = _copy_state(series['state']) if keep_snapshot else None
+        series['rows'][timestamp] = series['state'].update(*bar)
+        series['last_timestamp'] = timestamp
+
+    def update_bar(self, symbol: str, timeframe: str, timestamp, open_: float, high: float,
+                   low: float, close: float, volume: float) -> Dict[str, float]:
+        """
+        Procesar una única vela (nueva o repetición de la última en formación).
+
+        Returns:
+            Dict con los indicadores de esa vela
+        """
+        with self._lock:
+            series = self._series.setdefault((symbol, timeframe), self._new_series())
+            last_timestamp = series['last_timestamp']
+            if last_timestamp is not None and timestamp < last_timestamp:
+                raise ValueError(f"Vela fuera de orden para {symbol} {timeframe}: {timestamp} < {last_timestamp}")
+            self._apply_bar(series, timestamp, (float(open_), float(high), float(low), float(close), float(volume)))
+            return dict(series['rows'][timestamp])
+
+    def update(self, symbol: str, timeframe: str, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Actualizar la serie con las velas de `data` y devolver sus indicadores.
+
+        Si `data` no solapa con lo ya procesado (primer uso, hueco o reinicio), el
+        estado se reconstruye desde cero con `data`.
+
+        Args:
+            data: DataFrame OHLCV con índice temporal creciente y sin duplicados
+
+        Returns:
+            DataFrame con las columnas de data más las de INDICATOR_COLUMNS
+        """
+        values = self._sync(symbol, timeframe, data)
+
+        result = data.copy()
+        for column in INDICATOR_COLUMNS:
+            if column == 'ha_color_change':
+                result[column] = np.array([row[column] for row in values], dtype=np.int64)
+            else:
+                result[column] = np.array([row[column] for row in values], dtype=np.float64)
+        return result
+
+    def _sync(self, symbol: str, timeframe: str, data: pd.DataFrame, tail: Optional[int] = None) -> List:
+        """
+        Procesar las velas nuevas de `data` y devolver las filas de sus últimas `tail` velas (todas si None).
+        """
+        index = data.index
+        if not index.is_monotonic_increasing or not index.is_unique:
+            raise ValueError("El índice de las velas debe ser creciente y sin duplicados")
+
+        columns = [data[col].to_numpy(dtype=np.float64) for col in ('open', 'high', 'low', 'close', 'volume')]
+
+        with self._lock:
+            key = (symbol, timeframe)
+            series = self._series.get(key)
+            if series is not None and len(index):
+                positions = series['positions']
+                last_timestamp = series['last_timestamp']
+                # Tiene que solapar y toda la parte ya vista debe seguir en el historial: como el
+                # índice es creciente y sin duplicados, basta con que cuadren las posiciones
+                seen = int(index.searchsorted(last_timestamp))
+                first = positions.get(index[0])
+                overlaps = first is not None and positions[last_timestamp] - first == seen
+                if not overlaps:
+                    series = None
+            if series is None:
+                series = self._new_series()
+                self._series[key] = series
+
+            # Solo se procesan las velas desde la última ya vista (que puede estar en formación)
+            start = 0 if series['last_timestamp'] is None else int(index.searchsorted(series['last_timestamp']))
+            bars = np.column_stack([values[start:] for values in columns]).tolist()
+            final_position = len(index) - 1
+            for position, bar in enumerate(bars, start):
+                self._apply_bar(series, index[position], bar, keep_snapshot=position == final_position)
+
+            first_row = 0 if tail is None else len(index) - min(tail, len(index))
+            return self._rows(series, [index[position] for position in range(first_row, len(index))])
+
+    def _rows(self, series: Dict, timestamps: List) -> List:
+        """Filas guardadas de `timestamps` (se llama con el lock tomado)"""
+        return [series['rows'][ts] for ts in timestamps]
+
+
+_engines: Dict[Tuple[float, float], IncrementalIndicatorEngine] = {}
+_engines_lock = threading.Lock()
+
+
+def get_incremental_engine(sar_acceleration: float = 0.02, sar_maximum: float = 0.2) -> IncrementalIndicatorEngine:
+    """Motor incremental compartido por proceso para unos parámetros de SAR dados"""
+    with _engines_lock:
+        key = (float(sar_acceleration), float(sar_maximum))
+        if key not in _engines:
+            _engines[key] = IncrementalIndicatorEngine(*key)
+        return _engines[key]
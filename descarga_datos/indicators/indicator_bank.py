@@ -0,0 +1,186 @@
+"""
+Banco de indicadores para una rejilla de parámetros.
+
+Para explorar atr_period, ema_trend_period y sar_acceleration/sar_maximum sin
+recalcular los indicadores en cada trial, el banco calcula de una vez todas las
+variantes de la rejilla:
+
+    - atr: matriz [n_periodos_atr, n_velas]
+    - ema: matriz [n_periodos_ema, n_velas]
+    - sar: matriz [n_combinaciones_sar, n_velas]
+
+Las matrices pueden vivir en memoria compartida (utils.shared_arrays) para que
+otros procesos las lean sin copiarlas (ver IndicatorBank.attach).
+
+La estrategia todavía no lee esos parámetros (sus señales y el backtest usan las
+columnas fijas de calculate_all_indicators_unified), así que StrategyOptimizer
+no construye el banco: se usa con TechnicalIndicators.build_indicator_bank.
+"""
+
+from typing import Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+from utils.shared_arrays import SharedArrays
+
+logger = get_logger(__name__)
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True range con la misma semántica que calculate_all_indicators_unified (max ignorando NaN)"""
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    with np.errstate(invalid='ignore'):
+        return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def _rolling_mean_matrix(values: np.ndarray, windows: Sequence[int]) -> np.ndarray:
+    """Medias móviles (rolling(w).mean()) para varias ventanas a la vez"""
+    n = len(values)
+    result = np.full((len(windows), n), np.nan)
+    for row, window in enumerate(windows):
+        if window <= n:
+            view = np.lib.stride_tricks.sliding_window_view(values, window)
+            result[row, window - 1:] = view.mean(axis=1)
+    return result
+
+
+class IndicatorBank:
+    """
+    Matrices de indicadores precalculadas para todas las combinaciones de la rejilla.
+
+    Se construye con TechnicalIndicators.build_indicator_bank(). Las filas se
+    consultan con atr(period), ema(period) y sar(acceleration, maximum).
+    """
+
+    _MATRICES = ('atr', 'ema', 'sar')
+
+    def __init__(self, index: pd.Index, atr_periods: Sequence[int], ema_periods: Sequence[int],
+                 sar_params: Sequence[Tuple[float, float]], matrices: Dict[str, np.ndarray],
+                 shared: bool = False):
+        self.index = index
+        self.atr_periods = [int(p) for p in atr_periods]
+        self.ema_periods = [int(p) for p in ema_periods]
+        self.sar_params = [(round(float(a), 6), round(float(m), 6)) for a, m in sar_params]
+        self._atr_rows = {p: i for i, p in enumerate(self.atr_periods)}
+        self._ema_rows = {p: i for i, p in enumerate(self.ema_periods)}
+        self._sar_rows = {p: i for i, p in enumerate(self.sar_params)}
+        self._shared = None
+        if shared:
+            # La memoria compartida se libera al cerrar o destruir el banco propietario
+            self._shared = SharedArrays({name: matrices[name] for name in self._MATRICES}, dtype=np.float64)
+            self.matrices = dict(self._shared.arrays)
+        else:
+            self.matrices = {name: np.ascontiguousarray(matrices[name], dtype=np.float64)
+                             for name in self._MATRICES}
+
+    @property
+    def n_bars(self) -> int:
+        return len(self.index)
+
+    def atr(self, period: int) -> np.ndarray:
+        """ATR (media móvil simple del true range) para `period`"""
+        try:
+            return self.matrices['atr'][self._atr_rows[int(period)]]
+        except KeyError:
+            raise KeyError(f"atr_period={period} no está en el banco {self.atr_periods}")
+
+    def ema(self, period: int) -> np.ndarray:
+        """EMA de close (ewm span=period, adjust=True) para `period`"""
+        try:
+            return self.matrices['ema'][self._ema_rows[int(period)]]
+        except KeyError:
+            raise KeyError(f"ema_period={period} no está en el banco {self.ema_periods}")
+
+    def sar(self, acceleration: float, maximum: float) -> np.ndarray:
+        """Parabolic SAR para el par (acceleration, maximum)"""
+        key = (round(float(acceleration), 6), round(float(maximum), 6))
+        try:
+            return self.matrices['sar'][self._sar_rows[key]]
+        except KeyError:
+            raise KeyError(f"SAR {key} no está en el banco")
+
+    def select(self, atr_period: int, ema_period: int, sar_acceleration: float,
+               sar_maximum: float) -> Dict[str, np.ndarray]:
+        """Vistas (sin copia) de las filas de un trial concreto"""
+        return {
+            'atr': self.atr(atr_period),
+            'ema_trend': self.ema(ema_period),
+            'sar': self.sar(sar_acceleration, sar_maximum),
+        }
+
+    def spec(self) -> Dict:
+        """Descripción serializable para reabrir el banco en otro proceso con attach()"""
+        if self._shared is None:
+            raise ValueError("El banco no está en memoria compartida (shared=False)")
+        return {
+            'index': self.index,
+            'atr_periods': self.atr_periods,
+            'ema_periods': self.ema_periods,
+            'sar_params': self.sar_params,
+            'blocks': self._shared.spec(),
+        }
+
+    @classmethod
+    def attach(cls, spec: Dict) -> 'IndicatorBank':
+        """Abrir (sin copiar) un banco creado en otro proceso a partir de spec()"""
+        bank = cls.__new__(cls)
+        bank.index = spec['index']
+        bank.atr_periods = list(spec['atr_periods'])
+        bank.ema_periods = list(spec['ema_periods'])
+        bank.sar_params = [tuple(p) for p in spec['sar_params']]
+        bank._atr_rows = {p: i for i, p in enumerate(bank.atr_periods)}
+        bank._ema_rows = {p: i for i, p in enumerate(bank.ema_periods)}
+        bank._sar_rows = {p: i for i, p in enumerate(bank.sar_params)}
+        bank._shared = SharedArrays.attach(spec['blocks'])
+        bank.matrices = dict(bank._shared.arrays)
+        return bank
+
+    def close(self) -> None:
+        """Cerrar la memoria compartida (y liberarla si este proceso la creó)"""
+        self.matrices = {}
+        if self._shared is not None:
+            self._shared.close()
+            self._shared = None
+
+    @classmethod
+    def build(cls, data: pd.DataFrame, atr_periods: Iterable[int], ema_periods: Iterable[int],
+              sar_params: Iterable[Tuple[float, float]], sar_function, shared: bool = True) -> 'IndicatorBank':
+        """
+        Calcular todas las variantes en una pasada sobre los arrays OHLC.
+
+        Args:
+            data: DataFrame OHLCV
+            atr_periods: Periodos de ATR
+            ema_periods: Periodos de EMA
+            sar_params: Pares (acceleration, maximum) del SAR
+            sar_function: Función (high, low, acceleration, maximum) -> array SAR
+            shared: Guardar las matrices en memoria compartida
+
+        Returns:
+            IndicatorBank
+        """
+        atr_periods = sorted(set(int(p) for p in atr_periods))
+        ema_periods = sorted(set(int(p) for p in ema_periods))
+        sar_params = sorted(set((round(float(a), 6), round(float(m), 6)) for a, m in sar_params))
+
+        high = data['high'].to_numpy(dtype=np.float64)
+        low = data['low'].to_numpy(dtype=np.float64)
+        close = data['close'].to_numpy(dtype=np.float64)
+
+        atr_matrix = _rolling_mean_matrix(_true_range(high, low, close), atr_periods)
+
+        close_series = pd.Series(close)
+        ema_matrix = np.empty((len(ema_periods), len(close)))
+        for row, period in enumerate(ema_periods):
+            ema_matrix[row] = close_series.ewm(span=period).mean().to_numpy()
+
+        sar_matrix = np.empty((len(sar_params), len(close)))
+        for row, (acceleration, maximum) in enumerate(sar_params):
+            sar_matrix[row] = sar_function(high, low, acceleration, maximum)
+
+        logger.info(f"Banco de indicadores: {len(atr_periods)} ATR, {len(ema_periods)} EMA, "
+                    f"{len(sar_params)} SAR x {len(close)} velas")
+        return cls(data.index, atr_periods, ema_periods, sar_params,
+                   {'atr': atr_matrix, 'ema': ema_matrix, 'sar': sar_matrix}, shared=shared)
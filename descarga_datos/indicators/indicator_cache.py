@@ -0,0 +1,216 @@
+"""
+Caché de resultados de indicadores técnicos.
+
+Los mismos indicadores (EMAs, RSI, CCI, MACD...) se recalculan varias veces sobre
+el mismo DataFrame: en _prepare_data de la estrategia, en MLModelManager, en el
+optimizador y en el entrenador ML. Esta caché memoriza el DataFrame resultante
+usando como clave un hash del contenido OHLCV más los parámetros del indicador.
+
+Niveles:
+    - Memoria: LRU con un número máximo de entradas (por proceso)
+    - Disco (opcional): un .pkl por clave, reutilizable entre ejecuciones
+
+El nivel de disco se activa con configure_indicator_cache(disk_dir=...) o con la
+variable de entorno BOT_TRADER_INDICATOR_CACHE_DIR.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Versión del formato de la clave: incrementar si cambia el cálculo de algún indicador
+CACHE_KEY_VERSION = 3
+
+
+def _update_hash(hasher, values) -> None:
+    """Añadir al hash el contenido de un array/Series/Index"""
+    array = values.to_numpy() if isinstance(values, (pd.Series, pd.Index)) else np.asarray(values)
+    if array.dtype.kind in 'biufcmM':
+        hasher.update(np.ascontiguousarray(array).view(np.uint8).tobytes())
+    else:
+        # Objetos, strings, fechas con zona horaria... -> hash estable de pandas
+        hashed = pd.util.hash_pandas_object(pd.Series(array), index=False)
+        hasher.update(hashed.to_numpy().tobytes())
+
+
+def frame_fingerprint(df: pd.DataFrame) -> str:
+    """
+    Hash rápido del contenido de un DataFrame (columnas, tipos, índice y valores).
+
+    Args:
+        df: DataFrame (normalmente OHLCV)
+
+    Returns:
+        Hex digest de 32 caracteres
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    header = (tuple(map(str, df.columns)), tuple(map(str, df.dtypes)), df.shape)
+    hasher.update(repr(header).encode())
+    _update_hash(hasher, df.index)
+    for position in range(df.shape[1]):
+        _update_hash(hasher, df.iloc[:, position])
+    return hasher.hexdigest()
+
+
+class IndicatorCache:
+    """
+    Caché LRU en memoria con nivel opcional en disco para DataFrames de indicadores.
+
+    Los DataFrames se copian al guardar y al devolver, de modo que el llamador
+    puede modificar el resultado sin corromper la caché.
+    """
+
+    def __init__(self, max_entries: int = 32, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self._memory: "OrderedDict[str, pd.DataFrame]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'evictions': 0,
+        }
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, name: str, data: pd.DataFrame, params: Dict[str, Any]) -> str:
+        """
+        Construir la clave de caché.
+
+        Args:
+            name: Nombre del cálculo (p.ej. 'unified')
+            data: DataFrame de entrada
+            params: Parámetros que afectan al resultado
+
+        Returns:
+            Clave hexadecimal
+        """
+        params_repr = repr(sorted((k, repr(v)) for k, v in params.items()))
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"v{CACHE_KEY_VERSION}|{name}|{params_repr}|".encode())
+        hasher.update(frame_fingerprint(data).encode())
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        """Obtener una copia del resultado cacheado o None"""
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return cached.copy()
+
+        cached = self._read_disk(key)
+        if cached is not None:
+            with self._lock:
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                self._store_memory(key, cached)
+            return cached.copy()
+
+        with self._lock:
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, result: pd.DataFrame) -> None:
+        """Guardar una copia del resultado en memoria (y en disco si está activo)"""
+        stored = result.copy()
+        with self._lock:
+            self._store_memory(key, stored)
+        self._write_disk(key, stored)
+
+    def clear(self, disk: bool = False) -> None:
+        """Vaciar la caché en memoria (y opcionalmente la de disco)"""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.disk_dir is not None:
+            for path in self.disk_dir.glob('*.pkl'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _store_memory(self, key: str, df: pd.DataFrame) -> None:
+        self._memory[key] = df
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _read_disk(self, key: str) -> Optional[pd.DataFrame]:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.pkl"
+        if not path.exists():
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception as e:
+            logger.warning(f"Entrada de caché de indicadores corrupta {path.name}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, df: pd.DataFrame) -> None:
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / f"{key}.pkl"
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            df.to_pickle(tmp_path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir la caché de indicadores en disco: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+
+_default_cache: Optional[IndicatorCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_indicator_cache() -> IndicatorCache:
+    """Caché compartida por todas las instancias de TechnicalIndicators del proceso"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = IndicatorCache(disk_dir=os.environ.get('BOT_TRADER_INDICATOR_CACHE_DIR') or None)
+        return _default_cache
+
+
+def configure_indicator_cache(max_entries: int = 32, disk_dir: Optional[str] = None) -> IndicatorCache:
+    """
+    Reemplazar la caché compartida (p.ej. para activar el nivel de disco).
+
+    Args:
+        max_entries: Entradas máximas en memoria
+        disk_dir: Directorio para el nivel de disco (None = solo memoria)
+
+    Returns:
+        La nueva caché compartida
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = IndicatorCache(max_entries=max_entries, disk_dir=disk_dir)
+        return _default_cache
@@ -0,0 +1,353 @@
+"""
+Primitivas de ventanas móviles compartidas por indicadores y features.
+
+Los indicadores recalculaban las mismas ventanas con rolling() de pandas en
+varios módulos (estocástico, price_position, volatilidad, Bollinger). Este
+módulo ofrece kernels que procesan varias ventanas sobre la misma serie en una
+única pasada y devuelven matrices [n_ventanas, n_velas]:
+
+    rolling_min / rolling_max / rolling_min_max -> deque monotónica, O(n)
+    rolling_std  -> Welford con compensación (misma recurrencia que pandas), O(n)
+
+Todas siguen la semántica de rolling(window) de pandas: NaN hasta completar la
+ventana y NaN si la ventana contiene algún NaN. Los kernels se compilan con Numba
+si está disponible (ver utils.jit); si no, se usa pandas/NumPy.
+
+También incluye las versiones en streaming (una vela cada vez) que usa el motor
+incremental de indicadores.
+"""
+
+import math
+from collections import deque
+from typing import Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.jit import jit_compile
+
+NAN = float('nan')
+
+
+# ============================================================================
+# KERNELS BATCH (Python puro; se compilan con Numba si está disponible)
+# ============================================================================
+
+def _rolling_extrema_loop(values, windows, out_min, out_max, want_min, want_max):
+    """Mínimo/máximo móvil de varias ventanas en una pasada (deques monotónicas en anillo)"""
+    n = values.shape[0]
+    k = windows.shape[0]
+    size = 1
+    for r in range(k):
+        if windows[r] + 1 > size:
+            size = windows[r] + 1
+    min_q = np.empty((k, size), np.int64)
+    max_q = np.empty((k, size), np.int64)
+    min_head = np.zeros(k, np.int64)
+    min_len = np.zeros(k, np.int64)
+    max_head = np.zeros(k, np.int64)
+    max_len = np.zeros(k, np.int64)
+    last_nan = -1
+
+    for i in range(n):
+        x = values[i]
+        valid = x == x
+        if not valid:
+            last_nan = i
+        for r in range(k):
+            start = i - windows[r] + 1
+            if want_min:
+                while min_len[r] > 0 and min_q[r, min_head[r]] < start:
+                    min_head[r] = (min_head[r] + 1) % size
+                    min_len[r] -= 1
+                if valid:
+                    while min_len[r] > 0 and values[min_q[r, (min_head[r] + min_len[r] - 1) % size]] >= x:
+                        min_len[r] -= 1
+                    min_q[r, (min_head[r] + min_len[r]) % size] = i
+                    min_len[r] += 1
+                if start < 0 or last_nan >= start:
+                    out_min[r, i] = np.nan
+                else:
+                    out_min[r, i] = values[min_q[r, min_head[r]]]
+            if want_max:
+                while max_len[r] > 0 and max_q[r, max_head[r]] < start:
+                    max_head[r] = (max_head[r] + 1) % size
+                    max_len[r] -= 1
+                if valid:
+                    while max_len[r] > 0 and values[max_q[r, (max_head[r] + max_len[r] - 1) % size]] <= x:
+                        max_len[r] -= 1
+                    max_q[r, (max_head[r] + max_len[r]) % size] = i
+                    max_len[r] += 1
+                if start < 0 or last_nan >= start:
+                    out_max[r, i] = np.nan
+                else:
+                    out_max[r, i] = values[max_q[r, max_head[r]]]
+
+
+def _rolling_std_loop(values, windows, ddof, out):
+    """
+    Desviación típica móvil de varias ventanas en una pasada.
+
+    Welford con compensación de Kahan al quitar/añadir cada valor, en el mismo
+    orden que pandas (roll_var), por lo que el resultado coincide con rolling().std().
+    """
+    n = values.shape[0]
+    k = windows.shape[0]
+    nobs = np.zeros(k)
+    mean = np.zeros(k)
+    ssqdm = np.zeros(k)
+    compensation_add = np.zeros(k)
+    compensation_remove = np.zeros(k)
+    same_count = np.zeros(k, np.int64)
+    prev_value = np.zeros(k)
+    last_nan = -1
+
+    for i in range(n):
+        x = values[i]
+        if x != x:
+            last_nan = i
+        for r in range(k):
+            window = windows[r]
+            if i == 0:
+                prev_value[r] = x
+            # Quitar la vela que sale de la ventana
+            j = i - window
+            if j >= 0:
+                old = values[j]
+                if old == old:
+                    nobs[r] -= 1
+                    if nobs[r] > 0:
+                        prev_mean = mean[r] - compensation_remove[r]
+                        y = old - compensation_remove[r]
+                        t = y - mean[r]
+                        compensation_remove[r] = t + mean[r] - y
+                        mean[r] = mean[r] - t / nobs[r]
+                        ssqdm[r] = ssqdm[r] - (old - prev_mean) * (old - mean[r])
+                    else:
+                        mean[r] = 0.0
+                        ssqdm[r] = 0.0
+
+            # Añadir la vela nueva
+            if x == x:
+                if x == prev_value[r]:
+                    same_count[r] += 1
+                else:
+                    same_count[r] = 1
+                prev_value[r] = x
+                nobs[r] += 1
+                prev_mean = mean[r] - compensation_add[r]
+                y = x - compensation_add[r]
+                t = y - mean[r]
+                compensation_add[r] = t + mean[r] - y
+                mean[r] = mean[r] + t / nobs[r]
+                ssqdm[r] = ssqdm[r] + (x - prev_mean) * (x - mean[r])
+
+            start = i - window + 1
+            if start < 0 or last_nan >= start or nobs[r] <= ddof:
+                out[r, i] = np.nan
+            elif nobs[r] == 1 or same_count[r] >= nobs[r]:
+                out[r, i] = 0.0
+            else:
+                variance = ssqdm[r] / (nobs[r] - ddof)
+                out[r, i] = math.sqrt(variance) if variance > 0 else 0.0
+
+
+_rolling_extrema_loop_jit = jit_compile(_rolling_extrema_loop)
+_rolling_std_loop_jit = jit_compile(_rolling_std_loop)
+
+
+def _prepare(values, windows) -> Tuple[np.ndarray, np.ndarray]:
+    values = np.ascontiguousarray(values, dtype=np.float64)
+    windows = np.asarray([int(w) for w in windows], dtype=np.int64)
+    if (windows < 1).any():
+        raise ValueError(f"Las ventanas deben ser >= 1: {windows.tolist()}")
+    return values, windows
+
+
+# ============================================================================
+# API BATCH
+# ============================================================================
+
+def rolling_min_max(values, windows: Sequence[int], want_min: bool = True,
+                    want_max: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Mínimo y máximo móviles para varias ventanas en una sola pasada.
+
+    Args:
+        values: Serie de valores
+        windows: Tamaños de ventana
+        want_min / want_max: Calcular solo la parte necesaria
+
+    Returns:
+        (mínimos, máximos) como matrices [len(windows), len(values)]
+        (la parte no pedida se devuelve llena de NaN)
+    """
+    values, windows = _prepare(values, windows)
+    out_min = np.full((len(windows), len(values)), np.nan)
+    out_max = np.full((len(windows), len(values)), np.nan)
+    if _rolling_extrema_loop_jit is not None:
+        _rolling_extrema_loop_jit(values, windows, out_min, out_max, want_min, want_max)
+        return out_min, out_max
+
+    series = pd.Series(values)
+    for row, window in enumerate(windows):
+        rolling = series.rolling(int(window))
+        if want_min:
+            out_min[row] = rolling.min().to_numpy()
+        if want_max:
+            out_max[row] = rolling.max().to_numpy()
+    return out_min, out_max
+
+
+def rolling_min(values, windows: Sequence[int]) -> np.ndarray:
+    """Mínimo móvil [len(windows), len(values)]"""
+    return rolling_min_max(values, windows, want_max=False)[0]
+
+
+def rolling_max(values, windows: Sequence[int]) -> np.ndarray:
+    """Máximo móvil [len(windows), len(values)]"""
+    return rolling_min_max(values, windows, want_min=False)[1]
+
+
+def rolling_std(values, windows: Sequence[int], ddof: int = 1) -> np.ndarray:
+    """
+    Desviación típica móvil (Welford) para varias ventanas en una sola pasada.
+
+    Returns:
+        Matriz [len(windows), len(values)], igual a rolling(w).std(ddof=ddof)
+    """
+    values, windows = _prepare(values, windows)
+    out = np.full((len(windows), len(values)), np.nan)
+    if _rolling_std_loop_jit is not None:
+        _rolling_std_loop_jit(values, windows, int(ddof), out)
+        return out
+
+    series = pd.Series(values)
+    for row, window in enumerate(windows):
+        out[row] = series.rolling(int(window)).std(ddof=ddof).to_numpy()
+    return out
+
+
+# ============================================================================
+# VERSIONES EN STREAMING (motor incremental)
+# ============================================================================
+
+class RollingMean:
+    """Media móvil de ventana fija (equivalente a rolling(window).mean())"""
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.nan_count = 0
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window and self.values[0] != self.values[0]:
+            self.nan_count -= 1
+        if value != value:
+            self.nan_count += 1
+        self.values.append(value)
+
+        if len(self.values) < self.window or self.nan_count > 0:
+            return NAN
+        # fsum sobre una ventana fija: redondeo exacto y sin deriva acumulada
+        return math.fsum(self.values) / self.window
+
+
+class RollingStd:
+    """Desviación típica móvil en streaming (mismas operaciones que _rolling_std_loop)"""
+
+    def __init__(self, window: int, ddof: int = 1):
+        self.window = window
+        self.ddof = ddof
+        self.values = deque()
+        self.position = -1
+        self.last_nan = -1
+        self.nobs = 0
+        self.mean = 0.0
+        self.ssqdm = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.same_count = 0
+        self.prev_value = NAN
+
+    def update(self, value: float) -> float:
+        self.position += 1
+        if value != value:
+            self.last_nan = self.position
+        if self.position == 0:
+            self.prev_value = value
+
+        # Quitar la vela que sale de la ventana
+        self.values.append(value)
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if old == old:
+                self.nobs -= 1
+                if self.nobs > 0:
+                    prev_mean = self.mean - self.compensation_remove
+                    y = old - self.compensation_remove
+                    t = y - self.mean
+                    self.compensation_remove = t + self.mean - y
+                    self.mean = self.mean - t / self.nobs
+                    self.ssqdm = self.ssqdm - (old - prev_mean) * (old - self.mean)
+                else:
+                    self.mean = 0.0
+                    self.ssqdm = 0.0
+
+        # Añadir la vela nueva
+        if value == value:
+            if value == self.prev_value:
+                self.same_count += 1
+            else:
+                self.same_count = 1
+            self.prev_value = value
+            self.nobs += 1
+            prev_mean = self.mean - self.compensation_add
+            y = value - self.compensation_add
+            t = y - self.mean
+            self.compensation_add = t + self.mean - y
+            self.mean = self.mean + t / self.nobs
+            self.ssqdm = self.ssqdm + (value - prev_mean) * (value - self.mean)
+
+        start = self.position - self.window + 1
+        if start < 0 or self.last_nan >= start or self.nobs <= self.ddof:
+            return NAN
+        if self.nobs == 1 or self.same_count >= self.nobs:
+            return 0.0
+        variance = self.ssqdm / (self.nobs - self.ddof)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class RollingExtreme:
+    """Mínimo/máximo móvil con deque monotónica (O(1) amortizado)"""
+
+    def __init__(self, window: int, mode: str):
+        self.window = window
+        self.is_max = mode == 'max'
+        self.candidates = deque()  # (posición, valor)
+        self.nan_positions = deque()
+        self.position = -1
+
+    def update(self, value: float) -> float:
+        self.position += 1
+        start = self.position - self.window + 1
+
+        while self.candidates and self.candidates[0][0] < start:
+            self.candidates.popleft()
+        while self.nan_positions and self.nan_positions[0] < start:
+            self.nan_positions.popleft()
+
+        if value != value:
+            self.nan_positions.append(self.position)
+        elif self.is_max:
+            while self.candidates and self.candidates[-1][1] <= value:
+                self.candidates.pop()
+            self.candidates.append((self.position, value))
+        else:
+            while self.candidates and self.candidates[-1][1] >= value:
+                self.candidates.pop()
+            self.candidates.append((self.position, value))
+
+        if start < 0 or self.nan_positions:
+            return NAN
+        return self.candidates[0][1]
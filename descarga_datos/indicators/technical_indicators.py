@@ -29,6 +29,65 @@ except ImportError:
 from utils.normalization import DataNormalizer
 from config.config import NormalizationConfig
 from utils.storage import save_to_csv, DataStorage
+from utils.jit import jit_compile
+from indicators.heikin_ashi import heikin_ashi_arrays, heikin_ashi_frame
+from indicators.rolling import rolling_max, rolling_min, rolling_std
+from indicators.indicator_cache import IndicatorCache, get_indicator_cache
+from indicators.incremental_indicators import get_incremental_engine
+from indicators.indicator_bank import IndicatorBank
+
+
+def _parabolic_sar_loop(high, low, acceleration, maximum):
+    """
+    Bucle secuencial del Parabolic SAR (kernel de TechnicalIndicators._calculate_parabolic_sar).
+    
+    Solo usa escalares y arrays NumPy para poder compilarse con Numba.
+    """
+    length = len(high)
+    sar = np.zeros(length)
+    sar[0] = low[0]  # Comenzar con el primer low
+    
+    # Variables de estado
+    trend = 1  # 1 = uptrend, -1 = downtrend
+    extreme_point = high[0]
+    acceleration_factor = acceleration
+    
+    for i in range(1, length):
+        # Calcular nuevo SAR
+        sar[i] = sar[i-1] + acceleration_factor * (extreme_point - sar[i-1])
+        
+        # Determinar si hay cambio de tendencia
+        if trend == 1:  # Uptrend
+            if low[i] <= sar[i]:  # Cambio a downtrend
+                trend = -1
+                sar[i] = extreme_point  # El SAR se pone en el punto extremo anterior
+                extreme_point = low[i]  # Nuevo punto extremo es el low actual
+                acceleration_factor = acceleration  # Reset acceleration
+            else:
+                # Continuar uptrend
+                if high[i] > extreme_point:
+                    extreme_point = high[i]
+                    acceleration_factor = min(acceleration_factor + acceleration, maximum)
+                sar[i] = min(sar[i], low[i-1], low[i])  # SAR no puede estar por encima de los lows
+                
+        else:  # Downtrend
+            if high[i] >= sar[i]:  # Cambio a uptrend
+                trend = 1
+                sar[i] = extreme_point  # El SAR se pone en el punto extremo anterior
+                extreme_point = high[i]  # Nuevo punto extremo es el high actual
+                acceleration_factor = acceleration  # Reset acceleration
+            else:
+                # Continuar downtrend
+                if low[i] < extreme_point:
+                    extreme_point = low[i]
+                    acceleration_factor = min(acceleration_factor + acceleration, maximum)
+                sar[i] = max(sar[i], high[i-1], high[i])  # SAR no puede estar por debajo de los highs
+    
+    return sar
+
+
+# Versión compilada (None si Numba no está disponible)
+_parabolic_sar_loop_jit = jit_compile(_parabolic_sar_loop)
 
 
 @dataclass
@@ -66,11 +125,18 @@ class TechnicalIndicators:
     TODOS los cálculos de indicadores deben usar esta clase única.
     """
     
-    def __init__(self, config=None):
+    def __init__(self, config=None, cache: Optional[IndicatorCache] = None, use_cache: bool = True):
         self.config = config
         self.logger = get_logger(__name__)
         self.normalizer = DataNormalizer()
         
+        # Caché de resultados (compartida por proceso salvo que se pase una propia)
+        cache_enabled = use_cache and getattr(getattr(config, 'storage', None), 'cache_enabled', True)
+        if not cache_enabled:
+            self.cache = None
+        else:
+            self.cache = cache if cache is not None else get_indicator_cache()
+        
         # Extraer parámetros de configuración con valores por defecto seguros
         try:
             self.volatility_period = getattr(config.indicators.volatility, 'period', 14) if hasattr(config.indicators, 'volatility') else 14
@@ -98,7 +164,7 @@ class TechnicalIndicators:
         """Calculate market volatility using standard deviation of returns."""
         try:
             returns = df['close'].pct_change()
-            volatility = returns.rolling(window=self.volatility_period).std()
+            volatility = pd.Series(rolling_std(returns.to_numpy(), [self.volatility_period])[0], index=returns.index)
             return volatility.fillna(0)
         except Exception as e:
             self.logger.error(f"Error calculating volatility: {e}")
@@ -115,29 +181,8 @@ class TechnicalIndicators:
             DataFrame con columnas Heiken Ashi y tendencia
         """
         try:
-            ha_df = pd.DataFrame(index=df.index)
-            
-            # Cálculo de Heiken Ashi usando .loc para asignaciones
-            ha_df.loc[:, 'ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-            
-            # Inicializar ha_open
-            ha_opens = pd.Series(index=df.index)
-            ha_opens.iloc[0] = (df['open'].iloc[0] + df['close'].iloc[0]) / 2
-            
-            # Calcular ha_open de manera vectorizada para el resto
-            prev_ha_open = pd.Series(index=df.index)
-            prev_ha_open.iloc[1:] = ha_df['ha_close'].iloc[:-1].values
-            ha_opens.iloc[1:] = (ha_opens.shift().iloc[1:] + prev_ha_open.iloc[1:]) / 2
-            
-            # Asignar ha_open usando .loc
-            ha_df.loc[:, 'ha_open'] = ha_opens
-            
-            # Calcular ha_high y ha_low
-            ha_df.loc[:, 'ha_high'] = pd.concat([df['high'], ha_df['ha_open'], ha_df['ha_close']], axis=1).max(axis=1)
-            ha_df.loc[:, 'ha_low'] = pd.concat([df['low'], ha_df['ha_open'], ha_df['ha_close']], axis=1).min(axis=1)
-            
-            # Cálculo de tendencia basada en la dirección de la vela
-            ha_df['ha_trend'] = np.where(ha_df['ha_close'] > ha_df['ha_open'], 1, -1)
+            # Heiken Ashi recursivo en una sola pasada (ver indicators.heikin_ashi)
+            ha_df = heikin_ashi_frame(df)
             
             # Cálculo de fuerza de tendencia sobre período
             trend_period = self.ha_trend_period
@@ -350,6 +395,8 @@ class TechnicalIndicators:
         """
         Implementación propia del Parabolic SAR.
         
+        Usa la versión compilada con Numba si está disponible (ver utils.jit).
+        
         Args:
             high: Array de precios altos
             low: Array de precios bajos
@@ -359,56 +406,49 @@ class TechnicalIndicators:
         Returns:
             Array con valores SAR
         """
+        length = len(high)
         try:
-            length = len(high)
-            sar = np.zeros(length)
-            
-            # Inicializar SAR
-            if length > 0:
-                sar[0] = low[0]  # Comenzar con el primer low
-            
-            # Variables de estado
-            trend = 1  # 1 = uptrend, -1 = downtrend
-            extreme_point = high[0] if trend == 1 else low[0]
-            acceleration_factor = acceleration
-            
-            for i in range(1, length):
-                # Calcular nuevo SAR
-                sar[i] = sar[i-1] + acceleration_factor * (extreme_point - sar[i-1])
-                
-                # Determinar si hay cambio de tendencia
-                if trend == 1:  # Uptrend
-                    if low[i] <= sar[i]:  # Cambio a downtrend
-                        trend = -1
-                        sar[i] = extreme_point  # El SAR se pone en el punto extremo anterior
-                        extreme_point = low[i]  # Nuevo punto extremo es el low actual
-                        acceleration_factor = acceleration  # Reset acceleration
-                    else:
-                        # Continuar uptrend
-                        if high[i] > extreme_point:
-                            extreme_point = high[i]
-                            acceleration_factor = min(acceleration_factor + acceleration, maximum)
-                        sar[i] = min(sar[i], low[i-1], low[i])  # SAR no puede estar por encima de los lows
-                        
-                else:  # Downtrend
-                    if high[i] >= sar[i]:  # Cambio a uptrend
-                        trend = 1
-                        sar[i] = extreme_point  # El SAR se pone en el punto extremo anterior
-                        extreme_point = high[i]  # Nuevo punto extremo es el high actual
-                        acceleration_factor = acceleration  # Reset acceleration
-                    else:
-                        # Continuar downtrend
-                        if low[i] < extreme_point:
-                            extreme_point = low[i]
-                            acceleration_factor = min(acceleration_factor + acceleration, maximum)
-                        sar[i] = max(sar[i], high[i-1], high[i])  # SAR no puede estar por debajo de los highs
-            
-            return sar
+            if length == 0:
+                return np.zeros(0)
+            if _parabolic_sar_loop_jit is not None:
+                return _parabolic_sar_loop_jit(
+                    np.ascontiguousarray(high, dtype=np.float64),
+                    np.ascontiguousarray(low, dtype=np.float64),
+                    float(acceleration), float(maximum)
+                )
+            return _parabolic_sar_loop(high, low, acceleration, maximum)
             
         except Exception as e:
             self.logger.error(f"Error en implementación propia de SAR: {e}")
             return np.zeros(length)
     
+    def build_indicator_bank(self, data: pd.DataFrame, atr_periods, ema_periods, sar_params,
+                             shared: bool = True) -> IndicatorBank:
+        """
+        Precalcular ATR, EMA y SAR para todas las combinaciones de una rejilla de parámetros.
+        
+        Cada trial del optimizador puede indexar el banco en lugar de recalcular
+        sus indicadores (ver indicators.indicator_bank).
+        
+        Args:
+            data: DataFrame OHLCV
+            atr_periods: Periodos de ATR de la rejilla
+            ema_periods: Periodos de EMA de la rejilla
+            sar_params: Pares (acceleration, maximum) del SAR
+            shared: Guardar las matrices en memoria compartida
+            
+        Returns:
+            IndicatorBank con matrices [n_variantes, n_velas]
+        """
+        def sar_function(high, low, acceleration, maximum):
+            # Misma semántica que calculate_sar
+            if len(high) < 2:
+                return np.zeros(len(high))
+            sar_values = self._calculate_parabolic_sar(high, low, acceleration, maximum)
+            return pd.Series(sar_values).ffill().fillna(0.0).to_numpy()
+        
+        return IndicatorBank.build(data, atr_periods, ema_periods, sar_params, sar_function, shared=shared)
+    
     def normalize_sar(self, sar_values: pd.Series, df: pd.DataFrame) -> pd.Series:
         """
         Normaliza los valores del SAR de una manera específica que preserva su significado.
@@ -440,6 +480,39 @@ class TechnicalIndicators:
             self.logger.error(f"Error normalizando SAR: {e}")
             return pd.Series([0.0] * len(df), index=df.index)
     
+    def _indicator_params(self) -> Dict[str, Any]:
+        """Parámetros que afectan al resultado de los indicadores (parte de la clave de caché)"""
+        return {
+            'volatility_period': self.volatility_period,
+            'ha_trend_period': self.ha_trend_period,
+            'ha_size_threshold': self.ha_size_threshold,
+            'atr_period': self.atr_period,
+            'adx_period': self.adx_period,
+            'ema_periods': list(self.ema_periods),
+            'sar_acceleration': self.sar_acceleration,
+            'sar_maximum': self.sar_maximum,
+        }
+    
+    def _cached_calculation(self, name: str, data: pd.DataFrame, compute) -> pd.DataFrame:
+        """
+        Devolver el resultado cacheado de `compute(data)` o calcularlo y guardarlo.
+        
+        Los resultados vacíos (errores capturados) no se cachean.
+        """
+        if self.cache is None:
+            return compute(data)
+        
+        key = self.cache.make_key(name, data, self._indicator_params())
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.logger.debug(f"Indicadores '{name}' obtenidos de caché ({key[:8]})")
+            return cached
+        
+        result = compute(data)
+        if len(result.columns) > 0:
+            self.cache.put(key, result)
+        return result
+    
     def calculate_all_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Calcula todos los indicadores técnicos y retorna un DataFrame consolidado.
@@ -451,6 +524,10 @@ class TechnicalIndicators:
         Returns:
             DataFrame con datos OHLCV originales y todos los indicadores calculados
         """
+        return self._cached_calculation('all', df, self._compute_all_indicators)
+    
+    def _compute_all_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Cálculo real de calculate_all_indicators (sin caché)."""
         try:
             # Crear una copia del DataFrame original para preservar las columnas OHLCV
             result_df = df.copy()
@@ -629,21 +706,42 @@ class TechnicalIndicators:
         Returns:
             DataFrame con todos los indicadores calculados
         """
+        return self._cached_calculation('unified', data, self._compute_all_indicators_unified)
+    
+    def calculate_all_indicators_incremental(self, data: pd.DataFrame, symbol: str, timeframe: str) -> pd.DataFrame:
+        """
+        Versión incremental de calculate_all_indicators_unified para modo live.
+        
+        Mantiene el estado de los indicadores por (symbol, timeframe) y solo procesa
+        las velas nuevas de `data` (ver indicators.incremental_indicators). Si el
+        índice no es temporal y creciente, se usa el cálculo completo.
+        
+        Args:
+            data: DataFrame OHLCV con índice de timestamps
+            symbol: Símbolo del activo
+            timeframe: Timeframe de las velas
+            
+        Returns:
+            DataFrame con las mismas columnas que calculate_all_indicators_unified
+        """
+        if not data.index.is_monotonic_increasing or not data.index.is_unique or \
+                isinstance(data.index, pd.RangeIndex):
+            return self.calculate_all_indicators_unified(data)
+        
+        engine = get_incremental_engine(self.sar_acceleration, self.sar_maximum)
+        return engine.update(symbol, timeframe, data)
+    
+    def _compute_all_indicators_unified(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Cálculo real de calculate_all_indicators_unified (sin caché)."""
         df = data.copy()
         
         try:
             # === HEIKIN ASHI ===
-            df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-            df['ha_open'] = (df['open'].shift(1) + df['close'].shift(1)) / 2
-            df['ha_open'] = df['ha_open'].fillna(df['open'])
-            df['ha_high'] = df[['high', 'ha_open', 'ha_close']].max(axis=1)
-            df['ha_low'] = df[['low', 'ha_open', 'ha_close']].min(axis=1)
-            
-            # Heikin Ashi cambio de color
-            df['ha_color_change'] = np.where(
-                (df['ha_close'] > df['ha_open']) & (df['ha_close'].shift(1) <= df['ha_open'].shift(1)), 1,
-                np.where((df['ha_close'] < df['ha_open']) & (df['ha_close'].shift(1) >= df['ha_open'].shift(1)), -1, 0)
-            )
+            # ha_open recursivo y cambio de color en una sola pasada (ver indicators.heikin_ashi)
+            ha = heikin_ashi_arrays(df['open'].to_numpy(), df['high'].to_numpy(),
+                                    df['low'].to_numpy(), df['close'].to_numpy())
+            for column in ('ha_close', 'ha_open', 'ha_high', 'ha_low', 'ha_color_change'):
+                df[column] = ha[column]
 
             # === ATR ===
             high_low = df['high'] - df['low']
@@ -667,16 +765,17 @@ class TechnicalIndicators:
             df['rsi'] = 100 - (100 / (1 + rs))
 
             # === STOCHASTIC ===
-            low_14 = df['low'].rolling(window=14).min()
-            high_14 = df['high'].rolling(window=14).max()
+            low_14 = rolling_min(df['low'].to_numpy(), [14])[0]
+            high_14 = rolling_max(df['high'].to_numpy(), [14])[0]
             df['stoch_k'] = 100 * (df['close'] - low_14) / (high_14 - low_14)
             df['stoch_d'] = df['stoch_k'].rolling(window=3).mean()
 
             # === CCI ===
             tp = (df['high'] + df['low'] + df['close']) / 3
             sma_tp = tp.rolling(window=20).mean()
-            # MAD calculation - more efficient approach
-            mad = (tp - tp.rolling(window=20).mean()).abs().rolling(window=20).mean()
+            # MAD original (media móvil de |tp - sma_tp|): es la que usan los umbrales de CCI ya
+            # ajustados; la MAD real de cada ventana cambiaría la señal y exige reajustarlos
+            mad = (tp - sma_tp).abs().rolling(window=20).mean()
             df['cci'] = (tp - sma_tp) / (0.015 * mad)
 
             # === MACD ===
@@ -0,0 +1,212 @@
+"""
+Índice de artefactos de modelos (manifest JSON por directorio de modelos).
+
+MLModelManager.load_model listaba models/<SYMBOL>/ y elegía el último fichero
+en orden lexicográfico; ModelManager.list_models también listaba el
+directorio. ArtifactIndex guarda en `artifact_index.json` una entrada por
+artefacto (símbolo, tipo de modelo, hash y versión del esquema de features, rango de
+entrenamiento, métricas, tamaño y ruta) y el artefacto "latest" de cada
+(símbolo, tipo de modelo), fijado explícitamente al guardar.
+
+Las escrituras hacen read-modify-write bajo un lock (fcntl entre procesos
+cuando está disponible) y reemplazan el manifest con os.replace: un lector ve
+siempre el manifest anterior o el nuevo completo. Las lecturas se sirven desde
+el registro de modelos (models.model_registry) mientras no cambie el mtime del
+manifest.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from models.model_registry import get_model_registry
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo lock dentro del proceso
+    fcntl = None
+
+INDEX_NAME = 'artifact_index.json'
+INDEX_VERSION = 1
+
+
+def feature_schema_hash(features: Optional[Iterable[str]]) -> Optional[str]:
+    """Hash del esquema de features (nombres en orden), o None si no se conoce"""
+    if features is None:
+        return None
+    hasher = hashlib.blake2b(digest_size=8)
+    hasher.update(json.dumps([str(name) for name in features]).encode())
+    return hasher.hexdigest()
+
+
+def _json_default(value):
+    # Timestamps y tipos NumPy
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+class ArtifactIndex:
+    """
+    Manifest de los artefactos guardados en `root_dir`.
+
+    Las rutas se guardan relativas a `root_dir` y se devuelven absolutas.
+
+    Args:
+        root_dir: Directorio de modelos (el manifest se guarda en él)
+    """
+
+    def __init__(self, root_dir):
+        self.root_dir = Path(root_dir)
+        self.path = self.root_dir / INDEX_NAME
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(symbol: str, model_type: str) -> str:
+        # 'BTC/USDT' y 'BTC_USDT' son el mismo símbolo (nombre del directorio de modelos)
+        return f"{symbol.replace('/', '_')}|{model_type}"
+
+    def _relative(self, path) -> str:
+        path = Path(path)
+        try:
+            return path.resolve().relative_to(self.root_dir.resolve()).as_posix()
+        except ValueError:
+            return str(path.resolve())
+
+    def _absolute(self, relative: str) -> str:
+        return str(self.root_dir / relative)
+
+    def _load_file(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(data, dict) or data.get('version') != INDEX_VERSION:
+            return None
+        return data
+
+    def _read(self) -> Dict[str, Any]:
+        """Manifest actual (cacheado por mtime); no debe modificarse"""
+        data = get_model_registry().get(('artifact_index', str(self.path)), [str(self.path)], self._load_file)
+        return data if data is not None else {'version': INDEX_VERSION, 'artifacts': {}, 'latest': {}}
+
+    @contextmanager
+    def _locked(self):
+        """Lock exclusivo para read-modify-write del manifest"""
+        with self._lock:
+            self.root_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.root_dir / f"{INDEX_NAME}.lock", 'a') as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _update(self, mutate) -> None:
+        """Aplicar `mutate(data)` al manifest y reemplazarlo de forma atómica"""
+        with self._locked():
+            data = self._load_file() or {'version': INDEX_VERSION, 'artifacts': {}, 'latest': {}}
+            mutate(data)
+            tmp_path = self.path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(data, f, indent=2, default=_json_default)
+                os.replace(tmp_path, self.path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        get_model_registry().invalidate(('artifact_index', str(self.path)))
+
+    def record(self, path, symbol: Optional[str] = None, model_type: Optional[str] = None,
+               name: Optional[str] = None, features: Optional[Iterable[str]] = None,
+               training_range: Optional[Dict] = None, metrics: Optional[Dict] = None,
+               timeframe: Optional[str] = None, feature_schema_version: Optional[int] = None,
+               latest: bool = True) -> Dict[str, Any]:
+        """
+        Registrar (o actualizar) un artefacto ya escrito en disco.
+
+        Args:
+            path: Fichero del artefacto
+            symbol, model_type: Identifican el modelo; con ambos y latest=True el
+                artefacto pasa a ser el "latest" de ese (símbolo, tipo)
+            name: Nombre lógico (por defecto el nombre del fichero sin extensión)
+            features: Columnas de entrada (se guarda su hash de esquema)
+            training_range: Periodo de entrenamiento/validación
+            metrics: Métricas de evaluación
+            timeframe: Temporalidad de los datos
+            feature_schema_version: Versión del cálculo de features (indicators.feature_pipeline)
+
+        Returns:
+            La entrada guardada
+        """
+        relative = self._relative(path)
+        features = list(features) if features is not None else None
+        entry = {
+            'path': relative,
+            'name': name or Path(path).stem,
+            'symbol': symbol,
+            'model_type': model_type,
+            'timeframe': timeframe,
+            'feature_schema_hash': feature_schema_hash(features),
+            'n_features': len(features) if features is not None else None,
+            'feature_schema_version': feature_schema_version,
+            'training_range': training_range,
+            'metrics': metrics or {},
+            'size': os.path.getsize(path) if os.path.exists(path) else None,
+            'created_at': datetime.now().isoformat(),
+        }
+
+        def mutate(data):
+            data['artifacts'][relative] = entry
+            if latest and symbol is not None and model_type is not None:
+                data['latest'][self._key(symbol, model_type)] = relative
+
+        self._update(mutate)
+        return entry
+
+    def remove(self, path) -> None:
+        """Quitar un artefacto (y los punteros "latest" que lo señalan)"""
+        relative = self._relative(path)
+
+        def mutate(data):
+            data['artifacts'].pop(relative, None)
+            for key in [key for key, value in data['latest'].items() if value == relative]:
+                del data['latest'][key]
+
+        self._update(mutate)
+
+    def latest(self, symbol: str, model_type: str) -> Optional[str]:
+        """Ruta del último artefacto guardado para (símbolo, tipo), o None si no hay o ya no existe"""
+        relative = self._read()['latest'].get(self._key(symbol, model_type))
+        if relative is None:
+            return None
+        path = self._absolute(relative)
+        return path if os.path.exists(path) else None
+
+    def get(self, path) -> Optional[Dict[str, Any]]:
+        """Entrada de un artefacto (None si no está indexado)"""
+        return self._read()['artifacts'].get(self._relative(path))
+
+    def entries(self, symbol: Optional[str] = None, model_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Entradas indexadas, opcionalmente filtradas por símbolo y tipo de modelo"""
+        result = []
+        for entry in self._read()['artifacts'].values():
+            if symbol is not None and (entry['symbol'] or '').replace('/', '_') != symbol.replace('/', '_'):
+                continue
+            if model_type is not None and entry['model_type'] != model_type:
+                continue
+            result.append(entry)
+        return result
+
+    def exists(self) -> bool:
+        return self.path.exists()
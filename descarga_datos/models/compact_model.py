@@ -0,0 +1,254 @@
+"""
+Exportación compacta (cuantizada) de bosques + scaler sin sklearn.
+
+El dashboard, los runners live y el optimizador deserializaban el
+RandomForest y el StandardScaler completos al arrancar: unpickle obliga a
+importar sklearn (más de 1 s) y a copiar todos los arrays de cada árbol.
+
+CompactModel guarda en un único fichero <nombre>.compact.npz (sin comprimir):
+
+    feature         int16/int32   feature de cada nodo
+    threshold       float32       umbral redondeado hacia abajo al float32 más
+                                  cercano: para x float32, x <= t equivale a
+                                  x <= t32, así que se alcanza la misma hoja que
+                                  sklearn (que compara X en float32)
+    left, right     int16/int32   hijos locales al árbol (las hojas apuntan a sí mismas)
+    roots           int32/int64   primer nodo de cada árbol
+    probabilities   float32       probabilidades por clase de cada nodo
+    classes                       etiquetas de clase
+    scaler_mean, scaler_scale     parámetros del StandardScaler (float64, opcionales)
+    manifest                      JSON (n_features, max_depth, features, límites de winsorizing...)
+
+Este módulo solo importa NumPy y la biblioteca estándar: un proceso que solo
+necesita inferencia carga el modelo en milisegundos. Las probabilidades se
+guardan en float32 (diferencia frente a sklearn del orden de 1e-7); las hojas
+alcanzadas son idénticas.
+"""
+
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+COMPACT_FORMAT_VERSION = 1
+COMPACT_SUFFIX = '.compact.npz'
+
+
+def compact_path(model_path: Union[str, Path]) -> Path:
+    """Ruta del fichero compacto asociado a un artefacto (model.joblib -> model.compact.npz)"""
+    model_path = Path(model_path)
+    if model_path.suffix in ('.joblib', '.pkl'):
+        model_path = model_path.with_suffix('')
+    return model_path.with_name(model_path.name + COMPACT_SUFFIX)
+
+
+def float32_floor(values: np.ndarray) -> np.ndarray:
+    """Mayor float32 <= cada valor (float64)"""
+    values = np.asarray(values, dtype=np.float64)
+    rounded = values.astype(np.float32)
+    above = rounded.astype(np.float64) > values
+    rounded[above] = np.nextafter(rounded[above], np.float32(-np.inf))
+    return rounded
+
+
+def _index_dtype(max_value: int):
+    return np.int16 if max_value <= np.iinfo(np.int16).max else np.int32
+
+
+class CompactScaler:
+    """StandardScaler.transform a partir de mean_/scale_ guardados"""
+
+    def __init__(self, mean: np.ndarray, scale: np.ndarray, feature_names: Optional[list] = None):
+        self.mean_ = np.asarray(mean, dtype=np.float64)
+        self.scale_ = np.asarray(scale, dtype=np.float64)
+        self.n_features_in_ = len(self.mean_)
+        if feature_names is not None:
+            self.feature_names_in_ = np.asarray(feature_names, dtype=object)
+
+    def transform(self, X) -> np.ndarray:
+        columns = getattr(X, 'columns', None)
+        names = getattr(self, 'feature_names_in_', None)
+        if columns is not None and names is not None and list(columns) != list(names):
+            raise ValueError("The feature names should match those that were passed during fit.")
+        X = np.array(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X has {X.shape[-1]} features, but CompactScaler is expecting "
+                             f"{self.n_features_in_} features as input.")
+        # Mismas operaciones que sklearn (resta y división en float64)
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
+class CompactModel:
+    """
+    Bosque cuantizado con predict_proba en NumPy puro.
+
+    Expone predict_proba, predict, classes_ y n_features_in_ como el modelo
+    sklearn; `scaler` es un CompactScaler (o None si no se exportó).
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], manifest: Dict[str, Any]):
+        self.arrays = arrays
+        self.manifest = manifest
+        self.n_features_in_ = int(manifest['n_features'])
+        self.max_depth = int(manifest['max_depth'])
+        self.clip_bounds = manifest.get('clip_bounds')
+        self.scaler = None
+        if 'scaler_mean' in arrays:
+            self.scaler = CompactScaler(arrays['scaler_mean'], arrays['scaler_scale'], manifest.get('features'))
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.arrays['classes']
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.arrays['roots'])
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self.arrays.values())
+
+    @classmethod
+    def from_forest(cls, model, scaler=None, clip_bounds: Optional[Dict] = None) -> 'CompactModel':
+        """
+        Cuantizar un bosque sklearn (o ForestArrays) y, opcionalmente, su StandardScaler.
+
+        Args:
+            model: RandomForestClassifier/ExtraTreesClassifier/DecisionTreeClassifier entrenado o ForestArrays
+            scaler: StandardScaler entrenado (None o sin ajustar = sin scaler)
+            clip_bounds: Límites de winsorizing del entrenamiento (compute_clip_bounds)
+        """
+        from models.forest_arrays import ForestArrays
+
+        forest = model if isinstance(model, ForestArrays) else ForestArrays.from_sklearn(model, backend='numpy')
+        roots = np.asarray(forest.arrays['roots'], dtype=np.int64)
+        n_nodes = forest.n_nodes
+        tree_sizes = np.diff(np.append(roots, n_nodes))
+        tree_of_node = np.repeat(np.arange(len(roots)), tree_sizes)
+
+        node_dtype = _index_dtype(int(tree_sizes.max()) - 1)
+        arrays = {
+            'feature': np.asarray(forest.arrays['feature']).astype(_index_dtype(forest.n_features_in_ - 1)),
+            'threshold': float32_floor(forest.arrays['threshold']),
+            'left': (np.asarray(forest.arrays['left']) - roots[tree_of_node]).astype(node_dtype),
+            'right': (np.asarray(forest.arrays['right']) - roots[tree_of_node]).astype(node_dtype),
+            'roots': roots.astype(np.int32 if n_nodes <= np.iinfo(np.int32).max else np.int64),
+            'probabilities': np.asarray(forest.arrays['probabilities'], dtype=np.float32),
+            'classes': np.asarray(forest.arrays['classes']),
+        }
+        manifest = {
+            'format_version': COMPACT_FORMAT_VERSION,
+            'n_features': forest.n_features_in_,
+            'max_depth': forest.max_depth,
+            'n_trees': len(roots),
+            'model_type': forest.metadata.get('model_type'),
+            'features': None,
+            'clip_bounds': clip_bounds,
+        }
+        # Solo un scaler entrenado (uno sin ajustar se sigue tratando como no válido al cargar)
+        if scaler is not None and hasattr(scaler, 'n_features_in_'):
+            n_features = forest.n_features_in_
+            mean = getattr(scaler, 'mean_', None)
+            scale = getattr(scaler, 'scale_', None)
+            arrays['scaler_mean'] = np.zeros(n_features) if mean is None else np.asarray(mean, dtype=np.float64)
+            arrays['scaler_scale'] = np.ones(n_features) if scale is None else np.asarray(scale, dtype=np.float64)
+            names = getattr(scaler, 'feature_names_in_', None)
+            manifest['features'] = [str(name) for name in names] if names is not None else None
+        return cls(arrays, manifest)
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Nodo hoja (local a cada árbol) alcanzado en cada árbol.
+
+        Returns:
+            Array [n_trees, n_filas]
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X tiene forma {X.shape}; se esperaban {self.n_features_in_} features")
+
+        feature = self.arrays['feature']
+        threshold = self.arrays['threshold']
+        left = self.arrays['left']
+        right = self.arrays['right']
+        roots = self.arrays['roots'].astype(np.int64)[:, np.newaxis]
+
+        rows = np.arange(X.shape[0])[np.newaxis, :]
+        local = np.zeros((self.n_trees, X.shape[0]), dtype=np.int64)
+        # Todos los árboles y filas avanzan un nivel por iteración (las hojas apuntan a sí mismas)
+        for _ in range(self.max_depth):
+            nodes = roots + local
+            go_left = X[rows, feature[nodes]] <= threshold[nodes]
+            local = np.where(go_left, left[nodes], right[nodes]).astype(np.int64)
+        return local
+
+    def predict_proba(self, X, batch_size: int = 4096) -> np.ndarray:
+        """
+        Probabilidades por clase (X ya escalado, como en el modelo sklearn).
+
+        Returns:
+            Array [n_filas, n_clases] float64
+        """
+        X = np.asarray(X, dtype=np.float32)
+        probabilities = self.arrays['probabilities']
+        roots = self.arrays['roots'].astype(np.int64)[:, np.newaxis]
+        result = np.zeros((X.shape[0], probabilities.shape[1]), dtype=np.float64)
+        for start in range(0, X.shape[0], batch_size):
+            nodes = roots + self.apply(X[start:start + batch_size])
+            block = result[start:start + batch_size]
+            # Sumar árbol a árbol en orden (mismo orden que sklearn)
+            for tree_nodes in nodes:
+                block += probabilities[tree_nodes]
+        result /= self.n_trees
+        return result
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """Guardar en un único .npz sin comprimir (escritura atómica)"""
+        import os
+
+        path = Path(path)
+        manifest = np.frombuffer(json.dumps(self.manifest).encode(), dtype=np.uint8)
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}.npz")
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, manifest=manifest, **self.arrays)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'CompactModel':
+        """Cargar un modelo guardado con save()"""
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+        manifest = json.loads(arrays.pop('manifest').tobytes().decode())
+        if manifest.get('format_version') != COMPACT_FORMAT_VERSION:
+            raise ValueError(f"Versión de formato no soportada en {path}: {manifest.get('format_version')}")
+        return cls(arrays, manifest)
+
+
+def export_compact(model, model_path: Union[str, Path], scaler=None,
+                   clip_bounds: Optional[Dict] = None) -> Optional[Path]:
+    """
+    Guardar junto a `model_path` la versión compacta del modelo si es un bosque soportado.
+
+    Returns:
+        Ruta del fichero .compact.npz o None si el modelo no es convertible
+    """
+    from models.forest_arrays import ForestArrays
+
+    if not ForestArrays.supports(model):
+        return None
+    try:
+        return CompactModel.from_forest(model, scaler, clip_bounds).save(compact_path(model_path))
+    except Exception as e:
+        logger.warning(f"No se pudo exportar {model_path} en formato compacto: {e}")
+        return None
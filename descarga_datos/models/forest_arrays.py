@@ -0,0 +1,380 @@
+"""
+Formato de artefacto "memory-mapped" para bosques de árboles (RandomForest).
+
+sklearn copia los arrays de cada árbol a memoria propia al deserializar, así que
+cada proceso worker de un backtest u optimización paralela tenía su propia copia
+del RandomForest completo (joblib.load con mmap_mode no lo evita).
+
+ForestArrays guarda el bosque como arrays planos de nodos en ficheros .npy sin
+comprimir dentro de un directorio <nombre>.forest/:
+
+    v<id>/feature.npy, threshold.npy -> condición de cada nodo (x[feature] <= threshold)
+    v<id>/left.npy, right.npy        -> índices globales de los hijos (las hojas apuntan a sí mismas)
+    v<id>/probabilities.npy          -> probabilidades normalizadas de cada nodo [n_nodos, n_clases]
+    v<id>/roots.npy                  -> nodo raíz de cada árbol
+    v<id>/classes.npy                -> etiquetas de clase
+    manifest.json                    -> metadatos (n_features, max_depth, versión del
+                                        formato...) y subdirectorio vigente (arrays_dir)
+
+Cada save() escribe los arrays en un subdirectorio nuevo y después publica el
+manifest con os.replace (atómico): un load() concurrente lee el manifest
+anterior o el nuevo, y siempre encuentra sus arrays. Se conserva la versión
+anterior a la publicada; las más antiguas se borran. Los directorios de antes
+del versionado (arrays junto al manifest, sin arrays_dir) se siguen leyendo.
+
+ForestArrays.load() abre los arrays con np.load(mmap_mode='r'): N procesos en la
+misma máquina comparten una única copia física (page cache) y la carga en frío
+no deserializa nada. predict_proba reproduce exactamente las probabilidades de
+sklearn (mismo redondeo de X a float32 y misma suma de árboles en orden).
+
+Backends de inferencia (ForestArrays.backend):
+    - 'jit': recorrido fila a fila compilado con Numba (utils.jit), sin el
+      despacho por árbol de sklearn; es el más rápido tanto para una fila (live)
+      como para el histórico completo (backtests)
+    - 'numpy': todos los árboles y filas de un lote avanzan un nivel por
+      iteración con indexado vectorizado (fallback sin Numba)
+"""
+
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Union
+
+import numpy as np
+
+from utils.jit import jit_compile
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+FORMAT_VERSION = 1
+FOREST_SUFFIX = '.forest'
+MANIFEST_NAME = 'manifest.json'
+ARRAY_NAMES = ('feature', 'threshold', 'left', 'right', 'probabilities', 'roots', 'classes')
+
+
+def _forest_proba_loop(X, feature, threshold, left, right, probabilities, roots, max_depth, out):
+    """
+    Sumar en `out` [n_filas, n_clases] las probabilidades de la hoja de cada árbol.
+
+    Los árboles se suman en orden para cada fila (mismo redondeo que sklearn);
+    el llamador divide por el número de árboles.
+    """
+    n_rows = X.shape[0]
+    n_classes = probabilities.shape[1]
+    nodes = np.empty(n_rows, dtype=np.int64)
+    # Árbol a árbol: el árbol actual se mantiene en caché mientras se recorren todas las filas
+    for t in range(roots.shape[0]):
+        for i in range(n_rows):
+            nodes[i] = roots[t]
+        # Todas las filas avanzan un nivel por pasada (filas independientes, sin saltos
+        # impredecibles); las hojas apuntan a sí mismas, así que max_depth pasadas bastan
+        for _ in range(max_depth):
+            for i in range(n_rows):
+                node = nodes[i]
+                if X[i, feature[node]] <= threshold[node]:
+                    nodes[i] = left[node]
+                else:
+                    nodes[i] = right[node]
+        for i in range(n_rows):
+            for c in range(n_classes):
+                out[i, c] += probabilities[nodes[i], c]
+    return out
+
+
+_forest_proba_loop_jit = jit_compile(_forest_proba_loop)
+
+
+class ForestArrays:
+    """
+    Bosque de árboles de decisión como arrays planos de nodos.
+
+    Se usa como sustituto del modelo sklearn en inferencia: expone predict_proba,
+    classes_ y n_features_in_.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], n_features: int, max_depth: int,
+                 metadata: Optional[Dict[str, Any]] = None, backend: str = 'auto'):
+        missing = [name for name in ARRAY_NAMES if name not in arrays]
+        if missing:
+            raise ValueError(f"Faltan arrays del bosque: {missing}")
+        if backend not in ('auto', 'jit', 'numpy'):
+            raise ValueError(f"Backend de inferencia desconocido: {backend}")
+        self.arrays = arrays
+        self.n_features_in_ = int(n_features)
+        self.max_depth = int(max_depth)
+        self.metadata = metadata or {}
+        # 'auto' usa el kernel compilado si Numba está disponible
+        if backend == 'auto':
+            backend = 'jit' if _forest_proba_loop_jit is not None else 'numpy'
+        elif backend == 'jit' and _forest_proba_loop_jit is None:
+            logger.warning("Numba no disponible: ForestArrays usa el backend 'numpy'")
+            backend = 'numpy'
+        self.backend = backend
+
+    # ------------------------------------------------------------------
+    # Conversión desde sklearn
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def supports(model) -> bool:
+        """True si `model` es un árbol o bosque de clasificación de sklearn ya entrenado"""
+        estimators = getattr(model, 'estimators_', None)
+        if estimators is None:
+            estimators = [model]
+        try:
+            return (len(estimators) > 0
+                    and all(hasattr(e, 'tree_') and hasattr(e, 'classes_') for e in estimators)
+                    and getattr(model, 'n_outputs_', 1) == 1)
+        except TypeError:
+            return False
+
+    @classmethod
+    def from_sklearn(cls, model, backend: str = 'auto') -> 'ForestArrays':
+        """
+        Convertir un RandomForestClassifier/ExtraTreesClassifier/DecisionTreeClassifier.
+
+        Args:
+            model: Estimador sklearn entrenado con una única salida
+            backend: Backend de inferencia ('auto', 'jit' o 'numpy')
+
+        Returns:
+            ForestArrays equivalente
+        """
+        if not cls.supports(model):
+            raise TypeError(f"Modelo no soportado para ForestArrays: {type(model).__name__}")
+
+        estimators = getattr(model, 'estimators_', None) or [model]
+        n_classes = len(model.classes_)
+        features, thresholds, lefts, rights, probabilities, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator in estimators:
+            tree = estimator.tree_
+            n_nodes = tree.node_count
+            node_ids = np.arange(n_nodes, dtype=np.int64)
+            is_leaf = tree.children_left == -1
+
+            # Las hojas apuntan a sí mismas: el recorrido puede dar siempre max_depth pasos
+            lefts.append(np.where(is_leaf, node_ids, tree.children_left) + offset)
+            rights.append(np.where(is_leaf, node_ids, tree.children_right) + offset)
+            features.append(np.where(is_leaf, 0, tree.feature).astype(np.int64))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+
+            # Mismo valor que DecisionTreeClassifier.predict_proba: sklearn >= 1.4 guarda
+            # fracciones y las devuelve tal cual; versiones anteriores guardan conteos
+            # y normalizan al predecir
+            value = tree.value[:, 0, :n_classes].astype(np.float64)
+            totals = value.sum(axis=1)
+            if not np.allclose(totals, 1.0):
+                totals[totals == 0.0] = 1.0
+                value = value / totals[:, np.newaxis]
+            probabilities.append(value)
+
+            roots.append(offset)
+            offset += n_nodes
+            max_depth = max(max_depth, int(tree.max_depth))
+
+        arrays = {
+            'feature': np.concatenate(features),
+            'threshold': np.concatenate(thresholds).astype(np.float64),
+            'left': np.concatenate(lefts).astype(np.int64),
+            'right': np.concatenate(rights).astype(np.int64),
+            'probabilities': np.ascontiguousarray(np.concatenate(probabilities)),
+            'roots': np.asarray(roots, dtype=np.int64),
+            'classes': np.asarray(model.classes_),
+        }
+        metadata = {'model_type': type(model).__name__, 'n_trees': len(estimators)}
+        return cls(arrays, model.n_features_in_, max_depth, metadata, backend=backend)
+
+    # ------------------------------------------------------------------
+    # Inferencia
+    # ------------------------------------------------------------------
+
+    @property
+    def classes_(self) -> np.ndarray:
+        return self.arrays['classes']
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.arrays['roots'])
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.arrays['feature'])
+
+    def apply(self, X) -> np.ndarray:
+        """
+        Hoja alcanzada en cada árbol.
+
+        Args:
+            X: Matriz [n_filas, n_features] (se redondea a float32 como en sklearn)
+
+        Returns:
+            Índices globales de hoja [n_trees, n_filas]
+        """
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"X tiene forma {X.shape}; se esperaban {self.n_features_in_} features")
+
+        feature = self.arrays['feature']
+        threshold = self.arrays['threshold']
+        left = self.arrays['left']
+        right = self.arrays['right']
+
+        rows = np.arange(X.shape[0])[np.newaxis, :]
+        nodes = np.repeat(self.arrays['roots'][:, np.newaxis], X.shape[0], axis=1)
+        # Todos los árboles y filas avanzan un nivel por iteración
+        for _ in range(self.max_depth):
+            go_left = X[rows, feature[nodes]] <= threshold[nodes]
+            nodes = np.where(go_left, left[nodes], right[nodes])
+        return nodes
+
+    def predict_proba(self, X, batch_size: int = 4096) -> np.ndarray:
+        """
+        Probabilidades por clase, idénticas a RandomForestClassifier.predict_proba.
+
+        Args:
+            X: Matriz [n_filas, n_features] o DataFrame
+            batch_size: Filas evaluadas a la vez en el backend 'numpy' (limita la memoria temporal)
+
+        Returns:
+            Array [n_filas, n_clases]
+        """
+        X = np.asarray(X, dtype=np.float32)
+        probabilities = self.arrays['probabilities']
+        result = np.zeros((X.shape[0], probabilities.shape[1]), dtype=np.float64)
+
+        if self.backend == 'jit':
+            if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+                raise ValueError(f"X tiene forma {X.shape}; se esperaban {self.n_features_in_} features")
+            _forest_proba_loop_jit(np.ascontiguousarray(X), self.arrays['feature'], self.arrays['threshold'],
+                                   self.arrays['left'], self.arrays['right'], probabilities,
+                                   self.arrays['roots'], self.max_depth, result)
+            result /= self.n_trees
+            return result
+
+        for start in range(0, X.shape[0], batch_size):
+            leaves = self.apply(X[start:start + batch_size])
+            block = result[start:start + batch_size]
+            # Sumar árbol a árbol en orden (mismo redondeo que sklearn)
+            for tree_leaves in leaves:
+                block += probabilities[tree_leaves]
+
+        result /= self.n_trees
+        return result
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    def save(self, path: Union[str, Path]) -> Path:
+        """
+        Guardar en el directorio `path` (arrays .npy sin comprimir + manifest.json).
+
+        Los arrays se escriben en un subdirectorio de versión nuevo y el manifest
+        que lo señala se sustituye de forma atómica (os.replace): `path` existe en
+        todo momento y un load() concurrente abre la versión anterior o la nueva.
+        Los procesos que ya tengan mapeada una versión anterior siguen funcionando.
+        """
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        previous = self._arrays_dir_name(path)
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        version_path = path / version
+        version_path.mkdir()
+
+        for name in ARRAY_NAMES:
+            np.save(version_path / f"{name}.npy", np.ascontiguousarray(self.arrays[name]), allow_pickle=False)
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'arrays_dir': version,
+            'n_features': self.n_features_in_,
+            'max_depth': self.max_depth,
+            'n_nodes': self.n_nodes,
+            'n_trees': self.n_trees,
+            'metadata': self.metadata,
+        }
+        tmp_manifest = path / f"{MANIFEST_NAME}.tmp-{os.getpid()}"
+        with open(tmp_manifest, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(tmp_manifest, path / MANIFEST_NAME)
+
+        self._remove_old_versions(path, keep={version, previous})
+        return path
+
+    @staticmethod
+    def _arrays_dir_name(path: Path) -> Optional[str]:
+        """Subdirectorio de arrays del manifest publicado ('' si es del formato sin versiones, None si no hay)"""
+        try:
+            with open(path / MANIFEST_NAME, 'r') as f:
+                return json.load(f).get('arrays_dir', '')
+        except (OSError, ValueError):
+            return None
+
+    @staticmethod
+    def _remove_old_versions(path: Path, keep) -> None:
+        """Borrar las versiones que no están en `keep` ('' conserva los arrays del formato sin versiones)"""
+        for entry in path.iterdir():
+            if entry.name == MANIFEST_NAME or entry.name in keep:
+                continue
+            if entry.is_dir() and entry.name.startswith('v'):
+                shutil.rmtree(entry, ignore_errors=True)
+            elif entry.suffix == '.npy' and '' not in keep:
+                entry.unlink()
+
+    @classmethod
+    def load(cls, path: Union[str, Path], mmap_mode: Optional[str] = 'r', backend: str = 'auto') -> 'ForestArrays':
+        """
+        Abrir un bosque guardado con save().
+
+        Args:
+            path: Directorio <nombre>.forest
+            mmap_mode: 'r' para mapear los arrays en memoria (compartidos entre procesos),
+                None para leerlos completos
+            backend: Backend de inferencia ('auto', 'jit' o 'numpy')
+
+        Returns:
+            ForestArrays
+        """
+        path = Path(path)
+        with open(path / MANIFEST_NAME, 'r') as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != FORMAT_VERSION:
+            raise ValueError(f"Versión de formato no soportada en {path}: {manifest.get('format_version')}")
+
+        # Directorios sin versiones: los arrays están junto al manifest
+        arrays_path = path / manifest.get('arrays_dir', '')
+        arrays = {name: np.load(arrays_path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+                  for name in ARRAY_NAMES}
+        return cls(arrays, manifest['n_features'], manifest['max_depth'], manifest.get('metadata'), backend=backend)
+
+
+def forest_path(model_path: Union[str, Path]) -> Path:
+    """Ruta del directorio .forest asociado a un artefacto (model.joblib -> model.forest)"""
+    model_path = Path(model_path)
+    if model_path.suffix in ('.joblib', '.pkl'):
+        model_path = model_path.with_suffix('')
+    return model_path.with_name(model_path.name + FOREST_SUFFIX)
+
+
+def export_forest(model, model_path: Union[str, Path]) -> Optional[Path]:
+    """
+    Guardar junto a `model_path` la versión ForestArrays del modelo si es un bosque soportado.
+
+    Returns:
+        Ruta del directorio .forest o None si el modelo no es convertible
+    """
+    if not ForestArrays.supports(model):
+        return None
+    try:
+        return ForestArrays.from_sklearn(model).save(forest_path(model_path))
+    except Exception as e:
+        logger.warning(f"No se pudo exportar {model_path} a ForestArrays: {e}")
+        return None
@@ -0,0 +1,100 @@
+"""
+Servicio de inferencia ML por lotes para trading en vivo.
+
+En cada tick el orquestador live analizaba los símbolos uno a uno y cada uno
+hacía su propia llamada a predict_proba. BatchInferenceService recoge la última
+fila de features de todos los símbolos, agrupa las filas por artefacto de
+modelo y ejecuta una sola llamada a predict_proba por artefacto; después
+reparte las confianzas por símbolo.
+
+Limitación: los modelos se entrenan por símbolo (models/<SYMBOL>/), así que
+con la configuración actual cada artefacto sirve a un único símbolo y sigue
+habiendo una llamada a predict_proba por símbolo: el coste por tick crece con
+el número de símbolos. Solo los símbolos que comparten artefacto (p.ej. el
+mismo fichero de modelo registrado para varios) se puntúan en un único lote.
+Lo que sí se ahorra en cada tick es el cálculo de features de toda la ventana
+(ver MLModelManager.latest_features).
+
+La confianza se calcula igual que MLModelManager.predict_latest (mismas
+features, límites de winsorizing, scaler y transformación de probabilidades):
+las features de la última vela salen del motor incremental del gestor, que
+solo procesa las velas nuevas de cada símbolo en cada tick.
+"""
+
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from models.model_registry import get_model_registry
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+NEUTRAL_CONFIDENCE = 0.5
+
+
+class BatchInferenceService:
+    """
+    Confianza ML de la última vela para varios símbolos con una predicción por artefacto de modelo.
+
+    Args:
+        ml_manager: MLModelManager que sirve modelos, scalers y features
+        model_name: Modelo a usar para todos los símbolos
+    """
+
+    def __init__(self, ml_manager, model_name: str = 'random_forest'):
+        self.ml_manager = ml_manager
+        self.model_name = model_name
+        self.stats = {
+            'ticks': 0,
+            'symbols': 0,
+            'predict_calls': 0,
+        }
+
+    def predict_latest(self, frames: Dict[str, pd.DataFrame], timeframe: Optional[str] = None) -> Dict[str, float]:
+        """
+        Confianza de la última vela de cada símbolo.
+
+        Args:
+            frames: DataFrame OHLCV reciente por símbolo
+            timeframe: Timeframe de las velas (clave del estado incremental de features)
+
+        Returns:
+            Dict símbolo -> confianza en [0, 1]. Los símbolos sin modelo entrenado
+            se omiten; los que no tienen features válidas en la última vela o cuyo
+            scaler no es válido reciben la confianza neutral (0.5), igual que en
+            predict_signal.
+        """
+        confidences: Dict[str, float] = {}
+        # artefacto -> (modelo, símbolos, filas escaladas)
+        batches: Dict[object, tuple] = {}
+
+        for symbol, data in frames.items():
+            if data is None or data.empty:
+                continue
+            pair = self.ml_manager.load_model(symbol, self.model_name)
+            model, scaler = pair
+            if model is None or scaler is None:
+                logger.warning(f"Sin modelo {self.model_name} para {symbol}: se omite en la inferencia por lotes")
+                continue
+
+            row = self.ml_manager.latest_scaled_features(data, symbol, self.model_name, scaler, timeframe)
+            if row is None:
+                confidences[symbol] = NEUTRAL_CONFIDENCE
+                continue
+
+            artifact = get_model_registry().artifact_id(pair) or id(model)
+            batch = batches.setdefault(artifact, (model, [], []))
+            batch[1].append(symbol)
+            batch[2].append(row)
+
+        for model, symbols, rows in batches.values():
+            proba = self.ml_manager.predict_proba_serial(model, np.vstack(rows))
+            for symbol, confidence in zip(symbols, self.ml_manager.confidence_from_proba(proba)):
+                confidences[symbol] = float(confidence)
+
+        self.stats['ticks'] += 1
+        self.stats['symbols'] += len(confidences)
+        self.stats['predict_calls'] += len(batches)
+        return confidences
@@ -5,6 +5,7 @@ import os
 import pickle
 import joblib
 from typing import Dict, Any, Optional
+from models.artifact_index import ArtifactIndex
 from utils.logger import get_logger
 
 class ModelManager:
@@ -28,6 +29,8 @@ class ModelManager:
 
         # Crear directorio si no existe
         os.makedirs(self.base_dir, exist_ok=True)
+        # Índice de artefactos (models.artifact_index): nombres y metadatos de los modelos guardados
+        self.index = ArtifactIndex(self.base_dir)
 
         self.logger.info(f"ModelManager inicializado en {self.base_dir}")
 
@@ -38,7 +41,9 @@ class ModelManager:
         Args:
             model: Modelo a guardar
             model_name: Nombre del modelo
-            metadata: Metadatos opcionales
+            metadata: Metadatos opcionales. Las claves symbol, model_type, features,
+                training_range, metrics y feature_schema_version se copian al índice
+                de artefactos
 
         Returns:
             bool: True si se guardó correctamente
@@ -56,6 +61,18 @@ class ModelManager:
             with open(model_path, 'wb') as f:
                 pickle.dump(data, f)
 
+            metadata = metadata or {}
+            self.index.record(
+                model_path,
+                symbol=metadata.get('symbol'),
+                model_type=metadata.get('model_type'),
+                name=model_name,
+                features=metadata.get('features'),
+                training_range=metadata.get('training_range'),
+                metrics=metadata.get('metrics'),
+                feature_schema_version=metadata.get('feature_schema_version'),
+            )
+
             self.logger.info(f"Modelo {model_name} guardado en {model_path}")
             return True
 
@@ -93,6 +110,29 @@ class ModelManager:
             self.logger.error(f"Error cargando modelo {model_name}: {e}")
             return None
 
+    def export_compact(self, model: Any, model_name: str, scaler: Any = None,
+                       clip_bounds: Optional[Dict] = None) -> Optional[str]:
+        """
+        Exporta el modelo (y su scaler) en formato compacto sin sklearn (models.compact_model)
+
+        Args:
+            model: Bosque entrenado (RandomForest, ExtraTrees, DecisionTree)
+            model_name: Nombre del modelo (se guarda como <model_name>.compact.npz)
+            scaler: StandardScaler entrenado (opcional)
+            clip_bounds: Límites de winsorizing del entrenamiento (opcional)
+
+        Returns:
+            Ruta del fichero o None si el modelo no es exportable
+        """
+        from models.compact_model import export_compact
+
+        path = export_compact(model, os.path.join(self.base_dir, f"{model_name}.pkl"), scaler, clip_bounds)
+        if path is None:
+            return None
+        self.index.record(path, name=f"{model_name}.compact")
+        self.logger.info(f"Modelo {model_name} exportado en formato compacto en {path}")
+        return str(path)
+
     def list_models(self) -> list:
         """
         Lista todos los modelos disponibles
@@ -101,9 +141,16 @@ class ModelManager:
             Lista de nombres de modelos
         """
         try:
-            files = os.listdir(self.base_dir)
-            models = [f.replace('.pkl', '') for f in files if f.endswith('.pkl')]
-            return models
+            files = [f for f in os.listdir(self.base_dir) if f.endswith('.pkl')]
+            if not self.index.exists():
+                # Directorio anterior al índice
+                return [f.replace('.pkl', '') for f in files]
+            entries = [entry for entry in self.index.entries() if entry['path'].endswith('.pkl')]
+            # Los .pkl guardados antes de crear el índice (o por otras herramientas) no están indexados
+            indexed = {entry['path'] for entry in entries}
+            names = {entry['name'] for entry in entries}
+            names.update(f.replace('.pkl', '') for f in files if f not in indexed)
+            return sorted(names)
         except Exception as e:
             self.logger.error(f"Error listando modelos: {e}")
             return []
@@ -123,6 +170,7 @@ class ModelManager:
 
             if os.path.exists(model_path):
                 os.remove(model_path)
+                self.index.remove(model_path)
                 self.logger.info(f"Modelo {model_name} eliminado")
                 return True
             else:
@@ -0,0 +1,149 @@
+"""
+Registro de modelos en memoria compartido por todo el proceso.
+
+La estrategia llama a MLModelManager.load_model para comprobar que el modelo
+existe y predict_signal lo vuelve a cargar; en cada llamada se listaba el
+directorio de modelos y se deserializaba el RandomForest completo desde disco.
+Con cientos de trials de Optuna o un tick live por minuto eso es trabajo inútil.
+
+ModelRegistry guarda cada artefacto cargado junto con la firma (ruta, mtime,
+tamaño) de sus ficheros. Mientras la firma no cambie se devuelve el objeto ya
+cargado; si el fichero se reescribe (reentrenamiento) se recarga en la
+siguiente petición. Los listados de directorio se cachean con el mtime del
+directorio, de modo que un modelo nuevo se detecta sin listar en cada llamada.
+"""
+
+import hashlib
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def file_signature(paths: Sequence[str]) -> Optional[Tuple]:
+    """Firma (ruta, mtime_ns, tamaño) de los ficheros, o None si alguno no existe"""
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        signature.append((os.path.abspath(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class ModelRegistry:
+    """
+    Caché de modelos (y scalers, metadatos...) invalidada por mtime.
+
+    Los objetos devueltos se comparten entre todos los llamadores del proceso:
+    no deben modificarse de forma permanente.
+    """
+
+    def __init__(self):
+        self._entries: Dict[Hashable, Tuple[Tuple, Any]] = {}
+        self._listings: Dict[str, Tuple[int, List[str]]] = {}
+        self._lock = threading.RLock()
+        self.stats = {
+            'hits': 0,
+            'loads': 0,
+            'reloads': 0,
+        }
+
+    def get(self, key: Hashable, paths: Sequence[str], loader: Callable[[], Any]) -> Any:
+        """
+        Devolver el objeto cacheado para `key` o cargarlo con `loader()`.
+
+        Args:
+            key: Identificador del artefacto (p.ej. (symbol, model_name))
+            paths: Ficheros de los que depende el artefacto
+            loader: Función sin argumentos que carga el artefacto desde disco
+
+        Returns:
+            El artefacto, o None si algún fichero no existe o loader() devuelve None
+        """
+        with self._lock:
+            signature = file_signature(paths)
+            if signature is None:
+                self._entries.pop(key, None)
+                return None
+
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self.stats['hits'] += 1
+                return entry[1]
+
+            value = loader()
+            if value is None:
+                self._entries.pop(key, None)
+                return None
+
+            self.stats['reloads' if entry is not None else 'loads'] += 1
+            if entry is not None:
+                logger.info(f"Modelo {key} modificado en disco: recargado")
+            self._entries[key] = (signature, value)
+            return value
+
+    def list_dir(self, directory: str) -> List[str]:
+        """Contenido de `directory` (cacheado mientras no cambie su mtime; [] si no existe)"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._listings.get(directory)
+            if cached is not None and cached[0] == mtime:
+                return cached[1]
+            names = sorted(os.listdir(directory))
+            self._listings[directory] = (mtime, names)
+            return names
+
+    def artifact_id(self, value: Any) -> Optional[str]:
+        """
+        Identificador de la versión de un artefacto servido por el registro.
+
+        Se deriva de la clave y de la firma de sus ficheros, así que cambia al
+        reentrenar el modelo (sirve como clave de cachés de predicciones).
+
+        Args:
+            value: Objeto devuelto por get()
+
+        Returns:
+            Hex digest o None si el objeto no está en el registro
+        """
+        with self._lock:
+            for key, (signature, cached) in self._entries.items():
+                if cached is value:
+                    hasher = hashlib.blake2b(digest_size=16)
+                    hasher.update(repr((key, signature)).encode())
+                    return hasher.hexdigest()
+        return None
+
+    def invalidate(self, key: Hashable) -> None:
+        """Olvidar un artefacto (se recargará en la próxima petición)"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._listings.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_default_registry: Optional[ModelRegistry] = None
+_default_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Registro compartido por todas las instancias de MLModelManager del proceso"""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = ModelRegistry()
+        return _default_registry
@@ -0,0 +1,196 @@
+"""
+Caché de predicciones ML (serie ml_confidence).
+
+Durante la optimización, cada trial de Optuna llama a predict_signal sobre el
+histórico completo aunque el modelo y los datos no cambian entre trials (solo
+cambian umbrales y parámetros de riesgo). Esta caché guarda la serie
+ml_confidence con clave (id del artefacto del modelo, huella de los datos), de
+modo que a partir del segundo trial no se construyen features ni se ejecuta el
+modelo.
+
+Niveles:
+    - Memoria: LRU con un número máximo de entradas (por proceso)
+    - Disco (opcional): un .npy float32 por clave, reutilizable entre procesos y ejecuciones
+
+Con el nivel de disco activo los valores se guardan siempre en float32 (también
+en memoria), para que el resultado no dependa de qué nivel responde.
+
+El nivel de disco se activa con configure_prediction_cache(disk_dir=...) o con la
+variable de entorno BOT_TRADER_PREDICTION_CACHE_DIR.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Incrementar si cambia el cálculo de las features o de la confianza
+PREDICTION_KEY_VERSION = 1
+
+
+class PredictionCache:
+    """
+    Caché LRU de arrays de confianza con nivel opcional en disco.
+
+    Los arrays se devuelven como copias de solo lectura compartidas: el llamador
+    debe copiarlos si necesita modificarlos.
+    """
+
+    def __init__(self, max_entries: int = 64, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        self.dtype = np.float32 if self.disk_dir is not None else np.float64
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'memory_hits': 0,
+            'disk_hits': 0,
+            'evictions': 0,
+        }
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def make_key(artifact_id: str, data_fingerprint: str, params: Dict[str, Any]) -> str:
+        """
+        Construir la clave de caché.
+
+        Args:
+            artifact_id: Identificador de la versión del modelo (ver ModelRegistry.artifact_id)
+            data_fingerprint: Huella de los datos de entrada (ver frame_fingerprint)
+            params: Otros parámetros que afectan a la predicción (features, modelo...)
+
+        Returns:
+            Clave hexadecimal
+        """
+        params_repr = repr(sorted((k, repr(v)) for k, v in params.items()))
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"v{PREDICTION_KEY_VERSION}|{artifact_id}|{data_fingerprint}|{params_repr}".encode())
+        return hasher.hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """Obtener el array cacheado (solo lectura) o None"""
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None:
+                self._memory.move_to_end(key)
+                self.stats['hits'] += 1
+                self.stats['memory_hits'] += 1
+                return cached
+
+        cached = self._read_disk(key)
+        with self._lock:
+            if cached is not None:
+                self.stats['hits'] += 1
+                self.stats['disk_hits'] += 1
+                self._store_memory(key, cached)
+                return cached
+            self.stats['misses'] += 1
+        return None
+
+    def put(self, key: str, values: np.ndarray) -> np.ndarray:
+        """
+        Guardar las confianzas y devolver la versión almacenada (en el dtype de la caché).
+        """
+        stored = np.array(values, dtype=self.dtype)
+        stored.flags.writeable = False
+        with self._lock:
+            self._store_memory(key, stored)
+        self._write_disk(key, stored)
+        return stored
+
+    def clear(self, disk: bool = False) -> None:
+        """Vaciar la caché en memoria (y opcionalmente la de disco)"""
+        with self._lock:
+            self._memory.clear()
+        if disk and self.disk_dir is not None:
+            for path in self.disk_dir.glob('*.npy'):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+
+    def __len__(self) -> int:
+        return len(self._memory)
+
+    def _store_memory(self, key: str, values: np.ndarray) -> None:
+        self._memory[key] = values
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _read_disk(self, key: str) -> Optional[np.ndarray]:
+        if self.disk_dir is None:
+            return None
+        path = self.disk_dir / f"{key}.npy"
+        if not path.exists():
+            return None
+        try:
+            values = np.load(path, allow_pickle=False)
+            values.flags.writeable = False
+            return values
+        except Exception as e:
+            logger.warning(f"Entrada de caché de predicciones corrupta {path.name}: {e}")
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+
+    def _write_disk(self, key: str, values: np.ndarray) -> None:
+        if self.disk_dir is None:
+            return
+        path = self.disk_dir / f"{key}.npy"
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(tmp_path, 'wb') as f:
+                np.save(f, values, allow_pickle=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"No se pudo escribir la caché de predicciones en disco: {e}")
+            try:
+                tmp_path.unlink()
+            except OSError:
+                pass
+
+
+_default_cache: Optional[PredictionCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """Caché compartida por todas las instancias de MLModelManager del proceso"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = PredictionCache(disk_dir=os.environ.get('BOT_TRADER_PREDICTION_CACHE_DIR') or None)
+        return _default_cache
+
+
+def configure_prediction_cache(max_entries: int = 64, disk_dir: Optional[str] = None) -> PredictionCache:
+    """
+    Reemplazar la caché compartida (p.ej. para activar el nivel de disco).
+
+    Args:
+        max_entries: Entradas máximas en memoria
+        disk_dir: Directorio para el nivel de disco (None = solo memoria)
+
+    Returns:
+        La nueva caché compartida
+    """
+    global _default_cache
+    with _default_cache_lock:
+        _default_cache = PredictionCache(max_entries=max_entries, disk_dir=disk_dir)
+        return _default_cache
@@ -24,6 +24,10 @@ from config.config_loader import load_config
 # Importación lazy para evitar KeyboardInterrupt en Python 3.13
 # from core.downloader import AdvancedDataDownloader  # Importado solo cuando se necesita
 from indicators.technical_indicators import TechnicalIndicators
+from indicators.feature_pipeline import FEATURE_SCHEMA_VERSION, apply_clip_bounds, compute_clip_bounds
+from models.artifact_index import ArtifactIndex
+from models.compact_model import export_compact
+from models.forest_arrays import export_forest
 from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
@@ -58,6 +62,11 @@ class MLTrainer:
             self.train_end = '2023-12-31'
             self.val_start = '2024-01-01'
             self.val_end = '2025-10-06'
+
+        # Walk-forward en paralelo (folds en un pool de procesos, ver optimizacion.walk_forward)
+        self.walk_forward = bool(self.ml_config.get('walk_forward', False))
+        self.walk_forward_splits = int(self.ml_config.get('walk_forward_splits', 5))
+        self.max_workers = getattr(getattr(self.config, 'backtesting', None), 'max_workers', 1)
             
         # Usar la ruta centralizada en descarga_datos/models
         self.models_dir = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'models' / symbol.replace('/', '_')
@@ -195,23 +204,10 @@ class MLTrainer:
             await downloader.shutdown()
 
     def prepare_features(self, df):
-        # Usar el objeto Config correctamente
-        from indicators.technical_indicators import TechnicalIndicators
-        indicator = TechnicalIndicators(self.config)
-        df = indicator.calculate_all_indicators(df)
-        df['returns'] = df['close'].pct_change()
-        df['log_returns'] = np.log(df['close'] / df['close'].shift(1))
-        df['volatility'] = df['returns'].rolling(window=20).std()
-        df['ha_close'] = (df['open'] + df['high'] + df['low'] + df['close']) / 4
-        df['ha_open'] = (df['open'].shift(1) + df['close'].shift(1)) / 2
-        df['ha_high'] = df[['high', 'ha_open', 'ha_close']].max(axis=1)
-        df['ha_low'] = df[['low', 'ha_open', 'ha_close']].min(axis=1)
-        df['momentum_5'] = df['close'] - df['close'].shift(5)
-        df['momentum_10'] = df['close'] - df['close'].shift(10)
-        df['price_position'] = (df['close'] - df['close'].rolling(50).min()) / (df['close'].rolling(50).max() - df['close'].rolling(50).min())
-        df['volume_ratio'] = df['volume'] / df['volume'].rolling(20).mean()
-        df['trend_strength'] = abs(df['ema_10'] - df['ema_20']) / df['atr']
-        return df
+        """Features ML con el pipeline compartido (mismo cálculo que MLModelManager.prepare_features)"""
+        from indicators.feature_pipeline import FeaturePipeline
+        pipeline = FeaturePipeline(self.config, include_bollinger=False)
+        return pipeline.transform(df).to_frame()
 
     def create_labels(self, df):
         future_returns = df['close'].shift(-5) / df['close'] - 1
@@ -223,11 +219,8 @@ class MLTrainer:
     def select_features(self):
         return ['ha_close', 'ha_open', 'ha_high', 'ha_low', 'ema_10', 'ema_20', 'ema_200', 'macd', 'macd_signal', 'adx', 'sar', 'atr', 'volatility', 'bb_upper', 'bb_lower', 'rsi', 'momentum_5', 'momentum_10', 'volume_ratio', 'price_position', 'trend_strength', 'returns', 'log_returns']
 
-    def train_models(self, X_train, y_train, X_val, y_val):
-        logger.info('Entrenando modelos ML...')
-        logger.info(f'Modelos activados: {self.enabled_models}')
-        
-        # VALIDACIÓN CRÍTICA: Verificar que hay datos suficientes
+    def validate_split(self, X_train, X_val):
+        """Verificar que los periodos de entrenamiento y validación tienen datos suficientes"""
         if len(X_train) == 0:
             raise RuntimeError(f'❌ Período de entrenamiento vacío. Train: {self.train_start} → {self.train_end}. Verificar datos disponibles.')
         
@@ -239,23 +232,14 @@ class MLTrainer:
         
         logger.info(f'✅ Datos válidos - Train: {len(X_train)} samples, Val: {len(X_val)} samples')
 
-        # Importaciones lazy de sklearn para compatibilidad Python 3.13
+    def build_models(self):
+        """Modelos activados en la configuración, sin entrenar"""
+        from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
         try:
-            from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
-            from sklearn.model_selection import TimeSeriesSplit, cross_val_score
-            from sklearn.metrics import confusion_matrix, roc_auc_score
-            try:
-                from xgboost import XGBClassifier  # type: ignore
-                XGBOOST_AVAILABLE = True
-            except ImportError:
-                XGBOOST_AVAILABLE = False
-            logger.info('Importaciones sklearn exitosas')
-        except KeyboardInterrupt:
-            logger.error('KeyboardInterrupt durante importación sklearn - abortando entrenamiento')
-            return {}, None
-        except Exception as e:
-            logger.error(f'Error importando sklearn: {e}')
-            return {}, None
+            from xgboost import XGBClassifier  # type: ignore
+            XGBOOST_AVAILABLE = True
+        except ImportError:
+            XGBOOST_AVAILABLE = False
 
         models = {}
 
@@ -304,6 +288,29 @@ class MLTrainer:
         if not models:
             raise ValueError('No hay modelos ML activados. Verifique la configuración enabled_models')
 
+        return models
+
+    def train_models(self, X_train, y_train, X_val, y_val):
+        logger.info('Entrenando modelos ML...')
+        logger.info(f'Modelos activados: {self.enabled_models}')
+        
+        # VALIDACIÓN CRÍTICA: Verificar que hay datos suficientes
+        self.validate_split(X_train, X_val)
+
+        # Importaciones lazy de sklearn para compatibilidad Python 3.13
+        try:
+            from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+            from sklearn.metrics import confusion_matrix, roc_auc_score
+            logger.info('Importaciones sklearn exitosas')
+        except KeyboardInterrupt:
+            logger.error('KeyboardInterrupt durante importación sklearn - abortando entrenamiento')
+            return {}, None
+        except Exception as e:
+            logger.error(f'Error importando sklearn: {e}')
+            return {}, None
+
+        models = self.build_models()
+
         results = {}
         best_model, best_score = None, 0
         tscv = TimeSeriesSplit(n_splits=3)
@@ -345,21 +352,37 @@ class MLTrainer:
         logger.info(f'Mejor modelo: {best_model} (AUC: {best_score:.4f})')
         return results, best_model
 
-    def save_models(self, results, feature_names):
+    def save_models(self, results, feature_names, clip_bounds=None):
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
         for name, data in results.items():
             model_path = self.models_dir / f'{name}_{timestamp}.joblib'
             joblib.dump(data['model'], model_path)
+            # Copia en arrays planos para cargarla mapeada en memoria (models.forest_arrays)
+            export_forest(data['model'], model_path)
+            # Versión cuantizada sin sklearn para procesos de solo inferencia (models.compact_model)
+            export_compact(data['model'], model_path, clip_bounds=clip_bounds)
             metadata = {'symbol': self.symbol, 'timeframe': self.timeframe, 'model_type': name, 'features': feature_names, 'cv_mean': data['cv_mean'], 'val_auc': data['val_auc'], 'timestamp': timestamp}
+            # Versión del cálculo de features (MLModelManager sirve el modelo con esa versión)
+            metadata['feature_schema_version'] = FEATURE_SCHEMA_VERSION
+            if clip_bounds is not None:
+                # Límites de winsorizing del entrenamiento (los aplica MLModelManager en inferencia)
+                metadata['clip_bounds'] = clip_bounds
             with open(self.models_dir / f'{name}_{timestamp}_metadata.json', 'w') as f:
                 json.dump(metadata, f, indent=2)
-
-    async def run(self):
-        logger.info('INICIANDO ENTRENAMIENTO ML')
-        df = await self.download_data()
-        df = self.prepare_features(df)
+            # Entrada en el índice de artefactos: pasa a ser el "latest" del símbolo y tipo de modelo
+            ArtifactIndex(self.models_dir.parent).record(
+                model_path, symbol=self.symbol, model_type=name, features=feature_names,
+                training_range={'train_start': self.train_start, 'train_end': self.train_end,
+                                'val_start': self.val_start, 'val_end': self.val_end},
+                metrics={'cv_mean': data['cv_mean'], 'cv_std': data['cv_std'],
+                         'val_auc': data['val_auc'], 'val_accuracy': data['val_accuracy']},
+                timeframe=self.timeframe, feature_schema_version=FEATURE_SCHEMA_VERSION)
+
+    def split_training_data(self, df):
+        """Features y etiquetas separadas en entrenamiento y validación (X_train, y_train, X_val, y_val, feature_cols)"""
+        features = self.prepare_features(df)
         labels = self.create_labels(df)
-        feature_cols = [col for col in self.select_features() if col in df.columns]
+        feature_cols = [col for col in self.select_features() if col in features.columns]
         # Convertir fechas string a timestamps enteros para comparación
         train_start_ts = int(pd.Timestamp(self.train_start).timestamp())
         train_end_ts = int(pd.Timestamp(self.train_end).timestamp())
@@ -384,17 +407,58 @@ class MLTrainer:
             n_train = int(n_total * 0.7)
             train_mask = pd.Series([True] * n_train + [False] * (n_total - n_train), index=df.index)
             val_mask = pd.Series([False] * n_train + [True] * (n_total - n_train), index=df.index)
-        X_train = df.loc[train_mask, feature_cols].fillna(0)
+        X_train = features.loc[train_mask, feature_cols].fillna(0)
         y_train = labels.loc[train_mask].dropna()
-        X_val = df.loc[val_mask, feature_cols].fillna(0)
+        X_val = features.loc[val_mask, feature_cols].fillna(0)
         y_val = labels.loc[val_mask].dropna()
         common_train = X_train.index.intersection(y_train.index)
         X_train, y_train = X_train.loc[common_train], y_train.loc[common_train]
         common_val = X_val.index.intersection(y_val.index)
         X_val, y_val = X_val.loc[common_val], y_val.loc[common_val]
         logger.info(f'Train: {len(X_train)}, Val: {len(X_val)}')
-        results, best_model = self.train_models(X_train, y_train, X_val, y_val)
-        self.save_models(results, feature_cols)
+        return X_train, y_train, X_val, y_val, feature_cols
+
+    def winsorize_split(self, X_train, X_val):
+        """
+        Recortar entrenamiento y validación a los percentiles de X_train.
+
+        Los límites se guardan con el modelo y la inferencia los aplica con
+        apply_clip_bounds, así que el modelo se entrena con features recortadas igual.
+
+        Returns:
+            (X_train, X_val, clip_bounds)
+        """
+        columns = list(X_train.columns)
+        clip_bounds = compute_clip_bounds(X_train.to_numpy(dtype=np.float64), columns)
+
+        def clip(X):
+            values = apply_clip_bounds(X.to_numpy(dtype=np.float64, copy=True), columns, clip_bounds)
+            return pd.DataFrame(values, index=X.index, columns=columns)
+
+        return clip(X_train), clip(X_val), clip_bounds
+
+    def train_models_walk_forward(self, X_train, y_train, X_val, y_val):
+        """train_models con validación walk-forward y los folds en un pool de procesos"""
+        from optimizacion.walk_forward import WalkForwardTrainer
+
+        self.validate_split(X_train, X_val)
+        trainer = WalkForwardTrainer(max_workers=self.max_workers, n_splits=self.walk_forward_splits)
+        trainer.add_symbol(self.symbol, X_train, y_train, X_val, y_val, self.build_models())
+        results, best_model = trainer.run()[self.symbol]
+        if best_model is None:
+            raise RuntimeError('No se pudo entrenar ningún modelo ML')
+        return results, best_model
+
+    async def run(self):
+        logger.info('INICIANDO ENTRENAMIENTO ML')
+        df = await self.download_data()
+        X_train, y_train, X_val, y_val, feature_cols = self.split_training_data(df)
+        X_train, X_val, clip_bounds = self.winsorize_split(X_train, X_val)
+        if self.walk_forward:
+            results, best_model = self.train_models_walk_forward(X_train, y_train, X_val, y_val)
+        else:
+            results, best_model = self.train_models(X_train, y_train, X_val, y_val)
+        self.save_models(results, feature_cols, clip_bounds)
         logger.info('ENTRENAMIENTO COMPLETADO')
         return results, best_model
 
@@ -0,0 +1,138 @@
+"""
+Barrido vectorizado de parámetros sobre un TrialContext.
+
+Cada trial de Optuna crea una estrategia, ejecuta el kernel y reconstruye los
+trades como diccionarios: del orden de milisegundos por candidato. Para
+búsquedas en rejilla o aleatorias con miles de candidatos, ParameterSweep
+evalúa un lote de K conjuntos de parámetros de una vez:
+
+1. Reduce cada conjunto a los parámetros que cambian el backtest
+   (EFFECTIVE_PARAMS) y agrupa los candidatos equivalentes. Las señales de
+   _compute_signal_masks usan umbrales fijos, así que stoch_*, cci_threshold,
+   volume_ratio_min y el resto de parámetros de indicadores no alteran el
+   resultado en esta estrategia.
+2. Construye la matriz booleana [K, n_velas] de velas en las que cada
+   candidato puede abrir posición: señal, umbral ML, liquidez y límite de
+   trades concurrentes.
+3. Simula todos los candidatos en una sola llamada al kernel por lotes
+   (trade_kernel.run_batch_backtest), que solo devuelve métricas agregadas.
+
+Las métricas coinciden exactamente con las de TrialContext.run para los mismos
+parámetros (sin la lista de trades).
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from backtesting.trade_kernel import BATCH_METRICS, liquidity_mask, run_batch_backtest
+from optimizacion.trial_context import TrialContext
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ParameterSweep:
+    """
+    Evaluación por lotes de conjuntos de parámetros sobre un contexto de trials.
+
+    Args:
+        context: TrialContext con datos, confianza ML y señales precalculados
+    """
+
+    # Parámetros que cambian el resultado del backtest (en este orden en la matriz efectiva)
+    EFFECTIVE_PARAMS = ('ml_threshold', 'liquidity_score_min', 'kelly_fraction', 'max_drawdown',
+                        'max_concurrent_trades')
+
+    def __init__(self, context: TrialContext):
+        self.context = context
+        # TrialContext.run crea la estrategia con config=params: los parámetros que falten
+        # en un candidato toman los valores por defecto de la estrategia
+        base = UltraDetailedHeikinAshiMLStrategy(config={})
+        self.defaults = {name: float(getattr(base, name)) for name in self.EFFECTIVE_PARAMS}
+        self.initial_capital = float(base.portfolio_value)
+        self._has_signal = context.arrays['signals'] != 0
+        self._liquidity = {}
+
+    def effective_params(self, param_sets: Sequence[Dict]) -> np.ndarray:
+        """Matriz [K, len(EFFECTIVE_PARAMS)] con los parámetros relevantes de cada candidato"""
+        return np.array([[float(params.get(name, self.defaults[name])) for name in self.EFFECTIVE_PARAMS]
+                         for params in param_sets], dtype=np.float64).reshape(-1, len(self.EFFECTIVE_PARAMS))
+
+    def _liquidity_ok(self, score_min: float) -> np.ndarray:
+        """Máscara de liquidez por valor de liquidity_score_min (se repiten mucho entre candidatos)"""
+        mask = self._liquidity.get(score_min)
+        if mask is None:
+            arrays = self.context.arrays
+            mask = liquidity_mask(arrays['volume_ratio'], arrays['atr'], arrays['close'], score_min)
+            self._liquidity[score_min] = mask
+        return mask
+
+    def entry_masks(self, effective: np.ndarray) -> np.ndarray:
+        """
+        Matriz booleana [K, n_velas]: velas con señal en las que cada candidato puede entrar.
+
+        Reproduce los filtros de entrada de trade_kernel.simulate_trades_range: una
+        confianza ML NaN no descarta la señal y, sin trades heredados, las entradas solo
+        se bloquean si max_concurrent_trades <= 0.
+        """
+        ml_confidence = self.context.arrays['ml_confidence']
+        with np.errstate(invalid='ignore'):
+            below_threshold = ml_confidence[None, :] < effective[:, 0][:, None]
+        liquidity = np.stack([self._liquidity_ok(score_min) for score_min in effective[:, 1]]) \
+            if len(effective) else np.zeros((0, len(ml_confidence)), dtype=bool)
+        blocked = effective[:, 4] <= 0
+        return self._has_signal[None, :] & ~below_threshold & liquidity & ~blocked[:, None]
+
+    def evaluate(self, param_sets: Sequence[Dict], batch_size: int = 4096) -> List[Dict]:
+        """
+        Métricas del backtest para cada conjunto de parámetros.
+
+        Args:
+            param_sets: Conjuntos de parámetros (mismo formato que TrialContext.run)
+            batch_size: Candidatos distintos por llamada al kernel (limita la memoria
+                de la matriz de entradas a batch_size x n_velas bytes)
+
+        Returns:
+            Lista de dicts con el formato de UltraDetailedHeikinAshiMLStrategy.run sin 'trades'
+        """
+        effective = self.effective_params(param_sets)
+        unique, inverse = np.unique(effective, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        arrays = self.context.arrays
+        metrics = np.zeros((len(unique), len(BATCH_METRICS)), dtype=np.float64)
+        for start in range(0, len(unique), batch_size):
+            chunk = unique[start:start + batch_size]
+            metrics[start:start + len(chunk)] = run_batch_backtest(
+                arrays['close'], arrays['atr'], arrays['signals'], arrays['ml_confidence'],
+                self.entry_masks(chunk), chunk[:, 2], chunk[:, 3], self.initial_capital)
+
+        logger.info(f"Barrido de {len(effective)} candidatos ({len(unique)} distintos) sobre "
+                    f"{len(self.context)} velas de {self.context.symbol}")
+        summaries = [self._summary(row) for row in metrics]
+        return [dict(summaries[k]) for k in inverse]
+
+    def _summary(self, row: np.ndarray) -> Dict:
+        """Resultados de un candidato a partir de su fila de métricas (ver _compile_backtest_results)"""
+        values = dict(zip(BATCH_METRICS, row.tolist()))
+        total_trades = int(values['total_trades'])
+        winning_trades = int(values['winning_trades'])
+        gross_loss = values['gross_loss']
+        capital = values['capital']
+        return {
+            'total_trades': total_trades,
+            'winning_trades': winning_trades,
+            'losing_trades': total_trades - winning_trades,
+            'win_rate': winning_trades / total_trades if total_trades > 0 else 0,
+            'total_pnl': values['total_pnl'],
+            'gross_profit': values['gross_profit'],
+            'gross_loss': gross_loss,
+            'profit_factor': values['gross_profit'] / gross_loss if gross_loss > 0 else float('inf'),
+            'max_drawdown': values['max_drawdown'],
+            'final_capital': capital,
+            'return_pct': (capital - self.initial_capital) / self.initial_capital,
+            'symbol': self.context.symbol,
+            'strategy_name': 'UltraDetailedHeikinAshiStrategy',
+        }
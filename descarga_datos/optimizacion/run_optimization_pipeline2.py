@@ -47,7 +47,9 @@ class OptimizationPipeline:
                  val_end="2023-12-31",
                  opt_start="2022-01-01",
                  opt_end="2023-12-31",
-                 n_trials=50):
+                 n_trials=50,
+                 resume=False,
+                 walk_forward=None):
         """
         Inicializa el pipeline de optimización completo.
 
@@ -58,6 +60,9 @@ class OptimizationPipeline:
             val_start/end: Período de validación ML
             opt_start/end: Período para optimización
             n_trials: Número de pruebas para Optuna
+            resume: Reanudar los estudios Optuna guardados (ver StrategyOptimizer)
+            walk_forward: Entrenar con validación walk-forward en paralelo
+                (None = ml_training.training.walk_forward de la configuración)
         """
         self.symbols = symbols if symbols else ["BTC/USDT"]
         self.timeframe = timeframe
@@ -68,6 +73,8 @@ class OptimizationPipeline:
         self.opt_start = opt_start
         self.opt_end = opt_end
         self.n_trials = n_trials
+        self.resume = resume
+        self.walk_forward = walk_forward
 
         # Cargar configuración
         self.config = load_config_from_yaml()
@@ -81,13 +88,17 @@ class OptimizationPipeline:
         start_time = time.time()
         pipeline_results = {}
 
+        # Paso 1 (walk-forward): todos los símbolos en un único pool de procesos
+        walk_forward_trained = await self._train_ml_models_walk_forward()
+
         for symbol in self.symbols:
             try:
                 symbol_start = time.time()
                 logger.info(f"=== INICIANDO PIPELINE PARA {symbol} ===")
 
                 # Paso 1: Entrenamiento ML (opcional en modo seguro)
-                await self._train_ml_models(symbol)
+                if symbol not in walk_forward_trained:
+                    await self._train_ml_models(symbol)
 
                 # Paso 2: Optimización de parámetros
                 opt_results = self._optimize_strategy_parameters(symbol)
@@ -167,19 +178,85 @@ class OptimizationPipeline:
             logger.error(f"Error durante entrenamiento ML: {e}")
             raise
 
-    def _optimize_strategy_parameters(self, symbol, n_trials=None):
+    async def _train_ml_models_walk_forward(self):
+        """
+        Entrena los modelos ML de todos los símbolos con validación walk-forward.
+
+        Los folds y símbolos se reparten en un pool de procesos limitado por
+        backtesting.max_workers (ver optimizacion.walk_forward). Es opcional: solo se
+        usa si se activa (walk_forward=True o ml_training.training.walk_forward) y no
+        hay modo seguro.
+
+        Returns:
+            set: Símbolos entrenados (el resto se entrena con _train_ml_models)
+        """
+        ml_training = getattr(self.config, 'ml_training', None)
+        training = getattr(ml_training, 'training', None) or {}
+        enabled = self.walk_forward if self.walk_forward is not None else training.get('walk_forward', False)
+        if not enabled or getattr(ml_training, 'safe_mode', False):
+            return set()
+
+        from .ml_trainer import MLTrainer
+        from .walk_forward import WalkForwardTrainer
+        from indicators.feature_pipeline import compute_clip_bounds
+
+        walk_forward = WalkForwardTrainer(
+            max_workers=getattr(self.config.backtesting, 'max_workers', 1),
+            n_splits=training.get('walk_forward_splits', 5)
+        )
+        prepared = {}
+        for symbol in self.symbols:
+            try:
+                trainer = MLTrainer(symbol, self.timeframe)
+                trainer.train_start = self.train_start
+                trainer.train_end = self.train_end
+                trainer.val_start = self.val_start
+                trainer.val_end = self.val_end
+
+                df = await trainer.download_data()
+                X_train, y_train, X_val, y_val, feature_cols = trainer.split_training_data(df)
+                trainer.validate_split(X_train, X_val)
+                walk_forward.add_symbol(symbol, X_train, y_train, X_val, y_val, trainer.build_models())
+                prepared[symbol] = (trainer, X_train, feature_cols)
+            except Exception as e:
+                logger.error(f"Error preparando entrenamiento walk-forward para {symbol}: {e}")
+
+        if not prepared:
+            return set()
+
+        try:
+            results = walk_forward.run()
+        except Exception as e:
+            logger.error(f"Error durante entrenamiento walk-forward: {e}")
+            return set()
+
+        trained = set()
+        for symbol, (trainer, X_train, feature_cols) in prepared.items():
+            symbol_results, best_model = results[symbol]
+            if best_model is None:
+                logger.error(f"No se pudo entrenar ningún modelo ML para {symbol}")
+                continue
+            trainer.save_models(symbol_results, feature_cols, compute_clip_bounds(X_train.to_numpy(), feature_cols))
+            trained.add(symbol)
+            logger.info(f"Entrenamiento ML walk-forward completado para {symbol} (mejor: {best_model})")
+        return trained
+
+    def _optimize_strategy_parameters(self, symbol, n_trials=None, resume=None):
         """
         Optimiza los parámetros de la estrategia usando Optuna.
 
         Args:
             symbol (str): Símbolo a optimizar
             n_trials (int): Número de trials (opcional)
+            resume (bool): Reanudar el estudio guardado (por defecto self.resume)
 
         Returns:
             dict: Resultados de la optimización
         """
         if n_trials is None:
             n_trials = self.n_trials
+        if resume is None:
+            resume = self.resume
 
         logger.info(f"Iniciando optimización de parámetros para {symbol} con {n_trials} trials")
 
@@ -198,7 +275,8 @@ class OptimizationPipeline:
             timeframe=self.timeframe,
             start_date=self.opt_start,
             end_date=self.opt_end,
-            n_trials=n_trials
+            n_trials=n_trials,
+            resume=resume
         )
 
         # Ejecutar optimización
@@ -407,6 +485,10 @@ async def main():
                         help='Número de trials para optimización')
     parser.add_argument('--quick-test', action='store_true',
                         help='Ejecutar test rápido con 5 trials')
+    parser.add_argument('--resume', action='store_true',
+                        help='Reanudar los estudios Optuna guardados')
+    parser.add_argument('--walk-forward', action='store_true', default=None,
+                        help='Entrenar los modelos ML con validación walk-forward en paralelo')
 
     args = parser.parse_args()
 
@@ -419,7 +501,9 @@ async def main():
         val_end="2025-08-31",
         opt_start="2025-01-01",
         opt_end="2025-08-31",
-        n_trials=args.trials
+        n_trials=args.trials,
+        resume=args.resume,
+        walk_forward=args.walk_forward
     )
 
     # Ejecutar pipeline
@@ -25,11 +25,13 @@ try:
 except ImportError:
     OPTUNA_AVAILABLE = False
     optuna = None
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from pathlib import Path
 import json
 from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
-from typing import Dict, List, Tuple
+from optimizacion.trial_context import TrialContext
+from typing import Dict, List, Optional, Tuple
 
 from config.config_loader import load_config_from_yaml
 # from core.downloader import AdvancedDataDownloader, download_and_cache_data  # Removido por compatibilidad Python 3.13
@@ -38,7 +40,90 @@ from utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+
+def journal_storage(path):
+    """
+    Almacenamiento Optuna en un fichero local (JournalFileStorage), compartible entre procesos.
+
+    No necesita servidor de base de datos: los procesos añaden sus operaciones al
+    mismo fichero con bloqueo de fichero.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        from optuna.storages.journal import JournalFileBackend, JournalFileOpenLock
+    except ImportError:  # optuna < 4
+        from optuna.storages import JournalFileStorage as JournalFileBackend, JournalFileOpenLock
+    # En Windows los symlinks (lock por defecto) requieren privilegios
+    lock = JournalFileOpenLock(str(path)) if os.name == 'nt' else None
+    return optuna.storages.JournalStorage(JournalFileBackend(str(path), lock_obj=lock))
+
+
+def _optimize_worker(task: Dict) -> Dict:
+    """
+    Proceso del modo paralelo: ejecuta `n_trials` trials contra el estudio compartido.
+
+    El contexto de trials (datos preparados, modelo y predicciones) llega una sola
+    vez por worker; cada worker usa un sampler con semilla propia para no repetir
+    las mismas propuestas que los demás.
+    """
+    optimizer = StrategyOptimizer(
+        symbol=task['symbol'], timeframe=task['timeframe'],
+        start_date=task['start_date'], end_date=task['end_date'],
+        n_trials=task['n_trials'], study_name=task['study_name'],
+        config=task['config'], optimization_targets=task['optimization_targets'], n_jobs=1,
+        pruning=task['pruning'], model_dir=task['model_dir'], results_dir=task['results_dir']
+    )
+    optimizer.trial_context = task['trial_context']
+    study = optuna.load_study(
+        study_name=task['study_name'],
+        storage=journal_storage(task['storage_path']),
+        sampler=optuna.samplers.TPESampler(seed=task['seed'])
+    )
+    study.optimize(optimizer.objective, n_trials=task['n_trials'])
+    return {'worker': task['worker'], 'pid': os.getpid(), 'n_trials': task['n_trials']}
+
+
 class StrategyOptimizer:
+    # Parada anticipada de trials sin futuro (ver _kill_switch). El estudio es
+    # multi-objetivo y Optuna no admite trial.report/should_prune en ese caso,
+    # así que la decisión se toma aquí y el trial termina como PRUNED.
+    PRUNING_DEFAULTS = {
+        'enabled': True,
+        'checkpoints': 10,      # Tramos del histórico entre informes intermedios
+        'max_drawdown': None,   # Drawdown que aborta el trial (None = solo por número de trades)
+    }
+    # Espacio de parámetros CRYPTO-OPTIMIZED: nombre -> (tipo, mínimo, máximo, paso).
+    # Lo comparten objective() (Optuna) y sample_parameter_sets() (barridos vectorizados)
+    PARAMETER_SPACE = {
+        # Parámetros ML - ULTRA PERMISIVO para crypto volatilidad
+        "ml_threshold": ('float', 0.15, 0.45, 0.05),  # 🔥 CRYPTO: 0.15-0.45 (más señales)
+
+        # Parámetros de indicadores - CRYPTO FLEXIBLES
+        "stoch_overbought": ('int', 60, 85, 5),  # 🔥 Más bajo para crypto
+        "stoch_oversold": ('int', 15, 40, 5),  # 🔥 Más alto para crypto
+        "cci_threshold": ('int', 50, 250, 10),  # 🔥 Más amplitud
+        "volume_ratio_min": ('float', 0.2, 1.0, 0.1),  # 🔥 Mínimo más bajo
+
+        # Parámetros SAR - CRYPTO ALTA SENSIBILIDAD
+        "sar_acceleration": ('float', 0.02, 0.30, 0.01),  # 🔥 Hasta 0.30
+        "sar_maximum": ('float', 0.10, 0.35, 0.01),  # 🔥 Rango amplio
+
+        # Parámetros ATR - CRYPTO AGRESIVO (volatilidad alta)
+        "atr_period": ('int', 7, 21, 1),  # 🔥 Rango medio
+        "stop_loss_atr_multiplier": ('float', 1.5, 4.5, 0.25),  # 🔥 Stops amplios
+        "take_profit_atr_multiplier": ('float', 2.0, 7.0, 0.25),  # 🔥 Targets altos
+
+        # Parámetros EMA - CRYPTO TRENDS RÁPIDOS
+        "ema_trend_period": ('int', 15, 120, 5),  # 🔥 Trends más cortos
+
+        # Parámetros de gestión de riesgo - CRYPTO ULTRA AGRESIVO
+        "max_drawdown": ('float', 0.03, 0.12, 0.01),  # 🔥 Hasta 12% DD
+        "max_portfolio_heat": ('float', 0.08, 0.20, 0.01),  # 🔥 Hasta 20% heat
+        "max_concurrent_trades": ('int', 3, 10, 1),  # 🔥 Hasta 10 trades simultáneos
+        "kelly_fraction": ('float', 0.25, 0.80, 0.05),  # 🔥 Kelly agresivo
+    }
+
     def __init__(self, 
                  symbol="BTC/USDT", 
                  timeframe="4h", 
@@ -47,7 +132,12 @@ class StrategyOptimizer:
                  n_trials=100,
                  study_name="ultra_detailed_heikin_ashi",
                  config=None,
-                 optimization_targets=None):
+                 optimization_targets=None,
+                 n_jobs: Optional[int] = 1,
+                 pruning: Optional[Dict] = None,
+                 resume: bool = False,
+                 model_dir: Optional[str] = None,
+                 results_dir: Optional[str] = None):
         """
         Inicializa el optimizador de estrategia.
         
@@ -60,6 +150,13 @@ class StrategyOptimizer:
             study_name (str): Nombre del estudio
             config: Configuración del sistema
             optimization_targets (dict): Objetivos de optimización personalizados
+            n_jobs (int): Procesos para los trials, como máximo backtesting.max_workers
+                (por defecto 1: estudio en memoria con semilla fija en el proceso actual)
+            pruning (dict): Parada anticipada de trials (ver PRUNING_DEFAULTS)
+            resume (bool): Reanudar el estudio guardado con el mismo nombre si sus datos y
+                modelo no han cambiado (los trials completados no se repiten)
+            model_dir (str): Directorio de los modelos ML (None = <cwd>/models)
+            results_dir (str): Carpeta de resultados (None = descarga_datos/data/optimization_results)
         """
         self.symbol = symbol
         self.timeframe = timeframe
@@ -68,7 +165,16 @@ class StrategyOptimizer:
         self.n_trials = n_trials
         self.study_name = study_name
         self.config = config if config is not None else load_config_from_yaml()
+        max_workers = getattr(getattr(self.config, 'backtesting', None), 'max_workers', None) or 1
+        self.n_jobs = max(1, min(int(n_jobs or 1), int(max_workers), n_trials))
+        self.pruning = dict(self.PRUNING_DEFAULTS, **(pruning or {}))
+        self.resume = resume
+        self.model_dir = model_dir
+        # Configuración de la estrategia para cargar el modelo (TrialContext.build/fingerprint)
+        self.strategy_config = {'model_dir': model_dir} if model_dir else {}
         self.data = None
+        # Datos preparados, confianza ML y señales compartidos por los trials (ver build_trial_context)
+        self.trial_context = None
         
         # Targets de optimización configurables
         self.optimization_targets = optimization_targets or {
@@ -82,8 +188,14 @@ class StrategyOptimizer:
         }
         
         # Carpeta para guardar resultados
-        self.results_dir = Path("descarga_datos/data/optimization_results")
+        self.results_dir = Path(results_dir or "descarga_datos/data/optimization_results")
         self.results_dir.mkdir(parents=True, exist_ok=True)
+        # Estudio persistido trial a trial (compartido por los workers del modo paralelo)
+        # y copia en disco del contexto de trials
+        self.storage_path = self.results_dir / "studies" / f"{study_name}_{symbol.replace('/', '_')}_{timeframe}.journal"
+        self.context_path = self.storage_path.with_suffix('.context.pkl')
+        # Huella de datos + modelo del contexto actual (ver TrialContext.fingerprint)
+        self.fingerprint = None
         
         logger.info(f"Inicializando optimización para {symbol} en {timeframe}")
         logger.info(f"Targets de optimización: {self.optimization_targets}")
@@ -170,7 +282,133 @@ class StrategyOptimizer:
         logger.info(f"✅ Indicadores calculados (centralizado): {len(df)} filas válidas")
 
         return self.data
-    
+
+    def build_trial_context(self) -> TrialContext:
+        """
+        Construir (una vez por estudio) el contexto precalculado de los trials.
+
+        Prepara los datos, carga el modelo ML y cachea la confianza ML y las señales;
+        cada trial solo ejecuta el kernel de backtest con sus parámetros. Se reutiliza
+        la copia en disco (self.context_path) mientras no cambien los datos ni el modelo.
+        """
+        if self.data is None:
+            self.prepare_indicators()
+        self.fingerprint = TrialContext.fingerprint(self.data, self.symbol, self.strategy_config)
+        context = TrialContext.load(self.context_path, self.fingerprint)
+        if context is not None:
+            logger.info(f"Contexto de trials reutilizado desde {self.context_path}")
+        else:
+            context = TrialContext.build(self.data, self.symbol, self.timeframe, self.strategy_config)
+            context.save(self.context_path, self.fingerprint)
+        self.trial_context = context
+        return self.trial_context
+
+    def _kill_switch(self, min_trades: int):
+        """
+        Callback de checkpoint que decide si abortar el trial.
+
+        Aborta cuando ni siquiera abriendo un trade en cada señal restante se llega
+        a `min_trades` (el trial acabaría penalizado con certeza), o cuando el
+        drawdown supera pruning['max_drawdown'] si está configurado. El motivo se
+        guarda en report['prune_reason'].
+        """
+        context = self.trial_context
+        max_drawdown = self.pruning.get('max_drawdown')
+
+        def should_stop(report: Dict) -> bool:
+            possible_trades = report['n_trades']
+            if not report['halted']:
+                possible_trades += int(report['open_position']) + context.remaining_signals(report['bar'])
+            if possible_trades < min_trades:
+                report['prune_reason'] = 'min_trades'
+                return True
+            if max_drawdown is not None and report['max_drawdown'] > max_drawdown:
+                report['prune_reason'] = 'max_drawdown'
+                return True
+            return False
+
+        return should_stop
+
+    def suggest_params(self, trial) -> Dict:
+        """Parámetros de un trial de Optuna según PARAMETER_SPACE"""
+        params = {}
+        for name, (kind, low, high, step) in self.PARAMETER_SPACE.items():
+            if kind == 'int':
+                params[name] = trial.suggest_int(name, low, high, step=step)
+            else:
+                params[name] = trial.suggest_float(name, low, high, step=step)
+        return params
+
+    def sample_parameter_sets(self, n: int, seed: int = 42) -> List[Dict]:
+        """
+        Muestreo aleatorio uniforme de `n` conjuntos de parámetros sobre la rejilla de PARAMETER_SPACE.
+
+        Los valores son los mismos que puede proponer Optuna para cada parámetro.
+        """
+        rng = np.random.default_rng(seed)
+        columns = {}
+        for name, (kind, low, high, step) in self.PARAMETER_SPACE.items():
+            steps = rng.integers(0, int(round((high - low) / step)) + 1, size=n)
+            if kind == 'int':
+                columns[name] = (low + step * steps).tolist()
+            else:
+                columns[name] = np.round(low + step * steps, 10).tolist()
+        return [{name: values[i] for name, values in columns.items()} for i in range(n)]
+
+    def run_sweep(self, n_candidates: int = 10000, param_sets: Optional[List[Dict]] = None,
+                  seed: int = 42) -> pd.DataFrame:
+        """
+        Barrido vectorizado de parámetros (ver optimizacion.parameter_sweep).
+
+        Evalúa todos los candidatos en lotes sobre el contexto de trials, sin Optuna,
+        con los mismos valores objetivo que objective() sin parada anticipada.
+
+        Args:
+            n_candidates: Candidatos aleatorios a evaluar si no se pasa `param_sets`
+            param_sets: Candidatos explícitos (p. ej. una rejilla)
+            seed: Semilla del muestreo aleatorio
+
+        Returns:
+            DataFrame con parámetros, métricas (prefijo result_ si coinciden con un
+            parámetro) y valores objetivo (objective_0..3), ordenado por el primer objetivo
+        """
+        from optimizacion.parameter_sweep import ParameterSweep
+
+        if self.trial_context is None:
+            self.build_trial_context()
+        if param_sets is None:
+            param_sets = self.sample_parameter_sets(n_candidates, seed=seed)
+
+        start = datetime.now()
+        results = ParameterSweep(self.trial_context).evaluate(param_sets)
+        elapsed = (datetime.now() - start).total_seconds()
+        logger.info(f"Barrido completado: {len(param_sets)} candidatos en {elapsed:.2f}s "
+                    f"({len(param_sets) / max(elapsed, 1e-9):.0f} candidatos/s)")
+
+        rows = []
+        for params, metrics in zip(param_sets, results):
+            row = dict(params)
+            for key, value in metrics.items():
+                if key not in ('symbol', 'strategy_name'):
+                    # max_drawdown es a la vez parámetro (límite) y métrica (drawdown alcanzado)
+                    row[f'result_{key}' if key in params else key] = value
+            for i, value in enumerate(self._objective_values(metrics, log=False)):
+                row[f'objective_{i}'] = value
+            rows.append(row)
+        sweep = pd.DataFrame(rows)
+        if not sweep.empty:
+            sweep = sweep.sort_values('objective_0', ascending=False, kind='stable').reset_index(drop=True)
+        return sweep
+
+    def save_sweep(self, sweep: pd.DataFrame) -> Path:
+        """Guardar los resultados de run_sweep en CSV dentro de results_dir"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        path = self.results_dir / f"sweep_{self.study_name}_{self.symbol.replace('/', '_')}_{timestamp}.csv"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        sweep.to_csv(path, index=False)
+        logger.info(f"Barrido guardado en {path}")
+        return path
+
     def objective(self, trial):
         """
         Función objetivo para Optuna que devuelve tres métricas:
@@ -178,54 +416,44 @@ class StrategyOptimizer:
         - Max Drawdown (a minimizar)
         - Win Rate (a maximizar)
         """
-        # Definir espacio de parámetros CRYPTO-OPTIMIZED
-        params = {
-            # Parámetros ML - ULTRA PERMISIVO para crypto volatilidad
-            "ml_threshold": trial.suggest_float("ml_threshold", 0.15, 0.45, step=0.05),  # 🔥 CRYPTO: 0.15-0.45 (más señales)
-            
-            # Parámetros de indicadores - CRYPTO FLEXIBLES
-            "stoch_overbought": trial.suggest_int("stoch_overbought", 60, 85, step=5),  # 🔥 Más bajo para crypto
-            "stoch_oversold": trial.suggest_int("stoch_oversold", 15, 40, step=5),  # 🔥 Más alto para crypto
-            "cci_threshold": trial.suggest_int("cci_threshold", 50, 250, step=10),  # 🔥 Más amplitud
-            "volume_ratio_min": trial.suggest_float("volume_ratio_min", 0.2, 1.0, step=0.1),  # 🔥 Mínimo más bajo
-            
-            # Parámetros SAR - CRYPTO ALTA SENSIBILIDAD
-            "sar_acceleration": trial.suggest_float("sar_acceleration", 0.02, 0.30, step=0.01),  # 🔥 Hasta 0.30
-            "sar_maximum": trial.suggest_float("sar_maximum", 0.10, 0.35, step=0.01),  # 🔥 Rango amplio
-            
-            # Parámetros ATR - CRYPTO AGRESIVO (volatilidad alta)
-            "atr_period": trial.suggest_int("atr_period", 7, 21, step=1),  # 🔥 Rango medio
-            "stop_loss_atr_multiplier": trial.suggest_float("stop_loss_atr_multiplier", 1.5, 4.5, step=0.25),  # 🔥 Stops amplios
-            "take_profit_atr_multiplier": trial.suggest_float("take_profit_atr_multiplier", 2.0, 7.0, step=0.25),  # 🔥 Targets altos
-            
-            # Parámetros EMA - CRYPTO TRENDS RÁPIDOS
-            "ema_trend_period": trial.suggest_int("ema_trend_period", 15, 120, step=5),  # 🔥 Trends más cortos
-            
-            # Parámetros de gestión de riesgo - CRYPTO ULTRA AGRESIVO
-            "max_drawdown": trial.suggest_float("max_drawdown", 0.03, 0.12, step=0.01),  # 🔥 Hasta 12% DD
-            "max_portfolio_heat": trial.suggest_float("max_portfolio_heat", 0.08, 0.20, step=0.01),  # 🔥 Hasta 20% heat
-            "max_concurrent_trades": trial.suggest_int("max_concurrent_trades", 3, 10),  # 🔥 Hasta 10 trades simultáneos
-            "kelly_fraction": trial.suggest_float("kelly_fraction", 0.25, 0.80, step=0.05),  # 🔥 Kelly agresivo
-        }
+        params = self.suggest_params(trial)
+        min_trades = self.optimization_targets.get('constraints', {}).get('min_trades', 20)
+
+        # Ejecutar la estrategia con los parámetros del trial sobre el contexto precalculado
+        # (datos preparados, modelo y predicciones ML se calculan una sola vez por estudio)
+        if self.trial_context is None:
+            self.build_trial_context()
+        if self.pruning.get('enabled', True):
+            results = self.trial_context.run(params, checkpoints=self.pruning.get('checkpoints', 10),
+                                             on_checkpoint=self._kill_switch(min_trades))
+            trial.set_user_attr('checkpoints', results['checkpoints'])
+            if results['pruned']:
+                last = results['checkpoints'][-1]
+                logger.info(f"Trial abortado en la vela {last['bar']}/{len(self.trial_context)} "
+                            f"({last['prune_reason']}): {last['n_trades']} trades, DD {last['max_drawdown']:.2%}")
+                raise optuna.TrialPruned(last['prune_reason'])
+        else:
+            results = self.trial_context.run(params)
         
-        # Crear instancia de la estrategia con los parámetros a optimizar
-        strategy = UltraDetailedHeikinAshiMLStrategy(config=params)
+        return self._objective_values(results)
 
-        # ACTIVAR MODO OPTIMIZACIÓN para evitar re-entrenamiento ML en cada trial
-        strategy._optimization_mode = True
+    def _objective_values(self, results: Dict, log: bool = True) -> Tuple[float, ...]:
+        """
+        Valores multi-objetivo de unos resultados de backtest (penalizaciones incluidas).
 
-        # Ejecutar la estrategia
-        results = strategy.run(self.data, self.symbol, self.timeframe)
-        
-        # Obtener constraints de configuración
+        Args:
+            results: Resultados de UltraDetailedHeikinAshiMLStrategy.run o ParameterSweep.evaluate
+            log: Avisar de las penalizaciones (se desactiva en los barridos de miles de candidatos)
+        """
         constraints = self.optimization_targets.get('constraints', {})
         min_trades = constraints.get('min_trades', 20)
         max_dd_limit = constraints.get('max_drawdown_limit', 0.15)
         min_wr = constraints.get('min_win_rate', 0.55)
-        
+
         # Si no cumple constraints, penalizar fuertemente
         if results["total_trades"] < min_trades:
-            logger.warning(f"Trial penalizado: solo {results['total_trades']} trades (mínimo {min_trades})")
+            if log:
+                logger.warning(f"Trial penalizado: solo {results['total_trades']} trades (mínimo {min_trades})")
             return tuple([0.0] * 4)  # Devolver 4 valores para multi-objetivo
         
         # Extraer métricas
@@ -241,11 +469,13 @@ class StrategyOptimizer:
         
         if max_drawdown > max_dd_limit:
             penalty *= 0.5
-            logger.warning(f"Trial penalizado: DD {max_drawdown:.2%} > límite {max_dd_limit:.2%}")
+            if log:
+                logger.warning(f"Trial penalizado: DD {max_drawdown:.2%} > límite {max_dd_limit:.2%}")
         
         if win_rate < min_wr:
             penalty *= 0.7
-            logger.warning(f"Trial penalizado: WR {win_rate:.2%} < mínimo {min_wr:.2%}")
+            if log:
+                logger.warning(f"Trial penalizado: WR {win_rate:.2%} < mínimo {min_wr:.2%}")
         
         # Construir retorno basado en targets configurados
         maximize_targets = self.optimization_targets.get('maximize', ['total_pnl', 'win_rate'])
@@ -286,18 +516,10 @@ class StrategyOptimizer:
 
         logger.info("Preparando datos para optimización...")
         self.prepare_indicators()
+        self.build_trial_context()
 
         logger.info(f"Iniciando optimización con {self.n_trials} pruebas")
-
-        # Crear estudio multi-objetivo
-        study = optuna.create_study(
-            study_name=self.study_name,
-            directions=["maximize", "maximize", "maximize", "maximize"],  # PF, -DD, WR, P&L
-            sampler=optuna.samplers.TPESampler(seed=42)
-        )
-
-        # Ejecutar optimización
-        study.optimize(self.objective, n_trials=self.n_trials)
+        study = self._optimize_study()
 
         # Obtener mejores trials del frente de Pareto
         pareto_trials = study.best_trials
@@ -307,6 +529,100 @@ class StrategyOptimizer:
 
         return study, pareto_trials
     
+    def _open_study(self):
+        """
+        Crear el estudio en self.storage_path o, con self.resume, reanudar el guardado.
+
+        Un estudio guardado solo se reanuda si su huella (datos + modelo) coincide con
+        la del contexto actual; si no, sus trials no son comparables y se descarta.
+        Los trials que quedaron RUNNING por una interrupción se marcan como FAIL.
+
+        Returns:
+            Tupla (study, storage)
+        """
+        if self.fingerprint is None:
+            self.build_trial_context()
+        if not self.resume and self.storage_path.exists():
+            self.storage_path.unlink()
+        storage = journal_storage(self.storage_path)
+        sampler = optuna.samplers.TPESampler(seed=42)
+
+        study = None
+        if self.resume:
+            try:
+                study = optuna.load_study(study_name=self.study_name, storage=storage, sampler=sampler)
+            except KeyError:
+                study = None
+            if study is not None and study.user_attrs.get('fingerprint') != self.fingerprint:
+                logger.warning(f"Los datos o el modelo de {self.symbol} han cambiado: "
+                               f"se descarta el estudio guardado '{self.study_name}'")
+                optuna.delete_study(study_name=self.study_name, storage=storage)
+                study = None
+
+        if study is None:
+            study = optuna.create_study(
+                study_name=self.study_name,
+                storage=storage,
+                directions=["maximize", "maximize", "maximize", "maximize"],  # PF, -DD, WR, P&L
+                sampler=sampler
+            )
+            study.set_user_attr('fingerprint', self.fingerprint)
+        else:
+            for trial in study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.RUNNING,)):
+                storage.set_trial_state_values(trial._trial_id, state=optuna.trial.TrialState.FAIL)
+        return study, storage
+
+    def _optimize_study(self):
+        """
+        Ejecutar los trials que faltan hasta self.n_trials (completados + abortados).
+
+        Cada trial se escribe en self.storage_path al terminar, así que una
+        interrupción solo pierde los trials en curso.
+
+        Returns:
+            Estudio con todos los trials
+        """
+        study, storage = self._open_study()
+        finished = study.get_trials(deepcopy=False, states=(optuna.trial.TrialState.COMPLETE,
+                                                             optuna.trial.TrialState.PRUNED))
+        remaining = max(0, self.n_trials - len(finished))
+        if finished:
+            logger.info(f"Estudio reanudado: {len(finished)} trials reutilizados, {remaining} pendientes")
+        if remaining == 0:
+            return study
+
+        if min(self.n_jobs, remaining) > 1:
+            return self._run_parallel(remaining)
+        study.optimize(self.objective, n_trials=remaining)
+        return study
+
+    def _run_parallel(self, n_trials: int):
+        """
+        Repartir `n_trials` trials entre procesos que comparten el estudio ya creado
+        en self.storage_path (JournalFileStorage local).
+
+        Returns:
+            Estudio cargado desde el almacenamiento compartido con todos los trials
+        """
+        n_workers = min(self.n_jobs, n_trials)
+        base, extra = divmod(n_trials, n_workers)
+        tasks = [{
+            'worker': worker, 'seed': 42 + worker, 'n_trials': base + (1 if worker < extra else 0),
+            'storage_path': str(self.storage_path), 'study_name': self.study_name,
+            'symbol': self.symbol, 'timeframe': self.timeframe,
+            'start_date': self.start_date, 'end_date': self.end_date,
+            'config': self.config, 'optimization_targets': self.optimization_targets,
+            'pruning': self.pruning, 'trial_context': self.trial_context,
+            'model_dir': self.model_dir, 'results_dir': str(self.results_dir),
+        } for worker in range(n_workers)]
+
+        logger.info(f"Modo paralelo: {n_workers} workers, estudio compartido en {self.storage_path}")
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            for result in executor.map(_optimize_worker, tasks):
+                logger.info(f"Worker {result['worker']} (pid {result['pid']}): {result['n_trials']} trials")
+
+        return optuna.load_study(study_name=self.study_name, storage=journal_storage(self.storage_path))
+
     def save_results(self, study, pareto_trials):
         """Guarda los resultados de la optimización"""
         # Crear directorio para este estudio
@@ -425,6 +741,12 @@ def main():
     parser.add_argument("--start", type=str, default="2022-01-01", help="Fecha inicial")
     parser.add_argument("--end", type=str, default="2022-12-31", help="Fecha final")
     parser.add_argument("--trials", type=int, default=50, help="Número de pruebas")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Procesos en paralelo (por defecto 1; máximo backtesting.max_workers)")
+    parser.add_argument("--resume", action="store_true",
+                        help="Reanudar el estudio guardado (si no cambiaron datos ni modelo)")
+    parser.add_argument("--sweep", type=int, default=None,
+                        help="Barrido vectorizado de N candidatos aleatorios en lugar de Optuna")
     
     args = parser.parse_args()
     
@@ -433,9 +755,18 @@ def main():
         timeframe=args.timeframe,
         start_date=args.start,
         end_date=args.end,
-        n_trials=args.trials
+        n_trials=args.trials,
+        n_jobs=args.workers,
+        resume=args.resume
     )
-    
+
+    if args.sweep:
+        optimizer.prepare_indicators()
+        sweep = optimizer.run_sweep(n_candidates=args.sweep)
+        optimizer.save_sweep(sweep)
+        print(sweep.head(10).to_string())
+        return
+
     study, pareto_trials = optimizer.run_optimization()
     optimizer.plot_optimization_results(study)
     
@@ -0,0 +1,175 @@
+"""
+Contexto precalculado de los trials de optimización.
+
+StrategyOptimizer.objective creaba en cada trial una estrategia nueva y llamaba
+a strategy.run(self.data, ...): data.copy(), _prepare_data (todos los
+indicadores), comprobación/carga del modelo e inferencia sobre todo el
+histórico, aunque nada de eso depende de los parámetros del trial.
+
+TrialContext hace ese trabajo una vez por estudio y guarda los datos
+preparados, la confianza ML cacheada, el modelo cargado y los arrays que usan
+los kernels. Las señales tampoco dependen de los parámetros explorados
+(_compute_signal_masks usa umbrales fijos), así que se calculan también una
+sola vez. Cada trial solo construye la estrategia con sus parámetros y ejecuta
+el kernel de backtest (UltraDetailedHeikinAshiMLStrategy.run_prepared), con
+los mismos resultados que strategy.run en modo optimización.
+
+El contexto se puede guardar en disco (save/load) junto con su huella
+(fingerprint): hash de los datos de entrada y de los artefactos del modelo. Una
+copia guardada solo se reutiliza mientras la huella coincide.
+"""
+
+import hashlib
+import os
+import pickle
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from indicators.indicator_cache import frame_fingerprint
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager, UltraDetailedHeikinAshiMLStrategy
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Cambiar al modificar cómo se construye el contexto (invalida las copias en disco)
+CONTEXT_VERSION = 1
+
+
+class TrialContext:
+    """
+    Datos, predicciones y señales compartidos por todos los trials de un estudio.
+
+    Args:
+        data: DataFrame preparado por UltraDetailedHeikinAshiMLStrategy._prepare_data
+        symbol: Símbolo del activo
+        timeframe: Timeframe de los datos
+        ml_confidence: Confianza ML por vela (predict_signal)
+        signals: Señales LONG/SHORT (1/-1/0) por vela
+        model, scaler: Modelo y scaler usados para ml_confidence
+    """
+
+    def __init__(self, data: pd.DataFrame, symbol: str, timeframe: str, ml_confidence: pd.Series,
+                 signals: pd.Series, model=None, scaler=None):
+        self.data = data
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.ml_confidence = ml_confidence
+        self.signals = signals
+        self.model = model
+        self.scaler = scaler
+        # Arrays contiguos que consume el kernel de backtest (backtesting.trade_kernel)
+        self.arrays = {
+            'close': np.ascontiguousarray(data['close'].to_numpy(dtype=np.float64)),
+            'atr': np.ascontiguousarray(data['atr'].to_numpy(dtype=np.float64)),
+            'volume_ratio': np.ascontiguousarray(data['volume_ratio'].to_numpy(dtype=np.float64)),
+            'signals': np.ascontiguousarray(signals.to_numpy(dtype=np.int64)),
+            'ml_confidence': np.ascontiguousarray(np.asarray(ml_confidence, dtype=np.float64)),
+        }
+        # Señales acumuladas: cota superior de los trades que aún pueden abrirse
+        self._signal_counts = np.cumsum(self.arrays['signals'] != 0)
+
+    @classmethod
+    def build(cls, data: pd.DataFrame, symbol: str, timeframe: str = '4h',
+              config: Optional[Dict] = None) -> 'TrialContext':
+        """
+        Preparar datos, cargar el modelo y cachear predicciones y señales.
+
+        Args:
+            data: DataFrame OHLCV (el mismo que se pasaba a strategy.run)
+            symbol: Símbolo del activo
+            timeframe: Timeframe de los datos
+            config: Configuración de la estrategia (directorio y opciones de modelos ML)
+
+        Raises:
+            ValueError: Si no hay datos suficientes o no existe modelo entrenado para el símbolo
+        """
+        if len(data) < 100:
+            raise ValueError(f"Datos insuficientes: {len(data)} filas. Necesario mínimo 100 para ML real.")
+
+        strategy = UltraDetailedHeikinAshiMLStrategy(config=dict(config or {}))
+        data_processed = strategy._prepare_data(data.copy(), symbol=symbol, timeframe=timeframe)
+
+        model, scaler = strategy.ml_manager.load_model(symbol, 'random_forest')
+        if model is None:
+            raise ValueError(f"Modelos ML no encontrados para {symbol} en modo optimización. "
+                             f"Ejecutar entrenamiento primero.")
+
+        ml_confidence = strategy.ml_manager.predict_signal(data_processed, symbol, 'random_forest')
+        signals = strategy._generate_signals(data_processed, symbol, ml_confidence)
+
+        logger.info(f"Contexto de trials para {symbol}: {len(data_processed)} velas, "
+                    f"{int((signals != 0).sum())} señales")
+        return cls(data_processed, symbol, timeframe, ml_confidence, signals, model, scaler)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getstate__(self):
+        # El modelo no hace falta para ejecutar trials: no se copia a los workers ni a disco
+        state = self.__dict__.copy()
+        state['model'] = None
+        state['scaler'] = None
+        return state
+
+    @staticmethod
+    def fingerprint(data: pd.DataFrame, symbol: str, config: Optional[Dict] = None) -> str:
+        """
+        Huella de los datos de entrada y del modelo ML del símbolo.
+
+        Args:
+            data: DataFrame que se pasaría a build()
+            symbol: Símbolo del activo
+            config: Configuración de la estrategia (la misma que en build())
+        """
+        config = dict(config or {})
+        manager = MLModelManager(model_dir=config.get('model_dir'), config=config)
+        model = manager.model_fingerprint(symbol, 'random_forest')
+        hasher = hashlib.blake2b(digest_size=16)
+        hasher.update(f"v{CONTEXT_VERSION}|{symbol}|{model}|{frame_fingerprint(data)}".encode())
+        return hasher.hexdigest()
+
+    def save(self, path: Union[str, Path], fingerprint: str) -> Path:
+        """Guardar el contexto con su huella (escritura atómica)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.tmp-{os.getpid()}")
+        with open(tmp_path, 'wb') as f:
+            pickle.dump({'fingerprint': fingerprint, 'context': self}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path: Union[str, Path], fingerprint: str) -> Optional['TrialContext']:
+        """Contexto guardado en `path`, o None si no existe o su huella no coincide"""
+        try:
+            with open(path, 'rb') as f:
+                cached = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+        if not isinstance(cached, dict) or cached.get('fingerprint') != fingerprint:
+            return None
+        return cached['context']
+
+    def remaining_signals(self, bar: int) -> int:
+        """Número de velas con señal en [bar, final)"""
+        total = int(self._signal_counts[-1]) if len(self._signal_counts) else 0
+        return total - (int(self._signal_counts[bar - 1]) if bar > 0 else 0)
+
+    def run(self, params: Dict, checkpoints: int = 0, on_checkpoint=None) -> Dict:
+        """
+        Ejecutar un trial: estrategia con `params` sobre el contexto precalculado.
+
+        Args:
+            params: Parámetros del trial
+            checkpoints, on_checkpoint: Informes intermedios y parada anticipada
+                (ver UltraDetailedHeikinAshiMLStrategy._run_backtest_array)
+
+        Returns:
+            Dict de resultados con el mismo formato que UltraDetailedHeikinAshiMLStrategy.run
+        """
+        strategy = UltraDetailedHeikinAshiMLStrategy(config=params)
+        strategy._optimization_mode = True
+        return strategy.run_prepared(self, checkpoints=checkpoints, on_checkpoint=on_checkpoint)
@@ -0,0 +1,242 @@
+"""
+Entrenamiento walk-forward en paralelo (folds y símbolos en un pool de procesos).
+
+MLTrainer.train_models valida con cross_val_score(n_jobs=1) y el pipeline de
+optimización entrena los símbolos uno detrás de otro. WalkForwardTrainer reparte
+todas las tareas de todos los símbolos en un único ProcessPoolExecutor:
+
+    - un fold walk-forward por split de TimeSeriesSplit sobre el periodo de entrenamiento
+    - el ajuste final sobre todo el entrenamiento, evaluado en validación
+
+La matriz de features y las etiquetas de cada símbolo se copian una sola vez a
+memoria compartida (utils.shared_arrays); los workers solo reciben el nombre de
+los bloques y leen los arrays sin copiarlos.
+
+Cada tarea devuelve sus tiempos (attach, fit, evaluate) y el proceso que la
+ejecutó; run() escribe un informe JSON con una fila por fold.
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from utils.logger import get_logger
+from utils.shared_arrays import SharedArrays
+
+logger = get_logger(__name__)
+
+FINAL_FOLD = 'final'
+DEFAULT_REPORT_DIR = Path(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) / 'data' / 'walk_forward'
+
+
+def _fit_fold(task: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entrenar y evaluar un fold (se ejecuta en un proceso del pool).
+
+    El fold final devuelve además el modelo entrenado y su matriz de confusión.
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import confusion_matrix, roc_auc_score
+
+    start = time.perf_counter()
+    data = SharedArrays.attach(task['data'])
+    X, y = data['X'], data['y']
+    attached = time.perf_counter()
+
+    train = slice(0, task['train_stop'])
+    test = slice(task['test_start'], task['test_stop'])
+    model = clone(task['estimator'])
+    model.fit(X[train], y[train])
+    fitted = time.perf_counter()
+
+    y_test = y[test]
+    y_pred = model.predict(X[test])
+    y_proba = model.predict_proba(X[test])[:, 1]
+    try:
+        auc = float(roc_auc_score(y_test, y_proba))
+    except ValueError:
+        # Fold con una sola clase: AUC no definido
+        auc = float('nan')
+    accuracy = float((y_pred == y_test).mean())
+    evaluated = time.perf_counter()
+
+    result = {
+        'symbol': task['symbol'],
+        'model_name': task['model_name'],
+        'fold': task['fold'],
+        'train_rows': task['train_stop'],
+        'test_rows': task['test_stop'] - task['test_start'],
+        'auc': auc,
+        'accuracy': accuracy,
+        'pid': os.getpid(),
+        'timings': {
+            'attach': attached - start,
+            'fit': fitted - attached,
+            'evaluate': evaluated - fitted,
+            'total': evaluated - start,
+        },
+    }
+    if task['fold'] == FINAL_FOLD:
+        result['model'] = model
+        result['confusion_matrix'] = confusion_matrix(y_test, y_pred).tolist()
+
+    del X, y
+    data.close()
+    return result
+
+
+class WalkForwardTrainer:
+    """
+    Entrenamiento walk-forward de varios símbolos y modelos en un pool de procesos.
+
+    Args:
+        max_workers: Procesos del pool (backtesting.max_workers); <= 1 ejecuta en el proceso actual
+        n_splits: Folds walk-forward (TimeSeriesSplit) sobre el periodo de entrenamiento
+        report_dir: Directorio del informe de tiempos (None = no escribir informe)
+    """
+
+    def __init__(self, max_workers: Optional[int] = 4, n_splits: int = 5,
+                 report_dir: Optional[Path] = DEFAULT_REPORT_DIR):
+        self.max_workers = max(1, int(max_workers or 1))
+        self.n_splits = n_splits
+        self.report_dir = Path(report_dir) if report_dir is not None else None
+        self.report_path: Optional[Path] = None
+        self._symbols: Dict[str, Dict[str, Any]] = {}
+
+    def add_symbol(self, symbol: str, X_train: pd.DataFrame, y_train: pd.Series,
+                   X_val: pd.DataFrame, y_val: pd.Series, models: Dict[str, Any]) -> None:
+        """
+        Registrar los datos y los modelos (sin entrenar) de un símbolo.
+
+        Args:
+            symbol: Símbolo
+            X_train, y_train: Periodo de entrenamiento (ordenado en el tiempo)
+            X_val, y_val: Periodo de validación
+            models: nombre -> estimador sklearn sin entrenar (ver MLTrainer.build_models)
+        """
+        X = np.vstack([X_train.to_numpy(dtype=np.float64), X_val.to_numpy(dtype=np.float64)])
+        y = np.concatenate([y_train.to_numpy(), y_val.to_numpy()])
+        self._symbols[symbol] = {
+            'data': SharedArrays({'X': X, 'y': y}),
+            'n_train': len(X_train),
+            'models': models,
+        }
+
+    def _tasks(self) -> List[Dict[str, Any]]:
+        from sklearn.model_selection import TimeSeriesSplit
+
+        tasks = []
+        for symbol, entry in self._symbols.items():
+            n_train = entry['n_train']
+            n_total = len(entry['data']['y'])
+            spec = entry['data'].spec()
+            # Con TimeSeriesSplit cada fold entrena con todo lo anterior y valida en el bloque siguiente
+            splits = [(train[-1] + 1, test[0], test[-1] + 1)
+                      for train, test in TimeSeriesSplit(n_splits=self.n_splits).split(np.empty(n_train))]
+            for model_name, estimator in entry['models'].items():
+                for fold, (train_stop, test_start, test_stop) in enumerate(splits):
+                    tasks.append({'symbol': symbol, 'model_name': model_name, 'estimator': estimator,
+                                  'fold': fold, 'train_stop': train_stop, 'test_start': test_start,
+                                  'test_stop': test_stop, 'data': spec})
+                tasks.append({'symbol': symbol, 'model_name': model_name, 'estimator': estimator,
+                              'fold': FINAL_FOLD, 'train_stop': n_train, 'test_start': n_train,
+                              'test_stop': n_total, 'data': spec})
+        # Primero las tareas más largas (ajuste final) para equilibrar el pool
+        tasks.sort(key=lambda task: -task['train_stop'])
+        return tasks
+
+    def run(self) -> Dict[str, Tuple[Dict[str, Dict], Optional[str]]]:
+        """
+        Ejecutar todos los folds de todos los símbolos.
+
+        Returns:
+            Dict símbolo -> (results, best_model) con el mismo formato que
+            MLTrainer.train_models ('cv_scores' son los AUC de los folds walk-forward)
+        """
+        tasks = self._tasks()
+        start = time.perf_counter()
+        try:
+            if self.max_workers > 1 and len(tasks) > 1:
+                with ProcessPoolExecutor(max_workers=min(self.max_workers, len(tasks))) as executor:
+                    fold_results = list(executor.map(_fit_fold, tasks))
+            else:
+                fold_results = [_fit_fold(task) for task in tasks]
+        finally:
+            for entry in self._symbols.values():
+                entry['data'].close()
+        wall_time = time.perf_counter() - start
+
+        results = self._collect(fold_results)
+        logger.info(f"Walk-forward: {len(tasks)} tareas de {len(self._symbols)} símbolos en "
+                    f"{wall_time:.1f}s con {self.max_workers} workers")
+        if self.report_dir is not None:
+            self.report_path = self._write_report(fold_results, wall_time)
+        self._symbols = {}
+        return results
+
+    def _collect(self, fold_results: List[Dict[str, Any]]) -> Dict[str, Tuple[Dict[str, Dict], Optional[str]]]:
+        collected: Dict[str, Tuple[Dict[str, Dict], Optional[str]]] = {}
+        for symbol in self._symbols:
+            results = {}
+            for model_name in self._symbols[symbol]['models']:
+                rows = [r for r in fold_results if r['symbol'] == symbol and r['model_name'] == model_name]
+                folds = sorted((r for r in rows if r['fold'] != FINAL_FOLD), key=lambda r: r['fold'])
+                final = next(r for r in rows if r['fold'] == FINAL_FOLD)
+                cv_scores = np.array([r['auc'] for r in folds])
+                results[model_name] = {
+                    'model': final['model'],
+                    'cv_scores': cv_scores.tolist(),
+                    'cv_mean': float(np.nanmean(cv_scores)) if len(cv_scores) else float('nan'),
+                    'cv_std': float(np.nanstd(cv_scores)) if len(cv_scores) else float('nan'),
+                    'val_auc': final['auc'],
+                    'val_accuracy': final['accuracy'],
+                    'confusion_matrix': final['confusion_matrix'],
+                }
+                logger.info(f"{symbol} {model_name} - Walk-forward AUC: {results[model_name]['cv_mean']:.4f}, "
+                            f"Validation AUC: {final['auc']:.4f}")
+
+            scored = {name: r['val_auc'] for name, r in results.items() if not np.isnan(r['val_auc'])}
+            best_model = max(scored, key=scored.get) if scored else None
+            collected[symbol] = (results, best_model)
+        return collected
+
+    def _write_report(self, fold_results: List[Dict[str, Any]], wall_time: float) -> Path:
+        """Informe JSON con los tiempos de cada fold"""
+        folds = [{key: value for key, value in r.items() if key not in ('model', 'confusion_matrix')}
+                 for r in fold_results]
+        busy_time = sum(r['timings']['total'] for r in fold_results)
+        report = {
+            'timestamp': datetime.now().isoformat(),
+            'max_workers': self.max_workers,
+            'n_splits': self.n_splits,
+            'symbols': sorted({r['symbol'] for r in fold_results}),
+            'wall_time': wall_time,
+            'busy_time': busy_time,
+            'speedup': busy_time / wall_time if wall_time > 0 else None,
+            'folds': folds,
+        }
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        path = self.report_dir / f"walk_forward_report_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.json"
+        with open(path, 'w') as f:
+            # NaN (AUC no definido) -> null
+            json.dump(_nan_to_none(report), f, indent=2, default=str)
+        logger.info(f"Informe walk-forward guardado en {path}")
+        return path
+
+
+def _nan_to_none(value):
+    """Sustituir NaN por None de forma recursiva (JSON válido)"""
+    if isinstance(value, float) and value != value:
+        return None
+    if isinstance(value, dict):
+        return {key: _nan_to_none(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_nan_to_none(item) for item in value]
+    return value
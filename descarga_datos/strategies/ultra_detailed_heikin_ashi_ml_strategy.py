@@ -23,6 +23,8 @@ from typing import Dict, List, Optional, Tuple
 import talib
 from datetime import datetime, timedelta
 import os
+import hashlib
+import json
 import pickle
 import joblib
 # Importaciones lazy de sklearn para compatibilidad Python 3.13
@@ -34,7 +36,20 @@ import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
+from models.artifact_index import ArtifactIndex
+from models.compact_model import CompactModel, compact_path
 from models.model_manager import ModelManager
+from models.forest_arrays import MANIFEST_NAME, ForestArrays, export_forest, forest_path
+from models.model_registry import get_model_registry
+
+# ml_training.training.incremental
+INCREMENTAL_DEFAULTS = {
+    'mode': 'warm_start',   # 'warm_start' (árboles nuevos con las velas nuevas) o 'window' (ventana deslizante)
+    'min_new_bars': 24,     # Velas nuevas desde el último artefacto para reentrenar
+    'new_trees': 20,        # Árboles añadidos en cada reentrenamiento warm_start
+    'max_trees': 400,       # Se descartan los árboles más antiguos por encima de este número
+    'window_bars': 3000,    # Velas de la ventana deslizante
+}
 
 class MLModelManager:
     """
@@ -51,8 +66,24 @@ class MLModelManager:
         self.model_dir = self.model_manager.model_dir
         self.models = {}
         self.scalers = {}
+        # Límites de winsorizing por "symbol_model" (calculados al entrenar)
+        self.clip_bounds = {}
         # Agregar configuración para prepare_features
         self.config = config
+        # Usar los bosques exportados como arrays mapeados en memoria (models.forest_arrays)
+        ml_training = config.get('ml_training', {}) if isinstance(config, dict) else getattr(config, 'ml_training', None)
+        if isinstance(ml_training, dict):
+            self.mmap_models = ml_training.get('mmap_models', True)
+            self.forest_backend = ml_training.get('forest_backend', 'auto')
+            self.compact_models = ml_training.get('compact_models', False)
+            training = ml_training.get('training', {})
+        else:
+            self.mmap_models = getattr(ml_training, 'mmap_models', True)
+            self.forest_backend = getattr(ml_training, 'forest_backend', 'auto')
+            self.compact_models = getattr(ml_training, 'compact_models', False)
+            training = getattr(ml_training, 'training', {})
+        # Reentrenamiento incremental (ver retrain_incremental)
+        self.incremental = dict(INCREMENTAL_DEFAULTS, **((training or {}).get('incremental') or {}))
 
     def ensure_model_dir(self):
         """Crear directorio de modelos si no existe"""
@@ -66,10 +97,110 @@ class MLModelManager:
         """Obtener ruta del scaler"""
         return self.model_manager.get_scaler_path(symbol, model_name)
 
-    def prepare_features(self, data: pd.DataFrame) -> pd.DataFrame:
+    def prepare_features(self, data: pd.DataFrame, clip_bounds: Optional[Dict] = None,
+                         tail: Optional[int] = None, schema_version: Optional[int] = None) -> pd.DataFrame:
         """
         Preparar features EXACTAMENTE IGUAL que en el entrenamiento ML
-        CRÍTICO: Debe coincidir con MLTrainer.prepare_features() para evitar mismatch
+        CRÍTICO: Usa el mismo FeaturePipeline que MLTrainer.prepare_features() para evitar mismatch
+
+        Args:
+            data: DataFrame OHLCV
+            clip_bounds: Límites de winsorizing guardados con el modelo (ver compute_clip_bounds).
+                Si es None se calculan sobre `data` (comportamiento original).
+            tail: Devolver solo las features de las últimas `tail` velas (mismos valores
+                que las últimas filas del cálculo completo). Solo se ensamblan esas filas
+                cuando clip_bounds cubre todas las columnas; si no, los límites dependen
+                de toda la ventana y se calcula la matriz completa.
+            schema_version: Versión de features del modelo (ver load_feature_schema);
+                por defecto la actual
+        """
+        from indicators.feature_pipeline import apply_clip_bounds
+
+        pipeline = self._get_feature_pipeline(schema_version)
+        covered = bool(clip_bounds) and set(pipeline.columns) <= set(clip_bounds['columns'])
+        matrix = self._prepare_feature_matrix(data, tail=tail if covered else None, schema_version=schema_version)
+
+        # Limitar valores extremos (winsorizing al percentil 1-99) en una sola operación vectorizada
+        apply_clip_bounds(matrix.values, matrix.columns, clip_bounds)
+
+        if tail is not None and not covered:
+            matrix = matrix.take(np.asarray(matrix.index.isin(data.index[len(data) - min(tail, len(data)):])))
+
+        return matrix.to_frame()
+
+    def _prepare_feature_matrix(self, data: pd.DataFrame, tail: Optional[int] = None,
+                                schema_version: Optional[int] = None):
+        """FeatureMatrix limpia (sin NaN ni infinitos) antes del winsorizing"""
+        # Matriz de features en una sola pasada (features base + Bollinger)
+        return self._clean_feature_matrix(self._get_feature_pipeline(schema_version).transform(data, tail=tail))
+
+    @staticmethod
+    def _clean_feature_matrix(matrix):
+        """Quitar las filas con NaN en las features base y poner a 0 los valores no finitos"""
+        from indicators.feature_pipeline import FEATURE_COLUMNS
+
+        # Eliminar filas con NaN en las features base
+        matrix = matrix.take(matrix.complete_rows(FEATURE_COLUMNS))
+
+        # Limpiar NaN y valores extremos
+        matrix.values[~np.isfinite(matrix.values)] = 0
+        return matrix
+
+    def _get_feature_pipeline(self, schema_version: Optional[int] = None):
+        """FeaturePipeline de inferencia por versión de features (creado una vez por instancia)"""
+        from indicators.feature_pipeline import FEATURE_SCHEMA_VERSION, FeaturePipeline
+
+        schema_version = schema_version or FEATURE_SCHEMA_VERSION
+        pipelines = self.__dict__.setdefault('_feature_pipelines', {})
+        if schema_version not in pipelines:
+            # Usar la configuración ya cargada en el objeto, no recargar
+            pipelines[schema_version] = FeaturePipeline(self.config, include_bollinger=True,
+                                                        schema_version=schema_version)
+        return pipelines[schema_version]
+
+    def _get_feature_engine(self, schema_version: Optional[int] = None):
+        """Motor de features incremental del modo live (None sin TA-Lib, ver indicators.incremental_features)"""
+        from indicators.incremental_features import INCREMENTAL_FEATURES_AVAILABLE, IncrementalFeatureEngine
+
+        if not INCREMENTAL_FEATURES_AVAILABLE:
+            return None
+        pipeline = self._get_feature_pipeline(schema_version)
+        engines = self.__dict__.setdefault('_feature_engines', {})
+        if pipeline.schema_version not in engines:
+            engines[pipeline.schema_version] = IncrementalFeatureEngine(pipeline)
+        return engines[pipeline.schema_version]
+
+    def latest_features(self, data: pd.DataFrame, symbol: str, clip_bounds: Optional[Dict] = None,
+                        timeframe: Optional[str] = None, schema_version: Optional[int] = None) -> pd.DataFrame:
+        """
+        Features de la última vela de `data` para el modo live.
+
+        Con límites de winsorizing guardados para todas las columnas, las features
+        salen del motor incremental: solo se procesan las velas nuevas desde la
+        llamada anterior para (symbol, timeframe) y los valores son los de
+        prepare_features sobre toda la historia recibida. Si no, se usa
+        prepare_features(data, clip_bounds, tail=1). `schema_version` como en
+        prepare_features.
+
+        Returns:
+            DataFrame de una fila (vacío si la última vela no tiene features válidas)
+        """
+        from indicators.feature_pipeline import apply_clip_bounds
+
+        engine = self._get_feature_engine(schema_version)
+        covered = (bool(clip_bounds)
+                   and set(self._get_feature_pipeline(schema_version).columns) <= set(clip_bounds['columns']))
+        if engine is None or not covered:
+            return self.prepare_features(data, clip_bounds=clip_bounds, tail=1, schema_version=schema_version)
+
+        matrix = self._clean_feature_matrix(engine.transform(symbol, timeframe, data, tail=1))
+        apply_clip_bounds(matrix.values, matrix.columns, clip_bounds)
+        return matrix.to_frame()
+
+    def _prepare_features_legacy(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        Implementación original de prepare_features (columnas intermedias en DataFrame).
+        Se conserva como referencia para los tests de paridad del FeaturePipeline.
         """
         # 🎯 COPIA EXACTA de MLTrainer.prepare_features() - NO MODIFICAR
         from indicators.technical_indicators import TechnicalIndicators
@@ -129,26 +260,6 @@ class MLModelManager:
 
         return features
 
-        # ⚠️ CÓDIGO INALCANZABLE ELIMINADO ⚠️
-        # El siguiente código nunca se ejecutaba porque estaba después del return
-        # Features de volatilidad
-        # features['bb_upper'], features['bb_middle'], features['bb_lower'] = talib.BBANDS(data['close'], timeperiod=20)
-        # features['bb_width'] = (features['bb_upper'] - features['bb_lower']) / features['bb_middle']
-
-        # Limpiar NaN y valores extremos
-        # features = features.fillna(0)
-        # features = features.replace([np.inf, -np.inf], 0)
-
-        # Limitar valores extremos (winsorizing)
-        # for col in features.columns:
-        #     if features[col].dtype in ['float64', 'float32']:
-        #         # Limitar al percentil 1-99 para evitar outliers extremos
-        #         lower = features[col].quantile(0.01)
-        #         upper = features[col].quantile(0.99)
-        #         features[col] = features[col].clip(lower, upper)
-
-        # return features
-
     def prepare_target(self, data: pd.DataFrame, lookahead: int = 1) -> pd.Series:
         """
         Preparar target: cambio de color Heikin Ashi en N periodos
@@ -193,13 +304,8 @@ class MLModelManager:
             return {}
 
         # Preparar features y target
-        features = self.prepare_features(data)
-        target = self.prepare_target(data)
-
-        # Remover filas con target NaN (futuro)
-        valid_idx = target.dropna().index
-        features = features.loc[valid_idx]
-        target = target.loc[valid_idx]
+        # Los límites de winsorizing se calculan una vez aquí y se guardan con el modelo
+        features, target, clip_bounds = self._training_set(data)
 
         # Split de datos
         X_train, X_test, y_train, y_test = train_test_split(
@@ -213,17 +319,11 @@ class MLModelManager:
 
         # SOLO RANDOM FOREST - Otros modelos causan problemas en Python 3.13
         models_config = {
-            'random_forest': RandomForestClassifier(
-                n_estimators=200,        # Aumentado de 100 (más árboles = mejor generalización)
-                max_depth=15,            # Aumentado de 10 (más profundidad con más data)
-                min_samples_split=10,    # Reducido de 20 (menos restrictivo)
-                min_samples_leaf=5,      # Reducido de 10 (permite más detalle)
-                max_features='sqrt',     # Mejor para evitar overfitting
-                random_state=42,
-                n_jobs=1
-            )
+            'random_forest': self._new_random_forest()
             # GradientBoosting y NeuralNetwork DESHABILITADOS
         }
+        # Última vela con target conocido: punto de partida del reentrenamiento incremental
+        training_state = self._training_state(features, 'full')
 
         # Entrenar y evaluar modelos
         results = {}
@@ -272,89 +372,493 @@ class MLModelManager:
                 print(f"    {model_name}: Accuracy={accuracy:.4f}, AUC={auc:.4f} (CV omitido por configuración)")
 
             # Guardar modelo
-            self.save_model(symbol, model_name, model, scaler)
+            self.save_model(symbol, model_name, model, scaler, clip_bounds,
+                            dict(training_state, n_estimators=len(model.estimators_)),
+                            {'accuracy': float(accuracy), 'auc': float(auc),
+                             'cv_score': float(cv_score), 'cv_std': float(cv_std)})
 
         self.models[symbol] = results
         return results
 
-    def save_model(self, symbol: str, model_name: str, model, scaler):
+    def _training_set(self, data: pd.DataFrame, clip_bounds: Optional[Dict] = None,
+                      lookahead: int = 1, schema_version: Optional[int] = None) -> Tuple[pd.DataFrame, pd.Series, Dict]:
+        """
+        Features winsorizadas y target alineados por vela -> (features, target, clip_bounds).
+
+        Si clip_bounds es None los límites se calculan sobre `data`. Se descartan
+        las últimas `lookahead` velas (su target todavía no se conoce) y las velas
+        sin features completas. Las features son las de `schema_version` (por
+        defecto la versión actual).
+        """
+        from indicators.feature_pipeline import apply_clip_bounds, compute_clip_bounds
+
+        matrix = self._prepare_feature_matrix(data, schema_version=schema_version)
+        if clip_bounds is None:
+            clip_bounds = compute_clip_bounds(matrix.values, matrix.columns)
+        apply_clip_bounds(matrix.values, matrix.columns, clip_bounds)
+        features = matrix.to_frame()
+        target = self.prepare_target(data, lookahead).iloc[:max(len(data) - lookahead, 0)]
+
+        valid_idx = features.index.intersection(target.index)
+        return features.loc[valid_idx], target.loc[valid_idx], clip_bounds
+
+    @staticmethod
+    def _new_random_forest():
+        """RandomForest con los hiperparámetros de entrenamiento"""
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(
+            n_estimators=200,        # Aumentado de 100 (más árboles = mejor generalización)
+            max_depth=15,            # Aumentado de 10 (más profundidad con más data)
+            min_samples_split=10,    # Reducido de 20 (menos restrictivo)
+            min_samples_leaf=5,      # Reducido de 10 (permite más detalle)
+            max_features='sqrt',     # Mejor para evitar overfitting
+            random_state=42,
+            n_jobs=1
+        )
+
+    @staticmethod
+    def _training_state(features: pd.DataFrame, mode: str) -> Dict:
+        """Estado guardado con el modelo para contar las velas nuevas desde el entrenamiento"""
+        return {
+            'last_bar': features.index[-1],
+            'n_bars': len(features),
+            'mode': mode,
+            'trained_at': datetime.now().isoformat(),
+        }
+
+    def new_bars_since_training(self, data: pd.DataFrame, symbol: str, model_name: str = 'random_forest') -> Optional[int]:
+        """Velas de `data` posteriores a la última usada para entrenar (None si no hay estado guardado)"""
+        state = self.model_manager.load_model(f"{symbol}_{model_name}_training_state")
+        if not state:
+            return None
+        return int((data.index > state['last_bar']).sum())
+
+    def retrain_incremental(self, data: pd.DataFrame, symbol: str, model_name: str = 'random_forest',
+                            mode: Optional[str] = None) -> Optional[Dict]:
+        """
+        Reentrenar el modelo con las velas nuevas desde el último artefacto.
+
+        Solo reentrena si hay al menos `min_new_bars` velas posteriores a la
+        última vela de entrenamiento (ml_training.training.incremental):
+
+        - 'warm_start': añade `new_trees` árboles entrenados solo con las velas
+          nuevas (warm_start de sklearn), con el scaler y los límites de
+          winsorizing del modelo. Por encima de `max_trees` se descartan los
+          árboles más antiguos.
+        - 'window': entrena un bosque nuevo sobre las últimas `window_bars` velas.
+
+        Sin modelo o estado de entrenamiento previo se entrena desde cero (train_models).
+
+        Args:
+            data: DataFrame con indicadores (como en train_models), incluyendo las velas nuevas
+            symbol: Símbolo
+            model_name: Modelo a reentrenar
+            mode: 'warm_start' o 'window' (por defecto el de la configuración)
+
+        Returns:
+            Dict con el modo usado, velas nuevas y número de árboles, o None si no
+            hay velas nuevas suficientes
+        """
+        cfg = self.incremental
+        mode = mode or cfg['mode']
+        if mode not in ('warm_start', 'window'):
+            raise ValueError(f"Modo de reentrenamiento no soportado: {mode}")
+        full_model_name = f"{symbol}_{model_name}"
+
+        state = self.model_manager.load_model(f"{full_model_name}_training_state")
+        new_bars = int((data.index > state['last_bar']).sum()) if state else None
+        model = self.model_manager.load_model(full_model_name) if state else None
+        scaler = self.model_manager.load_model(f"{full_model_name}_scaler") if model is not None else None
+        if scaler is None:
+            print(f"Sin modelo previo con estado de entrenamiento para {symbol}: entrenamiento completo")
+            results = self.train_models(data, symbol, enable_cv=False)
+            model = results.get(model_name, {}).get('model')
+            return {'mode': 'full', 'new_bars': len(data),
+                    'n_estimators': len(model.estimators_) if model is not None else 0}
+
+        if new_bars < cfg['min_new_bars']:
+            return None
+
+        if mode == 'warm_start' and self._stored_feature_schema(full_model_name) != self._current_feature_schema():
+            # Los árboles existentes se entrenaron con otra versión de features
+            print(f"El modelo de {symbol} usa otra versión de features: reentrenamiento en ventana")
+            mode = 'window'
+
+        if mode == 'warm_start':
+            clip_bounds = self.model_manager.load_model(f"{full_model_name}_clip_bounds")
+            features, target, clip_bounds = self._training_set(data, clip_bounds)
+            new = features.index > state['last_bar']
+            if not new.any():
+                return None
+            y_new = target[new]
+            # Los árboles nuevos deben ver las mismas clases que el bosque (misma columna en predict_proba)
+            if not np.array_equal(np.unique(y_new), model.classes_):
+                print(f"Las velas nuevas de {symbol} no contienen todas las clases: reentrenamiento en ventana")
+                mode = 'window'
+
+        if mode == 'warm_start':
+            model.set_params(warm_start=True, n_estimators=len(model.estimators_) + cfg['new_trees'])
+            model.fit(scaler.transform(features[new]), y_new)
+            model.set_params(warm_start=False)
+            if len(model.estimators_) > cfg['max_trees']:
+                model.estimators_ = model.estimators_[-cfg['max_trees']:]
+                model.set_params(n_estimators=len(model.estimators_))
+        else:
+            from sklearn.preprocessing import StandardScaler
+
+            features, target, clip_bounds = self._training_set(data.iloc[-cfg['window_bars']:])
+            scaler = StandardScaler()
+            model = self._new_random_forest()
+            model.fit(scaler.fit_transform(features), target)
+
+        training_state = dict(self._training_state(features, mode), n_estimators=len(model.estimators_))
+        self.save_model(symbol, model_name, model, scaler, clip_bounds, training_state)
+        print(f"Modelo {full_model_name} reentrenado ({mode}): {new_bars} velas nuevas, {len(model.estimators_)} árboles")
+        return {'mode': mode, 'new_bars': new_bars, 'n_estimators': len(model.estimators_)}
+
+    def save_model(self, symbol: str, model_name: str, model, scaler, clip_bounds: Optional[Dict] = None,
+                   training_state: Optional[Dict] = None, metrics: Optional[Dict] = None):
         """Guardar modelo entrenado usando el ModelManager centralizado"""
         # Construir nombre completo del modelo incluyendo el símbolo
         full_model_name = f"{symbol}_{model_name}"
         full_scaler_name = f"{symbol}_{model_name}_scaler"
 
+        # Metadatos para el índice de artefactos (models.artifact_index)
+        features = getattr(scaler, 'feature_names_in_', None)
+        metadata = {
+            'symbol': symbol,
+            'model_type': model_name,
+            'features': list(features) if features is not None else None,
+            'training_range': {'end': training_state['last_bar'], 'n_bars': training_state['n_bars']}
+            if training_state is not None else None,
+            'metrics': metrics,
+            'feature_schema_version': self._current_feature_schema(),
+        }
+
         # Usar el ModelManager centralizado
-        success_model = self.model_manager.save_model(model, full_model_name)
+        success_model = self.model_manager.save_model(model, full_model_name, metadata)
         success_scaler = self.model_manager.save_model(scaler, full_scaler_name)
+        # Exportar también los arrays del bosque (carga mapeada en memoria, ver models.forest_arrays)
+        if success_model:
+            export_forest(model, self._model_manager_path(full_model_name))
+            # Y la versión cuantizada sin sklearn (arranque rápido, ver models.compact_model)
+            self.model_manager.export_compact(model, full_model_name, scaler, clip_bounds)
+        # Forzar la recarga aunque el mtime no haya cambiado (sistemas de ficheros con poca resolución)
+        for backend in (None, self.forest_backend, 'compact'):
+            get_model_registry().invalidate((self.model_manager.base_dir, full_model_name, backend))
+        if clip_bounds is not None:
+            self.clip_bounds[full_model_name] = clip_bounds
+            success_scaler = success_scaler and self.model_manager.save_model(
+                clip_bounds, f"{full_model_name}_clip_bounds")
+        if training_state is not None:
+            # Última vela de entrenamiento (ver retrain_incremental)
+            success_model = success_model and self.model_manager.save_model(
+                training_state, f"{full_model_name}_training_state")
 
         if success_model and success_scaler:
             print(f"    Modelo guardado: {full_model_name}")
         else:
             print(f"    Error al guardar modelo para {symbol}")
 
+    def _latest_joblib_path(self, symbol: str) -> Optional[str]:
+        """Ruta del modelo joblib más reciente de MLTrainer para el símbolo (None si no hay)"""
+        models_root = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models')
+        # "latest" fijado por MLTrainer.save_models en el índice de artefactos
+        model_path = ArtifactIndex(models_root).latest(symbol, 'RandomForest')
+        if model_path is not None:
+            return model_path
+
+        # Modelos anteriores al índice: el más reciente por nombre (timestamp)
+        # Convertir símbolo a nombre de directorio válido (XRP/USDT -> XRP_USDT)
+        symbol_dir = symbol.replace('/', '_')
+        models_dir = os.path.join(models_root, symbol_dir)
+        # Listado cacheado mientras no cambie el directorio
+        model_files = [f for f in get_model_registry().list_dir(models_dir)
+                       if f.startswith('RandomForest_') and f.endswith('.joblib')]
+        if not model_files:
+            return None
+        # Usar el modelo más reciente
+        return os.path.join(models_dir, model_files[-1])
+
+    @staticmethod
+    def _load_joblib_artifact(model_path: str, forest_dir: Optional[str] = None, forest_backend: str = 'auto'):
+        """
+        Deserializar un modelo joblib de MLTrainer -> (model, scaler).
+
+        Si se indica `forest_dir`, el modelo se abre como ForestArrays mapeado en
+        memoria (con el backend de inferencia `forest_backend`) en lugar de
+        deserializar el RandomForest.
+        """
+        if forest_dir is not None:
+            model_data = ForestArrays.load(forest_dir, backend=forest_backend)
+        else:
+            model_data = joblib.load(model_path)
+        model = model_data['model'] if isinstance(model_data, dict) else model_data
+
+        # Intentar cargar scaler desde el mismo archivo o crear uno nuevo
+        scaler = None
+        if isinstance(model_data, dict) and 'scaler' in model_data:
+            scaler = model_data['scaler']
+        else:
+            # Crear scaler dummy y ajustarlo con datos de ejemplo
+            from sklearn.preprocessing import StandardScaler
+            scaler = StandardScaler()
+            # El scaler se ajustará cuando se use por primera vez
+
+        return model, scaler
+
+    @staticmethod
+    def _load_compact_artifact(compact_file: str):
+        """Abrir un modelo compacto (sin sklearn) -> (model, scaler)"""
+        model = CompactModel.load(compact_file)
+        scaler = model.scaler
+        if scaler is None:
+            # Modelos de MLTrainer sin scaler guardado: mismo scaler dummy que _load_joblib_artifact
+            from sklearn.preprocessing import StandardScaler
+            scaler = StandardScaler()
+        return model, scaler
+
+    def _compact_file(self, model_path: str) -> Optional[str]:
+        """Fichero compacto exportado junto a `model_path` (None si no hay o está desactivado)"""
+        if not self.compact_models:
+            return None
+        path = compact_path(model_path)
+        return str(path) if path.exists() else None
+
+    def _model_manager_path(self, name: str) -> str:
+        return os.path.join(self.model_manager.base_dir, f"{name}.pkl")
+
+    def _mmap_forest_dir(self, model_path: str) -> Optional[str]:
+        """Directorio ForestArrays exportado junto a `model_path` (None si no hay o está desactivado)"""
+        if not self.mmap_models:
+            return None
+        forest_dir = forest_path(model_path)
+        return str(forest_dir) if (forest_dir / MANIFEST_NAME).exists() else None
+
     def load_model(self, symbol: str, model_name: str):
-        """Cargar modelo entrenado usando múltiples métodos de compatibilidad"""
-        import os
-        import joblib
+        """
+        Cargar modelo entrenado usando múltiples métodos de compatibilidad.
+
+        Los artefactos se sirven desde el registro de modelos del proceso (ver
+        models.model_registry): solo se leen de disco la primera vez o cuando el
+        fichero cambia. Los modelos con una versión de features que este código
+        no sabe calcular (ver load_feature_schema) no se cargan: (None, None).
+        """
+        from indicators.feature_pipeline import FEATURE_SCHEMA_VERSIONS
 
+        registry = get_model_registry()
         # Construir nombre completo del modelo incluyendo el símbolo
         full_model_name = f"{symbol}_{model_name}"
 
+        # Las features del modelo deben poder reproducirse (ver load_feature_schema)
+        schema_version = self.load_feature_schema(symbol, model_name)
+        if schema_version not in FEATURE_SCHEMA_VERSIONS:
+            print(f"ERROR: El modelo {full_model_name} usa la versión de features {schema_version}, "
+                  f"no soportada (soportadas: {FEATURE_SCHEMA_VERSIONS})")
+            return None, None
+
         # PRIMERO: Intentar cargar desde archivos joblib en el directorio de modelos (donde están los modelos reales)
         try:
-            # Convertir símbolo a nombre de directorio válido (XRP/USDT -> XRP_USDT)
-            symbol_dir = symbol.replace('/', '_')
-            models_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'models', symbol_dir)
-            model_files = [f for f in os.listdir(models_dir) if f.startswith('RandomForest_') and f.endswith('.joblib')]
-
-            if model_files:
-                # Usar el modelo más reciente
-                latest_model = sorted(model_files)[-1]
-                model_path = os.path.join(models_dir, latest_model)
-
-                # Cargar modelo joblib
-                model_data = joblib.load(model_path)
-                model = model_data['model'] if isinstance(model_data, dict) else model_data
-
-                # Intentar cargar scaler desde el mismo archivo o crear uno nuevo
-                scaler = None
-                if isinstance(model_data, dict) and 'scaler' in model_data:
-                    scaler = model_data['scaler']
+            model_path = self._latest_joblib_path(symbol)
+
+            if model_path:
+                compact_file = self._compact_file(model_path)
+                forest_dir = self._mmap_forest_dir(model_path)
+                if compact_file is not None:
+                    key, paths = ('compact', symbol, model_name), [compact_file]
+                    loader = lambda: self._load_compact_artifact(compact_file)
                 else:
-                    # Crear scaler dummy y ajustarlo con datos de ejemplo
-                    from sklearn.preprocessing import StandardScaler
-                    scaler = StandardScaler()
-                    # El scaler se ajustará cuando se use por primera vez
-
-                return model, scaler
+                    if forest_dir is not None:
+                        key, paths = ('forest', symbol, model_name, self.forest_backend), [os.path.join(forest_dir, MANIFEST_NAME)]
+                    else:
+                        key, paths = ('joblib', symbol, model_name), [model_path]
+                    loader = lambda: self._load_joblib_artifact(model_path, forest_dir, self.forest_backend)
+                pair = registry.get(key, paths, loader)
+                if pair is not None:
+                    return pair
         except Exception as e:
             print(f"Error cargando modelo joblib: {e}")
 
         # SEGUNDO: Intentar cargar desde ModelManager centralizado
         try:
-            model = self.model_manager.load_model(full_model_name)
-            scaler = self.model_manager.load_model(f"{full_model_name}_scaler")
-            if model is not None and scaler is not None:
-                return model, scaler
+            model_file = self._model_manager_path(full_model_name)
+            scaler_file = self._model_manager_path(f"{full_model_name}_scaler")
+            compact_file = self._compact_file(model_file)
+            if compact_file is not None:
+                # Modelo y scaler en el fichero compacto: no se deserializa nada de sklearn
+                pair = registry.get((self.model_manager.base_dir, full_model_name, 'compact'), [compact_file],
+                                    lambda: self._load_compact_artifact(compact_file))
+                if pair is not None:
+                    return pair
+            forest_dir = self._mmap_forest_dir(model_file)
+
+            def load_pair():
+                if forest_dir is not None:
+                    model = ForestArrays.load(forest_dir, backend=self.forest_backend)
+                else:
+                    model = self.model_manager.load_model(full_model_name)
+                scaler = self.model_manager.load_model(f"{full_model_name}_scaler")
+                if model is not None and scaler is not None:
+                    return model, scaler
+                return None
+
+            model_paths = [os.path.join(forest_dir, MANIFEST_NAME)] if forest_dir is not None else [model_file]
+            backend = self.forest_backend if forest_dir is not None else None
+            pair = registry.get((self.model_manager.base_dir, full_model_name, backend),
+                                model_paths + [scaler_file], load_pair)
+            if pair is not None:
+                return pair
         except:
             pass
 
         return None, None
 
+    def model_fingerprint(self, symbol: str, model_name: str) -> str:
+        """
+        Huella de los artefactos que leen load_model y load_clip_bounds (ruta, tamaño y mtime).
+
+        Cambia cuando se reentrena o se reemplaza el modelo del símbolo.
+        """
+        full_model_name = f"{symbol}_{model_name}"
+        paths = [
+            self._latest_joblib_path(symbol),
+            self._model_manager_path(full_model_name),
+            self._model_manager_path(f"{full_model_name}_scaler"),
+            self._model_manager_path(f"{full_model_name}_clip_bounds"),
+        ]
+        hasher = hashlib.blake2b(digest_size=16)
+        for path in paths:
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                hasher.update(f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}\n".encode())
+        return hasher.hexdigest()
+
+    def load_clip_bounds(self, symbol: str, model_name: str) -> Optional[Dict]:
+        """
+        Cargar los límites de winsorizing guardados con el modelo (mismo orden que load_model).
+
+        Returns:
+            Dict de compute_clip_bounds o None si el modelo no los tiene
+            (modelos antiguos: prepare_features los calcula sobre los datos)
+        """
+        registry = get_model_registry()
+        full_model_name = f"{symbol}_{model_name}"
+
+        # PRIMERO: modelo joblib de MLTrainer (límites en su _metadata.json)
+        try:
+            model_path = self._latest_joblib_path(symbol)
+            if model_path:
+                metadata_path = model_path[:-len('.joblib')] + '_metadata.json'
+
+                def load_metadata():
+                    with open(metadata_path, 'r') as f:
+                        return json.load(f)
+
+                metadata = registry.get(('metadata', metadata_path), [metadata_path], load_metadata)
+                return metadata.get('clip_bounds') if metadata else None
+        except Exception as e:
+            print(f"Error cargando límites de winsorizing: {e}")
+
+        # SEGUNDO: ModelManager centralizado
+        if full_model_name in self.clip_bounds:
+            return self.clip_bounds[full_model_name]
+        bounds_name = f"{full_model_name}_clip_bounds"
+        return registry.get((self.model_manager.base_dir, bounds_name), [self._model_manager_path(bounds_name)],
+                            lambda: self.model_manager.load_model(bounds_name))
+
+    @staticmethod
+    def _current_feature_schema() -> int:
+        """Versión de features con la que se entrenan los modelos nuevos"""
+        from indicators.feature_pipeline import FEATURE_SCHEMA_VERSION
+        return FEATURE_SCHEMA_VERSION
+
+    def _stored_feature_schema(self, full_model_name: str) -> int:
+        """Versión de features del modelo del ModelManager centralizado según el índice de artefactos (sin versión -> esquema 1)"""
+        from indicators.feature_pipeline import LEGACY_FEATURE_SCHEMA_VERSION
+
+        entry = self.model_manager.index.get(self._model_manager_path(full_model_name)) or {}
+        schema_version = entry.get('feature_schema_version')
+        return LEGACY_FEATURE_SCHEMA_VERSION if schema_version is None else schema_version
+
+    def load_feature_schema(self, symbol: str, model_name: str) -> int:
+        """
+        Versión de features con la que se entrenó el modelo (mismo orden que load_model).
+
+        Los modelos guardados antes del versionado no tienen versión y usan el
+        esquema 1 (ha_open de la vela anterior, ver indicators.feature_pipeline):
+        se siguen sirviendo con las features con las que se entrenaron.
+        """
+        from indicators.feature_pipeline import LEGACY_FEATURE_SCHEMA_VERSION
+
+        # PRIMERO: modelo joblib de MLTrainer (versión en su _metadata.json)
+        try:
+            model_path = self._latest_joblib_path(symbol)
+            if model_path:
+                metadata_path = model_path[:-len('.joblib')] + '_metadata.json'
+
+                def load_metadata():
+                    with open(metadata_path, 'r') as f:
+                        return json.load(f)
+
+                metadata = get_model_registry().get(('metadata', metadata_path), [metadata_path], load_metadata)
+                return (metadata or {}).get('feature_schema_version', LEGACY_FEATURE_SCHEMA_VERSION)
+        except Exception as e:
+            print(f"Error cargando la versión de features: {e}")
+
+        # SEGUNDO: ModelManager centralizado
+        return self._stored_feature_schema(f"{symbol}_{model_name}")
+
     def predict_signal(self, data: pd.DataFrame, symbol: str, model_name: str = 'random_forest') -> pd.Series:
         """
         Generar predicciones de señales usando modelo entrenado REAL
         NO USA SIMULACIONES - Requiere modelo entrenado con datos históricos
+
+        El resultado se cachea por (versión del artefacto del modelo, huella de los
+        datos OHLCV) en models.prediction_cache: los trials de optimización que
+        repiten el mismo histórico no vuelven a construir features ni a predecir.
         """
+        from indicators.indicator_cache import frame_fingerprint
+        from models.prediction_cache import PredictionCache, get_prediction_cache
+
         # Cargar modelo entrenado (OBLIGATORIO)
-        model, scaler = self.load_model(symbol, model_name)
+        pair = self.load_model(symbol, model_name)
+        model, scaler = pair
 
         if model is None or scaler is None:
             raise ValueError(f"MODELO {model_name} NO ENCONTRADO para {symbol}. "
                            f"Ejecutar entrenamiento primero con datos históricos reales.")
 
-        # Preparar features con datos reales
-        features = self.prepare_features(data)
+        clip_bounds = self.load_clip_bounds(symbol, model_name)
+        schema_version = self.load_feature_schema(symbol, model_name)
+
+        # Solo se cachean modelos servidos por el registro (su id cambia al reentrenar)
+        artifact_id = get_model_registry().artifact_id(pair)
+        if artifact_id is None:
+            return self._predict_signal_uncached(data, model, scaler, clip_bounds, schema_version)
+
+        cache = get_prediction_cache()
+        key = PredictionCache.make_key(
+            artifact_id,
+            frame_fingerprint(data[['open', 'high', 'low', 'close', 'volume']]),
+            {
+                'symbol': symbol,
+                'model_name': model_name,
+                'clip_bounds': clip_bounds,
+                'feature_schema_version': schema_version,
+                'indicators': self._get_feature_pipeline().indicators._indicator_params(),
+            },
+        )
+        cached = cache.get(key)
+        if cached is None:
+            confidence = self._predict_signal_uncached(data, model, scaler, clip_bounds, schema_version)
+            cached = cache.put(key, confidence.to_numpy(dtype=np.float64))
+        return pd.Series(cached.astype(np.float64), index=data.index, name='ml_confidence')
+
+    def _predict_signal_uncached(self, data: pd.DataFrame, model, scaler, clip_bounds: Optional[Dict],
+                                 schema_version: Optional[int] = None) -> pd.Series:
+        """Construir features y predecir la confianza sin pasar por la caché"""
+        # Preparar features con datos reales (winsorizing con los límites del entrenamiento)
+        features = self.prepare_features(data, clip_bounds=clip_bounds, schema_version=schema_version)
 
         # DEBUG: Imprimir número de features
         print(f"DEBUG: Features preparadas: {len(features.columns)} columnas")
@@ -407,12 +911,7 @@ class MLModelManager:
             if hasattr(model, 'n_jobs') and original_n_jobs is not None:
                 model.n_jobs = original_n_jobs
 
-        # Convertir a confianza (probabilidad de cambio alcista - probabilidad de cambio bajista)
-        confidence = proba[:, 2] - proba[:, 0] if proba.shape[1] > 2 else proba[:, 1] - 0.5
-
-        # Normalizar a [0, 1] - confianza real del modelo
-        confidence = (confidence + 1) / 2
-        confidence = np.clip(confidence, 0, 1)
+        confidence = self.confidence_from_proba(proba)
 
         # CRÍTICO: El índice debe coincidir con features.index, luego reindexar al data.index original
         confidence_series = pd.Series(confidence, index=features.index, name='ml_confidence')
@@ -422,6 +921,73 @@ class MLModelManager:
         
         return confidence_series
 
+    def latest_scaled_features(self, data: pd.DataFrame, symbol: str, model_name: str, scaler,
+                               timeframe: Optional[str] = None) -> Optional[np.ndarray]:
+        """
+        Fila de features escalada de la última vela de `data` (ver latest_features).
+
+        Returns:
+            Array [1, n_features] o None si la última vela no tiene features
+            válidas o el scaler no es válido (el llamador usa confianza neutral)
+        """
+        features = self.latest_features(data, symbol, self.load_clip_bounds(symbol, model_name), timeframe,
+                                        self.load_feature_schema(symbol, model_name))
+        if features.empty or features.index[-1] != data.index[-1]:
+            return None
+        if getattr(scaler, 'mean_', None) is None:
+            print(f"ERROR CRÍTICO: Scaler no válido para {symbol}. Devolviendo confianza neutral (0.5)")
+            return None
+        try:
+            return scaler.transform(features)
+        except Exception as e:
+            print(f"ERROR CRÍTICO: Scaler no válido para {symbol} ({e}). Devolviendo confianza neutral (0.5)")
+            return None
+
+    def predict_latest(self, data: pd.DataFrame, symbol: str, model_name: str = 'random_forest',
+                       timeframe: Optional[str] = None) -> float:
+        """
+        Confianza ML de la última vela de `data` (modo live).
+
+        Solo calcula, escala y puntúa la última fila. Con el motor incremental
+        (ver latest_features) equivale a predict_signal sobre toda la historia
+        recibida para (symbol, timeframe); en la primera llamada, a
+        predict_signal(data, ...).iloc[-1].
+
+        Returns:
+            Confianza en [0, 1] (0.5 si la última vela no tiene features válidas)
+        """
+        model, scaler = self.load_model(symbol, model_name)
+        if model is None or scaler is None:
+            raise ValueError(f"MODELO {model_name} NO ENCONTRADO para {symbol}. "
+                           f"Ejecutar entrenamiento primero con datos históricos reales.")
+
+        row = self.latest_scaled_features(data, symbol, model_name, scaler, timeframe)
+        if row is None:
+            return 0.5
+        return float(self.confidence_from_proba(self.predict_proba_serial(model, row))[0])
+
+    @staticmethod
+    def predict_proba_serial(model, X: np.ndarray) -> np.ndarray:
+        """predict_proba sin paralelización interna (n_jobs=1): para lotes pequeños el reparto en hilos solo añade latencia"""
+        original_n_jobs = getattr(model, 'n_jobs', None)
+        if original_n_jobs is not None:
+            model.n_jobs = 1
+        try:
+            return model.predict_proba(X)
+        finally:
+            if original_n_jobs is not None:
+                model.n_jobs = original_n_jobs
+
+    @staticmethod
+    def confidence_from_proba(proba: np.ndarray) -> np.ndarray:
+        """Convertir las probabilidades del modelo [n, n_clases] en confianza [0, 1]"""
+        # Convertir a confianza (probabilidad de cambio alcista - probabilidad de cambio bajista)
+        confidence = proba[:, 2] - proba[:, 0] if proba.shape[1] > 2 else proba[:, 1] - 0.5
+
+        # Normalizar a [0, 1] - confianza real del modelo
+        confidence = (confidence + 1) / 2
+        return np.clip(confidence, 0, 1)
+
     def _calculate_heikin_ashi(self, data: pd.DataFrame) -> pd.DataFrame:
         """Calcular velas Heikin Ashi usando el módulo centralizado."""
         from indicators.technical_indicators import TechnicalIndicators
@@ -470,7 +1036,8 @@ class UltraDetailedHeikinAshiMLStrategy:
                 'max_drawdown': 0.12,
                 'max_portfolio_heat': 0.18,
                 'max_concurrent_trades': 4,
-                'kelly_fraction': 0.35
+                'kelly_fraction': 0.35,
+                'backtest_engine': getattr(config.backtesting, 'backtest_engine', 'array')
             }
         else:
             # Es un diccionario
@@ -497,13 +1064,19 @@ class UltraDetailedHeikinAshiMLStrategy:
         self.max_concurrent_trades = self.config.get('max_concurrent_trades', 3)  # Más oportunidades
         self.kelly_fraction = self.config.get('kelly_fraction', 0.3)  # Más conservador
 
+        # Motor de backtesting: 'array' (kernel sobre arrays NumPy) o 'legacy' (bucle por vela)
+        self.backtest_engine = self.config.get('backtest_engine', 'array')
+
+        # Indicadores incrementales por (símbolo, timeframe) para modo live
+        self.incremental_indicators = self.config.get('incremental_indicators', False)
+
         # Estado interno
         self.active_trades = []
         self.portfolio_value = 10000.0  # Valor inicial
         self.current_drawdown = 0.0
 
-        # Inicializar gestor de modelos ML
-        self.ml_manager = MLModelManager(config=self.config)
+        # Inicializar gestor de modelos ML (config['model_dir'] o <cwd>/models)
+        self.ml_manager = MLModelManager(model_dir=self.config.get('model_dir'), config=self.config)
 
     def _load_symbol_specific_params(self, config):
         """
@@ -590,7 +1163,7 @@ class UltraDetailedHeikinAshiMLStrategy:
                 raise ValueError(f"Datos insuficientes: {len(data)} filas. Necesario mínimo 100 para ML real.")
 
             # Preparar datos con indicadores calculados correctamente
-            data_processed = self._prepare_data(data.copy())
+            data_processed = self._prepare_data(data.copy(), symbol=symbol, timeframe=timeframe)
             print(f"Datos preparados: {len(data_processed)} filas con indicadores técnicos completos")
 
             # FORZAR uso de modelos existentes durante optimización (NO re-entrenar)
@@ -640,7 +1213,33 @@ class UltraDetailedHeikinAshiMLStrategy:
             traceback.print_exc()
             return self._get_empty_results(symbol)
 
-    def _prepare_data(self, data: pd.DataFrame) -> pd.DataFrame:
+    def run_prepared(self, context, checkpoints: int = 0, on_checkpoint=None) -> Dict:
+        """
+        Ejecutar el backtest sobre un contexto ya preparado (optimizacion.trial_context.TrialContext).
+
+        Equivale a run() en modo optimización sin repetir _prepare_data, la carga del
+        modelo ni la inferencia: el contexto aporta datos, confianza ML y señales.
+
+        Args:
+            context: TrialContext construido una vez por estudio
+            checkpoints, on_checkpoint: Informes intermedios y parada anticipada
+                (ver _run_backtest_array; el motor 'legacy' los ignora)
+
+        Returns:
+            Dict con resultados de backtesting (mismo formato que run())
+        """
+        try:
+            if self.backtest_engine == 'legacy':
+                return self._run_backtest_legacy(context.data, context.signals, context.symbol,
+                                                 context.ml_confidence)
+            return self._run_backtest_array(context.data, context.signals, context.symbol,
+                                            context.ml_confidence, arrays=context.arrays,
+                                            checkpoints=checkpoints, on_checkpoint=on_checkpoint)
+        except Exception as e:
+            print(f"[ERROR] Error en backtest sobre contexto precalculado: {e}")
+            return self._get_empty_results(context.symbol)
+
+    def _prepare_data(self, data: pd.DataFrame, symbol: str = None, timeframe: str = None) -> pd.DataFrame:
         """Preparar datos con TODOS los indicadores técnicos calculados correctamente"""
 
         # VALIDAR columnas requeridas
@@ -655,7 +1254,11 @@ class UltraDetailedHeikinAshiMLStrategy:
         # Esto garantiza que _prepare_data y prepare_features usen EXACTAMENTE los mismos indicadores
         from indicators.technical_indicators import TechnicalIndicators
         indicators = TechnicalIndicators()
-        data = indicators.calculate_all_indicators_unified(data)
+        if self.incremental_indicators and symbol:
+            # Modo live: solo se procesan las velas nuevas desde la última llamada
+            data = indicators.calculate_all_indicators_incremental(data, symbol, timeframe or self.timeframe)
+        else:
+            data = indicators.calculate_all_indicators_unified(data)
         
         # ⚠️ CÓDIGO MANUAL ELIMINADO PARA EVITAR INCONSISTENCIAS ⚠️
         # El siguiente código calculaba indicadores manualmente con TA-Lib,
@@ -709,9 +1312,77 @@ class UltraDetailedHeikinAshiMLStrategy:
 
         return data
 
+    @staticmethod
+    def _compute_signal_masks(data: pd.DataFrame, ml_confidence: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Construir las máscaras booleanas LONG/SHORT en una sola pasada vectorizada.
+
+        Replica exactamente las condiciones del bucle de _generate_signals_legacy,
+        incluida la semántica de NaN (un NaN nunca cumple una comparación).
+
+        Returns:
+            Tupla (long_mask, short_mask) de arrays booleanos con len(data) elementos
+        """
+        ml_conf = np.asarray(ml_confidence, dtype=float)
+        ha_change = data['ha_color_change'].to_numpy()
+        rsi = data['rsi'].to_numpy(dtype=float)
+        stoch_k = data['stoch_k'].to_numpy(dtype=float)
+        volume_ratio = data['volume_ratio'].to_numpy(dtype=float)
+        atr = data['atr'].to_numpy(dtype=float)
+        close = data['close'].to_numpy(dtype=float)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # El bucle legacy solo descartaba con "ml_conf < 0.5": NaN no descarta
+            ml_ok = ~(ml_conf < 0.5)
+
+            ha_change_long = ha_change == 1
+            ha_change_short = ha_change == -1
+
+            rsi_ok = (rsi > 20) & (rsi < 80)
+            stoch_ok = (stoch_k > 10) & (stoch_k < 90)
+            volume_ok = volume_ratio > 0.8
+            volatility_ok = (atr / close) > 0.001
+
+        conditions_met = (
+            (ha_change_long | ha_change_short).astype(np.int8)
+            + rsi_ok + stoch_ok + volume_ok + volatility_ok
+        )
+        valid = ml_ok & (conditions_met >= 3)
+        # La primera vela nunca genera señal (el bucle empezaba en i=1)
+        valid[:1] = False
+
+        long_mask = valid & ha_change_long
+        short_mask = valid & ha_change_short & ~long_mask
+        return long_mask, short_mask
+
     def _generate_signals(self, data: pd.DataFrame, symbol: str, ml_confidence: pd.Series = None) -> pd.Series:
         """
         Generar señales con ALTA PROBABILIDAD usando ML real + filtros técnicos estrictos
+
+        Versión vectorizada: mismas señales que _generate_signals_legacy sin recorrer
+        las velas una a una.
+        """
+        # Usar ML confidence cacheado (OBLIGATORIO para señales reales)
+        if ml_confidence is None:
+            raise ValueError("ML confidence requerido - debe usar modelo entrenado real")
+
+        long_mask, short_mask = self._compute_signal_masks(data, ml_confidence)
+        signals = pd.Series(
+            np.where(long_mask, 1, np.where(short_mask, -1, 0)).astype(np.int64),
+            index=data.index,
+            name='signal'
+        )
+
+        print(f"Señales ML de ALTA PROBABILIDAD: {int(long_mask.sum())} LONG, {int(short_mask.sum())} SHORT")
+        print(f"Confianza ML promedio en señales: {ml_confidence[signals != 0].mean():.3f}")
+
+        return signals
+
+    def _generate_signals_legacy(self, data: pd.DataFrame, symbol: str, ml_confidence: pd.Series = None) -> pd.Series:
+        """
+        Implementación original vela a vela de _generate_signals.
+
+        Se conserva como referencia para los tests de paridad del motor vectorizado.
         """
         signals = pd.Series(0, index=data.index, name='signal')
 
@@ -786,7 +1457,130 @@ class UltraDetailedHeikinAshiMLStrategy:
         return liquidity_score > self.liquidity_score_min
 
     def _run_backtest(self, data: pd.DataFrame, signals: pd.Series, symbol: str, ml_confidence_all: pd.Series) -> Dict:
-        """Ejecutar backtesting con GESTIÓN DE RIESGO REAL basada en ATR y volatilidad"""
+        """
+        Ejecutar backtesting con GESTIÓN DE RIESGO REAL basada en ATR y volatilidad
+
+        Usa el motor indicado en self.backtest_engine ('array' por defecto, 'legacy'
+        para el bucle original). Ambos producen los mismos trades y métricas.
+        """
+        if self.backtest_engine == 'legacy':
+            return self._run_backtest_legacy(data, signals, symbol, ml_confidence_all)
+        return self._run_backtest_array(data, signals, symbol, ml_confidence_all)
+
+    def _run_backtest_array(self, data: pd.DataFrame, signals: pd.Series, symbol: str, ml_confidence_all: pd.Series,
+                            arrays: Optional[Dict[str, np.ndarray]] = None, checkpoints: int = 0,
+                            on_checkpoint=None) -> Dict:
+        """
+        Backtesting sobre arrays NumPy pre-extraídos (ver backtesting.trade_kernel)
+
+        `arrays` (close, atr, volume_ratio, signals, ml_confidence) evita volver a
+        extraerlos de `data` cuando ya están precalculados (TrialContext).
+
+        Con `on_checkpoint` el kernel informa de equity, drawdown y trades en
+        `checkpoints` puntos del histórico (ver trade_kernel.checkpoint_report); si el
+        callback devuelve True el backtest se aborta y se devuelven resultados vacíos.
+        Los resultados incluyen entonces 'pruned' y 'checkpoints'.
+        """
+        from backtesting.trade_kernel import liquidity_mask, run_array_backtest
+
+        if arrays is None:
+            arrays = {
+                'close': data['close'].to_numpy(dtype=float),
+                'atr': data['atr'].to_numpy(dtype=float),
+                'volume_ratio': data['volume_ratio'].to_numpy(dtype=float),
+                'signals': signals.to_numpy(),
+                'ml_confidence': np.asarray(ml_confidence_all, dtype=float),
+            }
+        close = arrays['close']
+        atr = arrays['atr']
+        liquidity_ok = liquidity_mask(arrays['volume_ratio'], atr, close, self.liquidity_score_min)
+
+        # Mientras no hay posición, los trades abiertos en self.active_trades son siempre los
+        # heredados de ejecuciones anteriores: el límite de concurrencia es constante en la corrida
+        open_trades = sum(1 for t in self.active_trades if t['status'] == 'open')
+
+        result = run_array_backtest(
+            close, atr, arrays['signals'], arrays['ml_confidence'], liquidity_ok,
+            initial_capital=self.portfolio_value,
+            ml_threshold=self.ml_threshold,
+            kelly_fraction=self.kelly_fraction,
+            max_drawdown_limit=self.max_drawdown,
+            entries_blocked=open_trades >= self.max_concurrent_trades,
+            checkpoints=checkpoints,
+            on_checkpoint=on_checkpoint
+        )
+
+        if result['pruned']:
+            # Trial abortado: no merece la pena reconstruir los trades
+            results = self._get_empty_results(symbol)
+        else:
+            trades = self._replay_trade_records(result['trades'], result['n_closed'], data.index, symbol)
+            results = self._compile_backtest_results(trades, result['capital'], result['max_drawdown'], symbol)
+        if on_checkpoint is not None:
+            results['pruned'] = result['pruned']
+            results['checkpoints'] = result['checkpoints']
+        return results
+
+    def _replay_trade_records(self, records: np.ndarray, n_closed: int, index: pd.Index, symbol: str) -> List[Dict]:
+        """
+        Convertir los trades tipados del kernel a diccionarios y actualizar self.active_trades
+        exactamente como lo hace el bucle legacy (cierre sobre el primer trade abierto).
+        """
+        from backtesting.trade_kernel import EXIT_REASONS
+
+        trades = []
+        first_close_pending = not any(t['status'] == 'closed' for t in self.active_trades)
+        # Los trades solo pasan de 'open' a 'closed' y los nuevos se añaden al final, así que
+        # el primer trade abierto avanza de forma monótona: un cursor evita re-escanear la lista
+        open_cursor = 0
+        # Fechas de entrada/salida en una sola consulta al índice (indexar vela a vela es lento)
+        entry_times = index.take(records['entry_idx']).tolist()
+        exit_times = index.take(np.maximum(records['exit_idx'], 0)).tolist()
+
+        for k, record in enumerate(records):
+            trade = {
+                'entry_time': entry_times[k],
+                'entry_price': record['entry_price'],
+                'position_size': record['position_size'],
+                'direction': 'long' if record['signal'] > 0 else 'short',
+                'stop_loss': record['stop_loss'],
+                'take_profit': record['take_profit'],
+                'status': 'open',
+                'symbol': symbol,
+                'ml_confidence': record['ml_confidence'],
+                'atr_at_entry': record['atr_at_entry']
+            }
+            self.active_trades.append(trade)
+
+            if k >= n_closed:
+                break  # Posición abierta al final de los datos
+
+            exit_time = exit_times[k]
+            exit_reason = EXIT_REASONS[int(record['exit_reason'])]
+            if first_close_pending:
+                first_close_pending = False
+                print(f"Primer trade cerrado:")
+                print(f"   Entry: {record['entry_price']:.6f} @ {trade['entry_time']}")
+                print(f"   Exit: {record['exit_price']:.6f} @ {exit_time}")
+                print(f"   Position: {record['signal'] * record['position_size']:.2f}")
+                print(f"   P&L: ${record['pnl']:.2f} ({exit_reason})")
+
+            while self.active_trades[open_cursor]['status'] != 'open':
+                open_cursor += 1
+            open_trade = self.active_trades[open_cursor]
+            open_trade.update({
+                'exit_time': exit_time,
+                'exit_price': record['exit_price'],
+                'pnl': record['pnl'],
+                'status': 'closed',
+                'exit_reason': exit_reason
+            })
+            trades.append(open_trade.copy())
+
+        return trades
+
+    def _run_backtest_legacy(self, data: pd.DataFrame, signals: pd.Series, symbol: str, ml_confidence_all: pd.Series) -> Dict:
+        """Bucle original vela a vela de _run_backtest (referencia para el motor 'array')"""
 
         capital = self.portfolio_value
         trades = []
@@ -986,7 +1780,10 @@ class UltraDetailedHeikinAshiMLStrategy:
                 if current_drawdown > self.max_drawdown:
                     break  # Stop trading
 
-        # Calcular métricas finales
+        return self._compile_backtest_results(trades, capital, max_drawdown, symbol)
+
+    def _compile_backtest_results(self, trades: List[Dict], capital: float, max_drawdown: float, symbol: str) -> Dict:
+        """Calcular las métricas finales del backtest a partir de los trades cerrados"""
         total_trades = len([t for t in trades if t.get('exit_time')])
         winning_trades = len([t for t in trades if t.get('pnl', 0) > 0])
         losing_trades = total_trades - winning_trades
@@ -1033,7 +1830,7 @@ class UltraDetailedHeikinAshiMLStrategy:
             print(f"[SAFE MODE] Ejecutando estrategia sin ML para {symbol}")
 
             # Preparar datos con indicadores (sin ML)
-            data_processed = self._prepare_data(data.copy())
+            data_processed = self._prepare_data(data.copy(), symbol=symbol, timeframe=timeframe)
             print(f"[SAFE MODE] Datos preparados: {len(data_processed)} filas")
 
             # Generar señales usando SOLO indicadores técnicos (sin ML)
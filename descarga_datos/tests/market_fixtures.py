@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Datos de mercado compartidos por los tests de paridad de los motores rápidos.
+
+Usa los datos almacenados en SQLite (data/data.db) cuando existen para los
+símbolos configurados; si no, genera un OHLCV sintético determinista por símbolo
+para que los tests puedan ejecutarse en cualquier máquina.
+
+TrainedModelTestCase da a los tests que necesitan un modelo ML entrenado un
+directorio de modelos temporal con un modelo de TEST_MODEL_SYMBOL, y
+TrialContextTestCase un TrialContext de SOL/USDT con confianza ML sintética.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+import zlib
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Agregar descarga_datos al path para importar módulos del sistema
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+
+STORED_SYMBOLS = ['BNB/USDT', 'BTC/USDT', 'SOL/USDT']
+DEFAULT_TIMEFRAME = '1h'
+DB_PATH = ROOT_DIR / 'data' / 'data.db'
+# Símbolo de los modelos entrenados por los tests (no colisiona con los modelos reales)
+TEST_MODEL_SYMBOL = 'TESTUSDT'
+
+
+def synthetic_ohlcv(symbol: str, n_bars: int = 1500) -> pd.DataFrame:
+    """Generar OHLCV sintético reproducible (random walk log-normal) para un símbolo."""
+    seed = zlib.crc32(symbol.encode())
+    rng = np.random.default_rng(seed)
+
+    returns = rng.normal(0, 0.01, n_bars)
+    close = 100.0 * np.exp(np.cumsum(returns))
+    open_ = np.empty(n_bars)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    spread = np.abs(rng.normal(0, 0.006, n_bars)) * close
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+    volume = rng.lognormal(10, 0.5, n_bars)
+
+    index = pd.date_range('2024-01-01', periods=n_bars, freq='h', name='timestamp')
+    return pd.DataFrame({
+        'open': open_,
+        'high': high,
+        'low': low,
+        'close': close,
+        'volume': volume
+    }, index=index)
+
+
+def load_market_data(symbol: str, timeframe: str = DEFAULT_TIMEFRAME, n_bars: int = 1500) -> pd.DataFrame:
+    """Cargar datos almacenados del símbolo o, si no existen, datos sintéticos."""
+    if DB_PATH.exists():
+        try:
+            from utils.storage import DataStorage
+            storage = DataStorage(db_path=str(DB_PATH))
+            table_name = f"{symbol.replace('/', '_')}_{timeframe}"
+            df = storage.query_data(table_name)
+            if df is not None and len(df) >= 300:
+                if 'timestamp' in df.columns:
+                    df = df.set_index(pd.to_datetime(df['timestamp'], unit='s'))
+                return df[['open', 'high', 'low', 'close', 'volume']].astype(float).tail(n_bars)
+        except Exception:
+            pass
+    return synthetic_ohlcv(symbol, n_bars)
+
+
+def synthetic_ml_confidence(index: pd.Index, seed: int = 7) -> pd.Series:
+    """Confianza ML sintética en [0, 1] con algunos NaN para ejercitar los bordes."""
+    rng = np.random.default_rng(seed)
+    values = rng.uniform(0.0, 1.0, len(index))
+    values[rng.integers(0, len(index), max(1, len(index) // 100))] = np.nan
+    return pd.Series(values, index=index, name='ml_confidence')
+
+
+@lru_cache(maxsize=None)
+def _prepared_test_data(n_bars: int):
+    from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+
+    data = synthetic_ohlcv('BTC/USDT', n_bars)
+    return data, UltraDetailedHeikinAshiMLStrategy({})._prepare_data(data.copy())
+
+
+def prepared_test_data(n_bars: int = 1200):
+    """OHLCV sintético y su versión preparada por la estrategia (copias de una caché por n_bars)."""
+    data, prepared = _prepared_test_data(n_bars)
+    return data.copy(), prepared.copy()
+
+
+def train_test_model(model_dir, prepared: pd.DataFrame) -> None:
+    """Entrenar el modelo random_forest de TEST_MODEL_SYMBOL en `model_dir`."""
+    from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+    MLModelManager(model_dir=str(model_dir), config={}).train_models(prepared, TEST_MODEL_SYMBOL, enable_cv=False)
+
+
+class TrainedModelTestCase(unittest.TestCase):
+    """
+    Base de los tests que necesitan un modelo ML entrenado.
+
+    Una vez por clase: cls.data (OHLCV sintético de N_BARS velas), cls.prepared
+    (datos preparados) y cls.model_dir (directorio temporal con el modelo de
+    TEST_MODEL_SYMBOL). cls.strategy_config apunta la estrategia a ese directorio.
+    """
+
+    N_BARS = 1200
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.data, cls.prepared = prepared_test_data(cls.N_BARS)
+        cls._model_tmp = tempfile.TemporaryDirectory()
+        cls.model_dir = cls._model_tmp.name
+        cls.strategy_config = {'model_dir': cls.model_dir}
+        train_test_model(cls.model_dir, cls.prepared)
+
+    @classmethod
+    def tearDownClass(cls):
+        from models.model_registry import get_model_registry
+
+        get_model_registry().clear()
+        cls._model_tmp.cleanup()
+        super().tearDownClass()
+
+
+class TrialContextTestCase(unittest.TestCase):
+    """
+    Base de los tests que simulan trials sin modelo ML.
+
+    Una vez por clase: cls.context (TrialContext de SOL/USDT con señales generadas
+    a partir de una confianza ML sintética con semilla CONFIDENCE_SEED) y
+    cls.config (configuración del sistema).
+    """
+
+    CONFIDENCE_SEED = 7
+
+    @classmethod
+    def setUpClass(cls):
+        from config.config_loader import load_config_from_yaml
+        from optimizacion.trial_context import TrialContext
+        from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+
+        super().setUpClass()
+        strategy = UltraDetailedHeikinAshiMLStrategy({})
+        data = strategy._prepare_data(load_market_data('SOL/USDT'))
+        ml_confidence = synthetic_ml_confidence(data.index, seed=cls.CONFIDENCE_SEED).fillna(0.5)
+        signals = strategy._generate_signals(data, 'SOL/USDT', ml_confidence)
+        cls.context = TrialContext(data, 'SOL/USDT', '1h', ml_confidence, signals)
+        cls.config = load_config_from_yaml()
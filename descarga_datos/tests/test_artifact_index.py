@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests del índice de artefactos de modelos
+=========================================
+
+El "latest" de cada (símbolo, tipo de modelo) es el último registrado, no el
+último en orden lexicográfico, y las escrituras concurrentes no pierden entradas.
+"""
+
+import os
+import tempfile
+import threading
+import unittest
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from market_fixtures import synthetic_ohlcv
+from models.artifact_index import ArtifactIndex, feature_schema_hash
+from models.model_manager import ModelManager
+from models.model_registry import get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class ArtifactIndexTest(unittest.TestCase):
+    """Manifest de artefactos con "latest" explícito."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(get_model_registry().clear)
+        self.index = ArtifactIndex(self.tmp.name)
+
+    def _artifact(self, name):
+        path = os.path.join(self.tmp.name, 'BTC_USDT', name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'model')
+        return path
+
+    def test_latest_is_last_recorded(self):
+        newer_name = self._artifact('RandomForest_20250101.joblib')
+        older_name = self._artifact('RandomForest_20240101.joblib')
+        self.index.record(newer_name, 'BTC/USDT', 'RandomForest', features=['a', 'b'], metrics={'val_auc': 0.6})
+        self.index.record(older_name, 'BTC/USDT', 'RandomForest', features=['a', 'b'])
+
+        self.assertEqual(self.index.latest('BTC_USDT', 'RandomForest'), older_name)
+        entry = self.index.get(newer_name)
+        self.assertEqual(entry['feature_schema_hash'], feature_schema_hash(['a', 'b']))
+        self.assertEqual(entry['metrics'], {'val_auc': 0.6})
+        self.assertEqual(entry['size'], 5)
+
+        self.index.remove(older_name)
+        self.assertIsNone(self.index.latest('BTC/USDT', 'RandomForest'))
+        self.assertEqual([e['path'] for e in self.index.entries(symbol='BTC/USDT')],
+                         ['BTC_USDT/RandomForest_20250101.joblib'])
+
+    def test_concurrent_records_are_kept(self):
+        paths = [self._artifact(f'model_{i}.pkl') for i in range(16)]
+        threads = [threading.Thread(target=self.index.record, args=(path,)) for path in paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(ArtifactIndex(self.tmp.name).entries()), 16)
+
+    def test_model_manager_indexes_saved_models(self):
+        data = synthetic_ohlcv('BTC/USDT', n_bars=400)
+        manager = MLModelManager(model_dir=self.tmp.name, config={})
+        features = manager.prepare_features(data)
+        scaler = StandardScaler().fit(features)
+        model = RandomForestClassifier(n_estimators=4, max_depth=3, random_state=0).fit(
+            scaler.transform(features), np.random.default_rng(0).choice([0, 1], size=len(features)))
+        manager.save_model('TESTUSDT', 'random_forest', model, scaler, metrics={'auc': 0.5})
+
+        self.assertEqual(manager.model_manager.list_models(),
+                         ['TESTUSDT_random_forest', 'TESTUSDT_random_forest_scaler'])
+        latest = self.index.latest('TESTUSDT', 'random_forest')
+        self.assertEqual(latest, manager._model_manager_path('TESTUSDT_random_forest'))
+        entry = self.index.get(latest)
+        self.assertEqual(entry['feature_schema_hash'], feature_schema_hash(features.columns))
+        self.assertEqual(entry['metrics'], {'auc': 0.5})
+
+    def test_list_models_keeps_unindexed_models(self):
+        manager = ModelManager(base_dir=self.tmp.name)
+        with open(os.path.join(self.tmp.name, 'legacy_model.pkl'), 'wb') as f:
+            f.write(b'model')
+        self.assertEqual(manager.list_models(), ['legacy_model'])
+
+        # Crear el índice no oculta los modelos que ya estaban en el directorio
+        manager.save_model({'weights': [1, 2]}, 'new_model')
+        self.assertEqual(manager.list_models(), ['legacy_model', 'new_model'])
+        manager.delete_model('new_model')
+        self.assertEqual(manager.list_models(), ['legacy_model'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests de paridad del kernel de backtesting basado en arrays
+============================================================
+
+Verifica que el motor 'array' de UltraDetailedHeikinAshiMLStrategy._run_backtest
+devuelve exactamente los mismos trades y métricas que el bucle 'legacy'.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_fixtures import STORED_SYMBOLS, load_market_data, synthetic_ml_confidence
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+
+
+def _strategy(engine, **overrides):
+    config = {'symbol': 'BNB/USDT', 'timeframe': '1h', 'backtest_engine': engine, 'max_drawdown': 0.5}
+    config.update(overrides)
+    return UltraDetailedHeikinAshiMLStrategy(config=config)
+
+
+class BacktestKernelParityTest(unittest.TestCase):
+    """El kernel de arrays reproduce los resultados del bucle original."""
+
+    def _inputs(self, symbol, seed):
+        strategy = _strategy('legacy')
+        data = strategy._prepare_data(load_market_data(symbol))
+        ml_confidence = synthetic_ml_confidence(data.index, seed=seed).fillna(0.5)
+        signals = strategy._generate_signals(data, symbol, ml_confidence)
+        return data, signals, ml_confidence
+
+    def _assert_same_results(self, expected, actual):
+        self.assertEqual(set(expected.keys()), set(actual.keys()))
+        for key in expected:
+            if key != 'trades':
+                self.assertEqual(expected[key], actual[key], msg=key)
+        self.assertEqual(len(expected['trades']), len(actual['trades']))
+        for legacy_trade, array_trade in zip(expected['trades'], actual['trades']):
+            self.assertEqual(legacy_trade, array_trade)
+
+    def test_array_engine_matches_legacy(self):
+        for seed, symbol in enumerate(STORED_SYMBOLS):
+            with self.subTest(symbol=symbol):
+                data, signals, ml_confidence = self._inputs(symbol, seed)
+
+                expected = _strategy('legacy')._run_backtest(data, signals, symbol, ml_confidence)
+                actual = _strategy('array')._run_backtest(data, signals, symbol, ml_confidence)
+
+                self.assertGreater(expected['total_trades'], 0)
+                self._assert_same_results(expected, actual)
+
+    def test_drawdown_stop_and_open_position(self):
+        data, signals, ml_confidence = self._inputs('SOL/USDT', 3)
+        for max_drawdown in (0.0001, 0.5):
+            with self.subTest(max_drawdown=max_drawdown):
+                legacy = _strategy('legacy', max_drawdown=max_drawdown)
+                array = _strategy('array', max_drawdown=max_drawdown)
+
+                self._assert_same_results(
+                    legacy._run_backtest(data, signals, 'SOL/USDT', ml_confidence),
+                    array._run_backtest(data, signals, 'SOL/USDT', ml_confidence)
+                )
+                self.assertEqual(legacy.active_trades, array.active_trades)
+
+    def test_repeated_runs_share_active_trades_state(self):
+        data, signals, ml_confidence = self._inputs('BTC/USDT', 5)
+        # Forzar que la primera corrida termine con una posición abierta
+        signals = signals.copy()
+        signals.iloc[-3] = 1
+        legacy = _strategy('legacy', max_concurrent_trades=2)
+        array = _strategy('array', max_concurrent_trades=2)
+
+        for _ in range(3):
+            self._assert_same_results(
+                legacy._run_backtest(data, signals, 'BTC/USDT', ml_confidence),
+                array._run_backtest(data, signals, 'BTC/USDT', ml_confidence)
+            )
+            self.assertEqual(legacy.active_trades, array.active_trades)
+
+    def test_default_engine_is_array(self):
+        self.assertEqual(UltraDetailedHeikinAshiMLStrategy(config={}).backtest_engine, 'array')
+
+
+if __name__ == '__main__':
+    unittest.main()
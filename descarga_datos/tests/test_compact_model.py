@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Tests del modelo compacto cuantizado
+====================================
+
+Los umbrales float32 redondeados hacia abajo deben llevar a las mismas hojas que
+sklearn, las probabilidades deben coincidir salvo el redondeo a float32 y el
+fichero compacto debe cargarse en un proceso sin importar sklearn.
+"""
+
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from models.compact_model import CompactModel, CompactScaler, compact_path, float32_floor
+from models.model_registry import get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class CompactModelTest(unittest.TestCase):
+    """Paridad con sklearn y carga sin sklearn."""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(11)
+        cls.X = pd.DataFrame(rng.normal(size=(3000, 22)), columns=[f'f{i}' for i in range(22)])
+        cls.X_test = pd.DataFrame(rng.normal(size=(700, 22)) * 1.5, columns=cls.X.columns)
+        cls.scaler = StandardScaler().fit(cls.X)
+        cls.forest = RandomForestClassifier(
+            n_estimators=60, max_depth=12, min_samples_leaf=5, random_state=42, n_jobs=1
+        ).fit(cls.scaler.transform(cls.X), rng.choice([-1, 0, 1], size=3000))
+
+    def test_matches_sklearn(self):
+        compact = CompactModel.from_forest(self.forest, self.scaler)
+        self.assertEqual(compact.arrays['threshold'].dtype, np.float32)
+        self.assertEqual(compact.arrays['left'].dtype, np.int16)
+
+        X_scaled = compact.scaler.transform(self.X_test)
+        np.testing.assert_array_equal(X_scaled, self.scaler.transform(self.X_test))
+        leaves = np.stack([tree.apply(X_scaled.astype(np.float32)) for tree in self.forest.estimators_])
+        np.testing.assert_array_equal(compact.apply(X_scaled), leaves)
+        np.testing.assert_allclose(compact.predict_proba(X_scaled), self.forest.predict_proba(X_scaled), atol=1e-6)
+
+        with self.assertRaises(ValueError):
+            compact.scaler.transform(self.X_test[self.X_test.columns[::-1]])
+
+    def test_float32_floor(self):
+        values = np.array([0.1, -0.1, 1.0, 1e-40, 3.0000001])
+        rounded = float32_floor(values)
+        self.assertTrue(np.all(rounded.astype(np.float64) <= values))
+        self.assertTrue(np.all(np.nextafter(rounded, np.float32(np.inf)).astype(np.float64) > values))
+
+    def test_manager_loads_compact_without_sklearn(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(get_model_registry().clear)
+            MLModelManager(model_dir=tmp, config={}).save_model('TESTUSDT', 'random_forest', self.forest, self.scaler)
+            path = compact_path(os.path.join(tmp, 'TESTUSDT_random_forest.pkl'))
+            self.assertTrue(path.exists())
+
+            manager = MLModelManager(model_dir=tmp, config={'ml_training': {'compact_models': True}})
+            model, scaler = manager.load_model('TESTUSDT', 'random_forest')
+            self.assertIsInstance(model, CompactModel)
+            self.assertIsInstance(scaler, CompactScaler)
+
+            script = ("import sys; from models.compact_model import CompactModel; "
+                      f"m = CompactModel.load({str(path)!r}); "
+                      "import numpy as np; m.predict_proba(np.zeros((1, m.n_features_in_))); "
+                      "print('sklearn' in sys.modules)")
+            output = subprocess.run([sys.executable, '-c', script], cwd=ROOT_DIR, capture_output=True,
+                                    text=True, check=True).stdout
+            self.assertEqual(output.strip(), 'False')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Tests del pipeline de features ML compartido
+============================================
+
+MLModelManager.prepare_features (basado en FeaturePipeline) debe reproducir
+exactamente la implementación original (salvo Heikin Ashi, recursivo desde el
+esquema de features 2; el esquema 1 la reproduce entera), y
+MLTrainer debe ver las mismas features base que la inferencia. Los límites de winsorizing calculados al
+entrenar se guardan con el modelo y se aplican tal cual en inferencia.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_fixtures import STORED_SYMBOLS, load_market_data
+from indicators.feature_pipeline import (BOLLINGER_COLUMNS, FEATURE_COLUMNS, FEATURE_SCHEMA_VERSION,
+                                        LEGACY_FEATURE_SCHEMA_VERSION, FeaturePipeline, compute_clip_bounds)
+from models.model_registry import get_model_registry
+from optimizacion.ml_trainer import MLTrainer
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+HA_COLUMNS = ['ha_close', 'ha_open', 'ha_high', 'ha_low']
+
+
+class FeaturePipelineTest(unittest.TestCase):
+    """Paridad del FeaturePipeline con el cálculo original de features."""
+
+    def test_manager_matches_legacy_features(self):
+        manager = MLModelManager(config={})
+        for symbol in STORED_SYMBOLS:
+            with self.subTest(symbol=symbol):
+                data = load_market_data(symbol, n_bars=1200)
+                expected = manager._prepare_features_legacy(data)
+                actual = manager.prepare_features(data)
+                # El cálculo original aproximaba ha_open; el resto de features no cambia
+                pd.testing.assert_index_equal(actual.index, expected.index)
+                pd.testing.assert_frame_equal(actual.drop(columns=HA_COLUMNS), expected.drop(columns=HA_COLUMNS),
+                                              check_exact=True)
+
+    def test_trainer_shares_base_features(self):
+        data = load_market_data('BTC/USDT', n_bars=800)
+        trainer_features = MLTrainer('BTC/USDT').prepare_features(data)
+        inference_matrix = FeaturePipeline(include_bollinger=True).transform(data)
+
+        self.assertEqual(list(trainer_features.columns), FEATURE_COLUMNS)
+        pd.testing.assert_frame_equal(trainer_features, inference_matrix.to_frame()[FEATURE_COLUMNS])
+
+    def test_trainer_fits_on_winsorized_features(self):
+        features = MLTrainer('BTC/USDT').prepare_features(load_market_data('BTC/USDT', n_bars=800)).fillna(0)
+        X_train, X_val = features.iloc[:600], features.iloc[600:]
+        clipped_train, clipped_val, bounds = MLTrainer('BTC/USDT').winsorize_split(X_train, X_val)
+
+        # Mismos límites que la inferencia aplicará con el modelo guardado
+        for X, clipped in ((X_train, clipped_train), (X_val, clipped_val)):
+            expected = np.clip(X.to_numpy(), bounds['lower'], bounds['upper'])
+            np.testing.assert_array_equal(clipped.to_numpy(), expected)
+            self.assertTrue(clipped.index.equals(X.index))
+        self.assertEqual(bounds, compute_clip_bounds(X_train.to_numpy(), list(X_train.columns)))
+
+    def test_matrix_layout(self):
+        data = load_market_data('SOL/USDT', n_bars=300)
+        matrix = FeaturePipeline(dtype=np.float32).transform(data)
+
+        self.assertEqual(matrix.values.shape, (len(data), len(FEATURE_COLUMNS) + len(BOLLINGER_COLUMNS)))
+        self.assertEqual(matrix.values.dtype, np.float32)
+        self.assertTrue(matrix.values.flags['C_CONTIGUOUS'])
+        self.assertTrue(matrix.index.equals(data.index))
+        # Las primeras 49 velas no tienen ventana completa para price_position
+        self.assertEqual(int((~matrix.complete_rows(FEATURE_COLUMNS)).sum()), 49)
+
+    def test_legacy_schema_matches_legacy_features(self):
+        manager = MLModelManager(config={})
+        data = load_market_data('SOL/USDT', n_bars=1200)
+        pd.testing.assert_frame_equal(manager.prepare_features(data, schema_version=LEGACY_FEATURE_SCHEMA_VERSION),
+                                      manager._prepare_features_legacy(data), check_exact=True)
+        with self.assertRaises(ValueError):
+            FeaturePipeline(schema_version=FEATURE_SCHEMA_VERSION + 1)
+
+    def test_models_are_served_with_their_schema(self):
+        with tempfile.TemporaryDirectory() as model_dir:
+            self.addCleanup(get_model_registry().clear)
+            manager = MLModelManager(model_dir=model_dir, config={})
+            manager.save_model('TESTUSDT', 'random_forest', {'trees': []}, {'scaler': None})
+            self.assertEqual(manager.load_feature_schema('TESTUSDT', 'random_forest'), FEATURE_SCHEMA_VERSION)
+            self.assertIsNotNone(manager.load_model('TESTUSDT', 'random_forest')[0])
+
+            # Modelos anteriores al versionado: esquema 1
+            model_file = manager._model_manager_path('TESTUSDT_random_forest')
+            manager.model_manager.index.record(model_file, symbol='TESTUSDT', model_type='random_forest')
+            self.assertEqual(manager.load_feature_schema('TESTUSDT', 'random_forest'), LEGACY_FEATURE_SCHEMA_VERSION)
+
+            # Una versión desconocida no se sirve con features de otra versión
+            manager.model_manager.index.record(model_file, symbol='TESTUSDT', model_type='random_forest',
+                                               feature_schema_version=FEATURE_SCHEMA_VERSION + 1)
+            self.assertEqual(manager.load_model('TESTUSDT', 'random_forest'), (None, None))
+
+    def test_tail_rows_match_full_matrix(self):
+        data = load_market_data('BNB/USDT', n_bars=100)
+        pipeline = FeaturePipeline()
+        full = pipeline.transform(data)
+        for tail in (1, 3, 500):
+            with self.subTest(tail=tail):
+                matrix = pipeline.transform(data, tail=tail)
+                np.testing.assert_array_equal(matrix.values, full.values[-tail:])
+                self.assertTrue(matrix.index.equals(data.index[-tail:]))
+
+    def test_clip_bounds_match_pandas_quantiles(self):
+        features = MLModelManager(config={})._prepare_feature_matrix(load_market_data('ETH/USDT', n_bars=900)).to_frame()
+        bounds = compute_clip_bounds(features.to_numpy(), list(features.columns))
+
+        self.assertEqual(bounds['columns'], list(features.columns))
+        self.assertEqual(bounds['lower'], [features[col].quantile(0.01) for col in features.columns])
+        self.assertEqual(bounds['upper'], [features[col].quantile(0.99) for col in features.columns])
+
+    def test_stored_bounds_are_applied_at_inference(self):
+        data = load_market_data('BTC/USDT', n_bars=1500)
+        with tempfile.TemporaryDirectory() as model_dir:
+            manager = MLModelManager(model_dir=model_dir, config={})
+            training = manager._prepare_feature_matrix(data.iloc[:1000])
+            bounds = compute_clip_bounds(training.values, training.columns)
+            manager.save_model('TESTUSDT', 'random_forest', object(), object(), bounds)
+
+            # Un gestor nuevo lee los límites del disco
+            loaded = MLModelManager(model_dir=model_dir, config={}).load_clip_bounds('TESTUSDT', 'random_forest')
+            self.assertEqual(loaded, bounds)
+
+        window = data.iloc[1000:]
+        raw = manager._prepare_feature_matrix(window).to_frame()
+        clipped = manager.prepare_features(window, clip_bounds=loaded)
+        expected = raw.clip(pd.Series(bounds['lower'], index=raw.columns),
+                            pd.Series(bounds['upper'], index=raw.columns), axis=1)
+        pd.testing.assert_frame_equal(clipped, expected)
+        # Sin límites guardados se conserva el cálculo sobre la propia ventana
+        pd.testing.assert_frame_equal(manager.prepare_features(window).drop(columns=HA_COLUMNS),
+                                      manager._prepare_features_legacy(window).drop(columns=HA_COLUMNS))
+
+
+if __name__ == '__main__':
+    unittest.main()
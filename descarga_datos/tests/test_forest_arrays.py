@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Tests del formato ForestArrays (bosque en arrays mapeados en memoria)
+=====================================================================
+
+La conversión del RandomForest a arrays planos debe dar exactamente las mismas
+probabilidades que sklearn con los dos backends de inferencia (kernel compilado
+y NumPy), y el artefacto guardado debe abrirse mapeado en memoria (np.memmap)
+desde MLModelManager.load_model. Cada save() publica una versión completa a
+través del manifest.
+"""
+
+import json
+import tempfile
+import unittest
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from models import forest_arrays
+from models.forest_arrays import ForestArrays, forest_path
+from models.model_registry import get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class ForestArraysTest(unittest.TestCase):
+    """Paridad con sklearn y carga mapeada en memoria."""
+
+    @classmethod
+    def setUpClass(cls):
+        rng = np.random.default_rng(7)
+        cls.X = rng.normal(size=(3000, 22))
+        cls.X_test = rng.normal(size=(700, 22)) * 1.5
+        cls.forest = RandomForestClassifier(
+            n_estimators=60, max_depth=12, min_samples_split=10, min_samples_leaf=5,
+            max_features='sqrt', random_state=42, n_jobs=1
+        ).fit(cls.X, rng.choice([-1, 0, 1], size=3000))
+
+    def test_probabilities_match_sklearn(self):
+        arrays = ForestArrays.from_sklearn(self.forest)
+        np.testing.assert_array_equal(arrays.predict_proba(self.X_test), self.forest.predict_proba(self.X_test))
+        np.testing.assert_array_equal(arrays.predict_proba(self.X_test, batch_size=64),
+                                      self.forest.predict_proba(self.X_test))
+        np.testing.assert_array_equal(arrays.predict(self.X_test), self.forest.predict(self.X_test))
+
+        binary = RandomForestClassifier(n_estimators=15, random_state=0).fit(
+            self.X[:, :4], (self.X[:, 0] > 0).astype(float))
+        np.testing.assert_array_equal(ForestArrays.from_sklearn(binary).predict_proba(self.X_test[:, :4]),
+                                      binary.predict_proba(self.X_test[:, :4]))
+        self.assertFalse(ForestArrays.supports(StandardScaler()))
+
+    def test_backends_match_sklearn(self):
+        expected = self.forest.predict_proba(self.X_test)
+        for backend in ('jit', 'numpy'):
+            with self.subTest(backend=backend):
+                arrays = ForestArrays.from_sklearn(self.forest, backend=backend)
+                np.testing.assert_array_equal(arrays.predict_proba(self.X_test), expected)
+                np.testing.assert_array_equal(arrays.predict_proba(self.X_test[:1]), expected[:1])
+
+        # Sin Numba, 'auto' (y 'jit') recurren al recorrido NumPy
+        original = forest_arrays._forest_proba_loop_jit
+        forest_arrays._forest_proba_loop_jit = None
+        try:
+            self.assertEqual(ForestArrays.from_sklearn(self.forest).backend, 'numpy')
+            self.assertEqual(ForestArrays.from_sklearn(self.forest, backend='jit').backend, 'numpy')
+        finally:
+            forest_arrays._forest_proba_loop_jit = original
+        with self.assertRaises(ValueError):
+            ForestArrays.from_sklearn(self.forest, backend='gpu')
+
+    def test_save_and_load_memory_mapped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = ForestArrays.from_sklearn(self.forest).save(forest_path(f"{tmp}/model.joblib"))
+            self.assertEqual(path.name, 'model.forest')
+
+            loaded = ForestArrays.load(path)
+            self.assertIsInstance(loaded.arrays['threshold'], np.memmap)
+            np.testing.assert_array_equal(loaded.predict_proba(self.X_test), self.forest.predict_proba(self.X_test))
+
+            # Reescribir el artefacto no invalida los arrays ya mapeados
+            ForestArrays.from_sklearn(self.forest).save(path)
+            np.testing.assert_array_equal(loaded.predict_proba(self.X_test[:5]), self.forest.predict_proba(self.X_test[:5]))
+
+    def test_save_publishes_new_version_through_manifest(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = forest_path(f"{tmp}/model.joblib")
+            versions = []
+            for _ in range(3):
+                ForestArrays.from_sklearn(self.forest).save(path)
+                versions.append(ForestArrays._arrays_dir_name(path))
+                # El manifest publicado siempre señala una versión completa
+                np.testing.assert_array_equal(ForestArrays.load(path).predict_proba(self.X_test[:5]),
+                                              self.forest.predict_proba(self.X_test[:5]))
+
+            # Se conservan la versión publicada y la anterior
+            self.assertEqual(sorted(entry.name for entry in path.iterdir()),
+                             sorted(['manifest.json'] + versions[1:]))
+
+    def test_loads_unversioned_directory(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = ForestArrays.from_sklearn(self.forest).save(forest_path(f"{tmp}/model.joblib"))
+            # Formato anterior: arrays junto al manifest, sin arrays_dir
+            version = path / ForestArrays._arrays_dir_name(path)
+            for array_file in version.iterdir():
+                array_file.rename(path / array_file.name)
+            version.rmdir()
+            manifest = json.loads((path / 'manifest.json').read_text())
+            del manifest['arrays_dir']
+            (path / 'manifest.json').write_text(json.dumps(manifest))
+
+            np.testing.assert_array_equal(ForestArrays.load(path).predict_proba(self.X_test),
+                                          self.forest.predict_proba(self.X_test))
+            ForestArrays.from_sklearn(self.forest).save(path)
+            self.assertTrue((path / 'left.npy').exists())
+            ForestArrays.from_sklearn(self.forest).save(path)
+            self.assertFalse((path / 'left.npy').exists())
+
+    def test_manager_loads_forest_arrays(self):
+        scaler = StandardScaler().fit(self.X)
+        with tempfile.TemporaryDirectory() as tmp:
+            MLModelManager(model_dir=tmp, config={}).save_model('TESTUSDT', 'random_forest', self.forest, scaler)
+
+            model, loaded_scaler = MLModelManager(model_dir=tmp, config={}).load_model('TESTUSDT', 'random_forest')
+            self.assertIsInstance(model, ForestArrays)
+            self.assertIsInstance(model.arrays['left'], np.memmap)
+            np.testing.assert_array_equal(loaded_scaler.mean_, scaler.mean_)
+
+            numpy_backend = MLModelManager(model_dir=tmp, config={'ml_training': {'forest_backend': 'numpy'}})
+            self.assertEqual(numpy_backend.load_model('TESTUSDT', 'random_forest')[0].backend, 'numpy')
+
+            disabled = MLModelManager(model_dir=tmp, config={'ml_training': {'mmap_models': False}})
+            self.assertIsInstance(disabled.load_model('TESTUSDT', 'random_forest')[0], RandomForestClassifier)
+        get_model_registry().clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Tests del kernel Heikin Ashi recursivo
+======================================
+
+heikin_ashi_arrays debe reproducir la definición recursiva de ha_open vela a
+vela, con y sin Numba (también con NaN), y todos los caminos (calculate_heikin_ashi, unified,
+incremental y FeaturePipeline) deben usar los mismos valores.
+"""
+
+import unittest
+
+import numpy as np
+
+from market_fixtures import load_market_data
+from indicators import heikin_ashi
+from indicators.feature_pipeline import FeaturePipeline
+from indicators.heikin_ashi import heikin_ashi_arrays
+from indicators.incremental_indicators import IncrementalIndicatorEngine
+from indicators.technical_indicators import TechnicalIndicators
+
+
+class HeikinAshiKernelTest(unittest.TestCase):
+    """Paridad del kernel con la definición recursiva."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_market_data('ETH/USDT', n_bars=600)
+        cls.ha = heikin_ashi_arrays(cls.data['open'], cls.data['high'], cls.data['low'], cls.data['close'])
+
+    def test_matches_recursive_definition(self):
+        open_, high, low, close = (self.data[col].tolist() for col in ('open', 'high', 'low', 'close'))
+        ha_open = (open_[0] + close[0]) / 2
+        previous = None
+        for i in range(len(open_)):
+            ha_close = (open_[i] + high[i] + low[i] + close[i]) / 4
+            if previous is not None:
+                ha_open = (previous[0] + previous[1]) / 2
+            self.assertEqual(self.ha['ha_open'][i], ha_open)
+            self.assertEqual(self.ha['ha_high'][i], max(high[i], ha_open, ha_close))
+            self.assertEqual(self.ha['ha_low'][i], min(low[i], ha_open, ha_close))
+            self.assertEqual(self.ha['ha_trend'][i], 1 if ha_close > ha_open else -1)
+            change = 0
+            if previous is not None and ha_close > ha_open and previous[1] <= previous[0]:
+                change = 1
+            elif previous is not None and ha_close < ha_open and previous[1] >= previous[0]:
+                change = -1
+            self.assertEqual(self.ha['ha_color_change'][i], change)
+            previous = (ha_open, ha_close)
+
+    def test_fallback_without_jit_is_identical(self):
+        compiled = heikin_ashi._ha_open_loop_jit
+        heikin_ashi._ha_open_loop_jit = None
+        try:
+            fallback = heikin_ashi_arrays(self.data['open'], self.data['high'], self.data['low'], self.data['close'])
+        finally:
+            heikin_ashi._ha_open_loop_jit = compiled
+        for column, values in self.ha.items():
+            np.testing.assert_array_equal(fallback[column], values)
+
+        empty = heikin_ashi_arrays(np.empty(0), np.empty(0), np.empty(0), np.empty(0))
+        self.assertEqual(len(empty['ha_open']), 0)
+
+    def test_nan_policy_is_shared(self):
+        open_, high, low, close = (self.data[col].to_numpy().copy() for col in ('open', 'high', 'low', 'close'))
+        for array in (open_, high, low, close):
+            array[[0, 50, 51, 300]] = np.nan
+        ha_close = (open_ + high + low + close) / 4
+
+        expected, prev_open, prev_close = [], np.nan, np.nan
+        for i in range(len(close)):
+            prev_open = heikin_ashi.next_ha_open(prev_open, prev_close, open_[i], close[i])
+            prev_close = ha_close[i]
+            expected.append(prev_open)
+        # Las velas con NaN no interrumpen la serie: se conserva el último ha_open
+        self.assertEqual(expected[52], expected[51])
+        self.assertFalse(np.isnan(expected[1:]).any())
+
+        compiled = heikin_ashi._ha_open_loop_jit
+        for jit in (compiled, None):
+            heikin_ashi._ha_open_loop_jit = jit
+            try:
+                np.testing.assert_array_equal(heikin_ashi.recursive_ha_open(open_, close, ha_close), expected)
+            finally:
+                heikin_ashi._ha_open_loop_jit = compiled
+
+    def test_previous_candle_schema(self):
+        ha = heikin_ashi_arrays(self.data['open'], self.data['high'], self.data['low'], self.data['close'],
+                                recursive=False)
+        expected = ((self.data['open'].shift(1) + self.data['close'].shift(1)) / 2).to_numpy()
+        np.testing.assert_array_equal(ha['ha_open'], expected)
+
+    def test_all_paths_share_kernel(self):
+        indicators = TechnicalIndicators(use_cache=False)
+        unified = indicators.calculate_all_indicators_unified(self.data)
+        legacy_path = indicators.calculate_heikin_ashi(self.data)
+        matrix = FeaturePipeline(include_bollinger=False).transform(self.data).to_frame()
+        engine = IncrementalIndicatorEngine()
+        engine.update('ETH/USDT', '1h', self.data.iloc[:300])
+        incremental = engine.update('ETH/USDT', '1h', self.data.iloc[200:])
+
+        for column in ('ha_close', 'ha_open', 'ha_high', 'ha_low'):
+            with self.subTest(column=column):
+                np.testing.assert_array_equal(unified[column].to_numpy(), self.ha[column])
+                np.testing.assert_array_equal(legacy_path[column].to_numpy(), self.ha[column])
+                np.testing.assert_array_equal(matrix[column].to_numpy(), self.ha[column])
+                np.testing.assert_array_equal(incremental[column].to_numpy(), self.ha[column][200:])
+        np.testing.assert_array_equal(unified['ha_color_change'].to_numpy(), self.ha['ha_color_change'])
+        np.testing.assert_array_equal(legacy_path['ha_trend'].to_numpy(), self.ha['ha_trend'])
+
+
+if __name__ == '__main__':
+    unittest.main()
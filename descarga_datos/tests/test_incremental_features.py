@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Tests del motor incremental de features
+=======================================
+
+Alimentando las velas en streaming (ventanas solapadas, vela en formación que se
+actualiza) el motor debe reproducir FeaturePipeline.transform sobre la misma
+historia completa.
+"""
+
+import unittest
+
+import numpy as np
+
+from market_fixtures import load_market_data
+from indicators.feature_pipeline import FeaturePipeline
+from indicators.incremental_features import INCREMENTAL_FEATURES_AVAILABLE, IncrementalFeatureEngine
+
+
+@unittest.skipUnless(INCREMENTAL_FEATURES_AVAILABLE, "TA-Lib no disponible")
+class IncrementalFeatureTest(unittest.TestCase):
+    """Paridad entre las features incrementales y las del pipeline batch."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_market_data('SOL/USDT', n_bars=800)
+        cls.pipeline = FeaturePipeline({}, include_bollinger=True)
+        cls.batch = cls.pipeline.transform(cls.data)
+
+    def _assert_matches_batch(self, result, batch):
+        self.assertEqual(result.columns, batch.columns)
+        self.assertTrue(result.index.equals(batch.index))
+        for position, column in enumerate(batch.columns):
+            with self.subTest(column=column):
+                np.testing.assert_allclose(result.values[:, position], batch.values[:, position],
+                                           rtol=1e-9, atol=1e-12, equal_nan=True)
+
+    def test_full_history_matches_batch(self):
+        engine = IncrementalFeatureEngine(self.pipeline)
+        result = engine.transform('SOL/USDT', '1h', self.data, tail=len(self.data))
+        self._assert_matches_batch(result, self.batch)
+
+    def test_streaming_windows_match_batch(self):
+        engine = IncrementalFeatureEngine(self.pipeline)
+        engine.transform('SOL/USDT', '1h', self.data.iloc[:300])
+        for end in range(301, len(self.data) + 1):
+            result = engine.transform('SOL/USDT', '1h', self.data.iloc[max(0, end - 100):end], tail=3)
+
+        self._assert_matches_batch(result, self.batch.take(np.arange(len(self.data) - 3, len(self.data))))
+
+    def test_legacy_schema_streaming_matches_batch(self):
+        pipeline = FeaturePipeline({}, include_bollinger=True, schema_version=1)
+        engine = IncrementalFeatureEngine(pipeline)
+        engine.transform('SOL/USDT', '1h', self.data.iloc[:500])
+        result = engine.transform('SOL/USDT', '1h', self.data.iloc[400:], tail=len(self.data) - 500)
+
+        self._assert_matches_batch(result, pipeline.transform(self.data, tail=len(self.data) - 500))
+
+    def test_forming_candle_is_recomputed(self):
+        engine = IncrementalFeatureEngine(self.pipeline)
+        forming = self.data.iloc[:500].copy()
+        forming.iloc[-1, forming.columns.get_loc('close')] *= 1.05
+        forming.iloc[-1, forming.columns.get_loc('high')] *= 1.05
+
+        engine.transform('SOL/USDT', '1h', forming)
+        result = engine.transform('SOL/USDT', '1h', self.data.iloc[400:500])
+
+        self._assert_matches_batch(result, self.pipeline.transform(self.data.iloc[:500], tail=1))
+
+    def test_non_overlapping_window_rebuilds_state(self):
+        engine = IncrementalFeatureEngine(self.pipeline)
+        engine.transform('SOL/USDT', '1h', self.data.iloc[:200])
+        window = self.data.iloc[500:700]
+        result = engine.transform('SOL/USDT', '1h', window, tail=len(window))
+
+        self._assert_matches_batch(result, self.pipeline.transform(window))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests del motor incremental de indicadores
+==========================================
+
+Alimentando las velas en streaming (ventanas solapadas, vela en formación que se
+actualiza) el motor debe reproducir calculate_all_indicators_unified sobre la
+misma historia completa.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_fixtures import load_market_data
+from indicators.incremental_indicators import INDICATOR_COLUMNS, IncrementalIndicatorEngine
+from indicators.technical_indicators import TechnicalIndicators
+
+
+class IncrementalIndicatorTest(unittest.TestCase):
+    """Paridad entre el cálculo incremental y el batch."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_market_data('SOL/USDT', n_bars=800)
+        cls.batch = TechnicalIndicators(use_cache=False).calculate_all_indicators_unified(cls.data)
+
+    def _assert_matches_batch(self, result, batch):
+        self.assertEqual(list(result.columns), list(batch.columns))
+        for column in INDICATOR_COLUMNS:
+            with self.subTest(column=column):
+                self.assertEqual(result[column].dtype, batch[column].dtype)
+                np.testing.assert_allclose(result[column].to_numpy(float), batch[column].to_numpy(float),
+                                           rtol=1e-9, atol=1e-12, equal_nan=True)
+
+    def test_cci_keeps_original_formula(self):
+        # Los umbrales de CCI se ajustaron con la MAD como media móvil de |tp - sma_tp|
+        tp = (self.data['high'] + self.data['low'] + self.data['close']) / 3
+        sma_tp = tp.rolling(window=20).mean()
+        mad = (tp - tp.rolling(window=20).mean()).abs().rolling(window=20).mean()
+        pd.testing.assert_series_equal(self.batch['cci'], (tp - sma_tp) / (0.015 * mad), check_names=False)
+
+    def test_streaming_windows_match_batch(self):
+        engine = IncrementalIndicatorEngine()
+        engine.update('SOL/USDT', '1h', self.data.iloc[:300])
+        for end in range(301, len(self.data) + 1):
+            result = engine.update('SOL/USDT', '1h', self.data.iloc[max(0, end - 100):end])
+
+        self._assert_matches_batch(result, self.batch.iloc[-100:])
+
+    def test_forming_candle_is_recomputed(self):
+        engine = IncrementalIndicatorEngine()
+        forming = self.data.iloc[:500].copy()
+        forming.iloc[-1, forming.columns.get_loc('close')] *= 1.05
+        forming.iloc[-1, forming.columns.get_loc('high')] *= 1.05
+
+        engine.update('SOL/USDT', '1h', forming)
+        result = engine.update('SOL/USDT', '1h', self.data.iloc[400:500])
+
+        self._assert_matches_batch(result, self.batch.iloc[400:500])
+
+    def test_non_overlapping_window_rebuilds_state(self):
+        engine = IncrementalIndicatorEngine()
+        engine.update('SOL/USDT', '1h', self.data.iloc[:200])
+        window = self.data.iloc[500:700]
+        result = engine.update('SOL/USDT', '1h', window)
+
+        expected = TechnicalIndicators(use_cache=False).calculate_all_indicators_unified(window)
+        self._assert_matches_batch(result, expected)
+
+    def test_update_bar_matches_batch_row(self):
+        engine = IncrementalIndicatorEngine()
+        for timestamp, bar in self.data.iloc[:250].iterrows():
+            row = engine.update_bar('SOL/USDT', '1h', timestamp, bar['open'], bar['high'],
+                                    bar['low'], bar['close'], bar['volume'])
+        expected = self.batch.iloc[249]
+        for column in INDICATOR_COLUMNS:
+            self.assertAlmostEqual(row[column], expected[column], delta=1e-9 * max(1.0, abs(expected[column])))
+
+        with self.assertRaises(ValueError):
+            engine.update_bar('SOL/USDT', '1h', self.data.index[10], 1.0, 1.0, 1.0, 1.0, 1.0)
+
+    def test_technical_indicators_falls_back_without_time_index(self):
+        data = self.data.iloc[:300].reset_index(drop=True)
+        result = TechnicalIndicators(use_cache=False).calculate_all_indicators_incremental(data, 'SOL/USDT', '1h')
+        expected = TechnicalIndicators(use_cache=False).calculate_all_indicators_unified(data)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Tests del reentrenamiento incremental
+=====================================
+
+MLModelManager.retrain_incremental solo debe reentrenar cuando hay suficientes
+velas nuevas desde el último artefacto: warm_start añade árboles entrenados con
+esas velas y 'window' entrena un bosque nuevo sobre la ventana deslizante.
+"""
+
+import tempfile
+import unittest
+
+from market_fixtures import TEST_MODEL_SYMBOL, prepared_test_data
+from models.model_registry import get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class IncrementalRetrainingTest(unittest.TestCase):
+    """Reentrenamiento disparado por el número de velas nuevas."""
+
+    @classmethod
+    def setUpClass(cls):
+        _, cls.data = prepared_test_data(1700)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(get_model_registry().clear)
+        config = {'ml_training': {'training': {'incremental': {'min_new_bars': 24, 'window_bars': 800}}}}
+        self.manager = MLModelManager(model_dir=self.tmp.name, config=config)
+
+    def test_warm_start_adds_trees_on_new_bars(self):
+        # Sin modelo previo: entrenamiento completo
+        self.assertEqual(self.manager.retrain_incremental(self.data.iloc[:1500], TEST_MODEL_SYMBOL)['mode'], 'full')
+
+        # Menos velas nuevas que min_new_bars: no se reentrena
+        self.assertIsNone(self.manager.retrain_incremental(self.data.iloc[:1510], TEST_MODEL_SYMBOL))
+        self.assertEqual(self.manager.new_bars_since_training(self.data.iloc[:1510], TEST_MODEL_SYMBOL), 11)
+
+        result = self.manager.retrain_incremental(self.data.iloc[:1600], TEST_MODEL_SYMBOL)
+        self.assertEqual(result, {'mode': 'warm_start', 'new_bars': 101, 'n_estimators': 220})
+        model = self.manager.model_manager.load_model(f'{TEST_MODEL_SYMBOL}_random_forest')
+        self.assertEqual(len(model.estimators_), 220)
+        self.assertFalse(model.warm_start)
+        self.assertEqual(self.manager.new_bars_since_training(self.data.iloc[:1600], TEST_MODEL_SYMBOL), 1)
+
+    def test_window_refits_on_recent_bars(self):
+        self.manager.train_models(self.data.iloc[:1500], TEST_MODEL_SYMBOL, enable_cv=False)
+        result = self.manager.retrain_incremental(self.data, TEST_MODEL_SYMBOL, mode='window')
+        self.assertEqual(result['mode'], 'window')
+        self.assertEqual(result['n_estimators'], 200)
+
+        state = self.manager.model_manager.load_model(f'{TEST_MODEL_SYMBOL}_random_forest_training_state')
+        self.assertEqual(state['last_bar'], self.data.index[-2])
+        self.assertLessEqual(state['n_bars'], 800)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests del banco de indicadores por rejilla de parámetros
+========================================================
+
+Cada fila del banco debe coincidir con el indicador calculado individualmente,
+y el banco en memoria compartida debe poder reabrirse sin copiar los datos.
+"""
+
+import unittest
+
+import numpy as np
+
+from market_fixtures import load_market_data
+from indicators.indicator_bank import IndicatorBank
+from indicators.technical_indicators import TechnicalIndicators
+
+
+class IndicatorBankTest(unittest.TestCase):
+    """Paridad del banco con los cálculos individuales de TechnicalIndicators."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_market_data('BNB/USDT', n_bars=700)
+        cls.indicators = TechnicalIndicators(use_cache=False)
+        cls.bank = cls.indicators.build_indicator_bank(
+            cls.data, atr_periods=[7, 14, 21], ema_periods=[15, 20, 50, 120],
+            sar_params=[(0.02, 0.2), (0.05, 0.3), (0.3, 0.1)]
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.bank.close()
+
+    def test_rows_match_individual_indicators(self):
+        unified = self.indicators.calculate_all_indicators_unified(self.data)
+        np.testing.assert_allclose(self.bank.atr(14), unified['atr'].to_numpy(), rtol=1e-12, equal_nan=True)
+        np.testing.assert_array_equal(self.bank.ema(20), unified['ema_20'].to_numpy())
+        np.testing.assert_array_equal(self.bank.ema(50), unified['ema_50'].to_numpy())
+        np.testing.assert_array_equal(self.bank.sar(0.02, 0.2), unified['sar'].to_numpy())
+
+        self.assertTrue(np.isnan(self.bank.atr(7)[:6]).all())
+        self.assertEqual(self.bank.matrices['atr'].shape, (3, len(self.data)))
+
+        for acceleration, maximum in [(0.05, 0.3), (0.3, 0.1)]:
+            self.indicators.sar_acceleration, self.indicators.sar_maximum = acceleration, maximum
+            try:
+                expected = self.indicators.calculate_sar(self.data).to_numpy()
+            finally:
+                self.indicators.sar_acceleration, self.indicators.sar_maximum = 0.02, 0.2
+            np.testing.assert_array_equal(self.bank.sar(acceleration, maximum), expected)
+
+    def test_select_and_missing_values(self):
+        selected = self.bank.select(21, 120, 0.05, 0.3)
+        self.assertTrue(np.shares_memory(selected['atr'], self.bank.matrices['atr']))
+        with self.assertRaises(KeyError):
+            self.bank.atr(8)
+        with self.assertRaises(KeyError):
+            self.bank.sar(0.04, 0.3)
+
+    def test_attach_shared_memory(self):
+        attached = IndicatorBank.attach(self.bank.spec())
+        try:
+            np.testing.assert_array_equal(attached.ema(120), self.bank.ema(120))
+            np.testing.assert_array_equal(attached.sar(0.3, 0.1), self.bank.sar(0.3, 0.1))
+        finally:
+            attached.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
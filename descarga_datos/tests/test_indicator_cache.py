@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests de la caché de indicadores técnicos
+=========================================
+
+Verifica que TechnicalIndicators devuelve resultados idénticos con y sin caché,
+que la clave depende del contenido OHLCV y de los parámetros, y que el nivel de
+disco se reutiliza entre instancias de caché.
+"""
+
+import tempfile
+import unittest
+
+import pandas as pd
+
+from market_fixtures import load_market_data
+from indicators.indicator_cache import IndicatorCache, frame_fingerprint
+from indicators.technical_indicators import TechnicalIndicators
+
+
+class IndicatorCacheTest(unittest.TestCase):
+    """Memoización de calculate_all_indicators_unified / calculate_all_indicators."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = load_market_data('BTC/USDT', n_bars=600)
+
+    def test_cached_result_matches_uncached(self):
+        cache = IndicatorCache()
+        cached = TechnicalIndicators(cache=cache)
+        uncached = TechnicalIndicators(use_cache=False)
+
+        expected = uncached.calculate_all_indicators_unified(self.data)
+        first = cached.calculate_all_indicators_unified(self.data)
+        second = cached.calculate_all_indicators_unified(self.data)
+
+        pd.testing.assert_frame_equal(first, expected)
+        pd.testing.assert_frame_equal(second, expected)
+        self.assertEqual(cache.stats['misses'], 1)
+        self.assertEqual(cache.stats['memory_hits'], 1)
+
+    def test_caller_mutation_does_not_corrupt_cache(self):
+        indicators = TechnicalIndicators(cache=IndicatorCache())
+        result = indicators.calculate_all_indicators_unified(self.data)
+        result['rsi'] = -1.0
+
+        again = indicators.calculate_all_indicators_unified(self.data)
+        self.assertFalse((again['rsi'] == -1.0).any())
+
+    def test_key_depends_on_content_and_params(self):
+        cache = IndicatorCache()
+        changed = self.data.copy()
+        changed.iloc[-1, changed.columns.get_loc('close')] += 1.0
+
+        base_key = cache.make_key('unified', self.data, {'sar_acceleration': 0.02})
+        self.assertEqual(base_key, cache.make_key('unified', self.data.copy(), {'sar_acceleration': 0.02}))
+        self.assertNotEqual(base_key, cache.make_key('unified', changed, {'sar_acceleration': 0.02}))
+        self.assertNotEqual(base_key, cache.make_key('unified', self.data, {'sar_acceleration': 0.03}))
+        self.assertNotEqual(base_key, cache.make_key('all', self.data, {'sar_acceleration': 0.02}))
+        self.assertNotEqual(frame_fingerprint(self.data), frame_fingerprint(self.data.iloc[:-1]))
+
+    def test_disk_tier_survives_new_cache(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            first = TechnicalIndicators(cache=IndicatorCache(disk_dir=tmp_dir))
+            expected = first.calculate_all_indicators_unified(self.data)
+
+            fresh_cache = IndicatorCache(disk_dir=tmp_dir)
+            result = TechnicalIndicators(cache=fresh_cache).calculate_all_indicators_unified(self.data)
+
+            pd.testing.assert_frame_equal(result, expected)
+            self.assertEqual(fresh_cache.stats['disk_hits'], 1)
+
+    def test_lru_eviction(self):
+        cache = IndicatorCache(max_entries=2)
+        for i in range(3):
+            cache.put(f'key{i}', self.data.iloc[:10])
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('key0'))
+        self.assertEqual(cache.stats['evictions'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
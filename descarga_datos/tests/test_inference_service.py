@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests del servicio de inferencia por lotes
+==========================================
+
+La confianza de la última vela de cada símbolo debe coincidir con la de
+predict_signal, con una sola llamada a predict_proba por artefacto de modelo.
+MLModelManager.predict_latest solo puntúa la última vela y, en streaming,
+coincide con predict_signal sobre toda la historia recibida.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from core.ccxt_live_trading_orchestrator import CCXTLiveTradingOrchestrator
+from indicators.feature_pipeline import compute_clip_bounds
+from market_fixtures import synthetic_ohlcv
+from models.inference_service import BatchInferenceService
+from models.model_registry import get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class BatchInferenceServiceTest(unittest.TestCase):
+    """Confianzas por símbolo a partir de un lote por modelo."""
+
+    def test_predict_latest_matches_full_window(self):
+        data = synthetic_ohlcv('SOL/USDT', n_bars=400)
+        self.addCleanup(get_model_registry().clear)
+        features = MLModelManager(config={}).prepare_features(data.iloc[:300])
+        scaler = StandardScaler().fit(features)
+        model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=0).fit(
+            scaler.transform(features), np.random.default_rng(0).choice([-1, 0, 1], size=len(features)))
+        bounds = compute_clip_bounds(features.to_numpy(), list(features.columns))
+
+        # Con límites guardados (solo se ensambla la última fila) y sin ellos (ventana completa)
+        for clip_bounds in (bounds, None):
+            with tempfile.TemporaryDirectory() as tmp:
+                manager = MLModelManager(model_dir=tmp, config={})
+                manager.save_model('TESTUSDT', 'random_forest', model, scaler, clip_bounds)
+                for end in (150, 400):
+                    window = data.iloc[end - 100:end]
+                    with self.subTest(bounds=clip_bounds is not None, end=end):
+                        self.assertEqual(manager.predict_latest(window, 'TESTUSDT'),
+                                         manager.predict_signal(window, 'TESTUSDT').iloc[-1])
+
+    def test_predict_latest_streaming_matches_full_history(self):
+        data = synthetic_ohlcv('SOL/USDT', n_bars=400)
+        self.addCleanup(get_model_registry().clear)
+        features = MLModelManager(config={}).prepare_features(data.iloc[:300])
+        scaler = StandardScaler().fit(features)
+        model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=0).fit(
+            scaler.transform(features), np.random.default_rng(0).choice([-1, 0, 1], size=len(features)))
+        bounds = compute_clip_bounds(features.to_numpy(), list(features.columns))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            manager = MLModelManager(model_dir=tmp, config={})
+            manager.save_model('TESTUSDT', 'random_forest', model, scaler, bounds)
+            # Ventanas de 100 velas como en live: el motor incremental conserva toda la historia
+            for end in range(100, 400):
+                confidence = manager.predict_latest(data.iloc[end - 100:end], 'TESTUSDT', timeframe='1h')
+                if end % 60 == 0:
+                    with self.subTest(end=end):
+                        expected = manager.predict_signal(data.iloc[:end], 'TESTUSDT').iloc[-1]
+                        self.assertAlmostEqual(confidence, expected, places=12)
+
+    def test_matches_predict_signal(self):
+        frames = {
+            'AAAUSDT': synthetic_ohlcv('BTC/USDT', n_bars=400),
+            'BBBUSDT': synthetic_ohlcv('ETH/USDT', n_bars=400),
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(get_model_registry().clear)
+            manager = MLModelManager(model_dir=tmp, config={})
+            for seed, (symbol, data) in enumerate(frames.items()):
+                features = manager.prepare_features(data)
+                scaler = StandardScaler().fit(features)
+                model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=seed).fit(
+                    scaler.transform(features), np.random.default_rng(seed).choice([-1, 0, 1], size=len(features)))
+                manager.save_model(symbol, 'random_forest', model, scaler)
+
+            service = BatchInferenceService(manager)
+            confidences = service.predict_latest(dict(frames, MISSINGUSDT=frames['AAAUSDT']))
+
+            self.assertEqual(sorted(confidences), ['AAAUSDT', 'BBBUSDT'])
+            for symbol, data in frames.items():
+                expected = manager.predict_signal(data, symbol).iloc[-1]
+                self.assertAlmostEqual(confidences[symbol], expected, places=12)
+            self.assertEqual(service.stats['predict_calls'], 2)
+
+    def test_orchestrator_records_confidences_without_trading(self):
+        data = synthetic_ohlcv('SOL/USDT', n_bars=400)
+        with tempfile.TemporaryDirectory() as tmp:
+            self.addCleanup(get_model_registry().clear)
+            manager = MLModelManager(model_dir=tmp, config={})
+            features = manager.prepare_features(data)
+            scaler = StandardScaler().fit(features)
+            model = RandomForestClassifier(n_estimators=8, max_depth=4, random_state=0).fit(
+                scaler.transform(features), np.random.default_rng(0).choice([-1, 0, 1], size=len(features)))
+            manager.save_model('TESTUSDT', 'random_forest', model, scaler)
+
+            strategy = mock.Mock(spec=['run'], **{'run.return_value': {'total_trades': 0}})
+            orchestrator = object.__new__(CCXTLiveTradingOrchestrator)
+            orchestrator.backtesting_config = {'symbols': ['TESTUSDT']}
+            orchestrator.data_provider = mock.Mock(**{'get_market_status.return_value': True,
+                                                      'get_historical_data.return_value': data.iloc[-100:]})
+            orchestrator.strategy_classes = {'ultra': ('unused', 'Unused')}
+            orchestrator.strategy_instances = {'ultra': strategy}
+            orchestrator.inference_service = BatchInferenceService(manager)
+            orchestrator.ml_confidences = {}
+
+            with mock.patch.object(CCXTLiveTradingOrchestrator, '_handle_strategy_signal') as handle:
+                orchestrator._process_trading_signals()
+
+            # Las estrategias se siguen ejecutando con run(); la confianza solo se registra
+            strategy.run.assert_called_once()
+            handle.assert_called_once_with('ultra', 'TESTUSDT', {'total_trades': 0})
+            self.assertEqual(sorted(orchestrator.ml_confidences), ['TESTUSDT'])
+
+
+if __name__ == '__main__':
+    unittest.main()
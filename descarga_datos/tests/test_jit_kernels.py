@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Tests de paridad de los kernels compilados con Numba
+====================================================
+
+Los kernels JIT (SAR y simulación de trades) deben producir exactamente los
+mismos resultados que sus versiones en Python puro.
+"""
+
+import unittest
+
+import numpy as np
+
+import market_fixtures  # noqa: F401  (añade descarga_datos al sys.path)
+from utils.jit import NUMBA_AVAILABLE
+from indicators import technical_indicators
+from utils import talib_wrapper
+from backtesting import trade_kernel
+from utils.benchmark_kernels import _synthetic_inputs
+
+
+@unittest.skipUnless(NUMBA_AVAILABLE, "Numba no está instalado")
+class JitKernelParityTest(unittest.TestCase):
+    """Python puro y Numba devuelven resultados idénticos."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.high, cls.low, cls.close, cls.atr, cls.signals, cls.ml_confidence, cls.liquidity_ok = \
+            _synthetic_inputs(5000, seed=3)
+        cls.high[100:110] = np.nan
+        cls.low[500] = np.nan
+
+    def test_parabolic_sar(self):
+        expected = technical_indicators._parabolic_sar_loop(self.high, self.low, 0.02, 0.2)
+        actual = technical_indicators._parabolic_sar_loop_jit(self.high, self.low, 0.02, 0.2)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_talib_wrapper_sar(self):
+        expected = talib_wrapper._sar_loop(self.high, self.low, 0.02)
+        actual = talib_wrapper._sar_loop_jit(self.high, self.low, 0.02)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_simulate_trades(self):
+        atr = self.atr.copy()
+        atr[50:60] = np.nan
+        capacity = int(np.count_nonzero(self.signals)) + 1
+        expected_out = np.zeros(capacity, dtype=trade_kernel.TRADE_DTYPE)
+        actual_out = np.zeros(capacity, dtype=trade_kernel.TRADE_DTYPE)
+        args = (10000.0, 0.5, 0.25, 0.5)
+
+        expected = trade_kernel.simulate_trades(
+            self.close.tolist(), atr.tolist(), self.signals.tolist(), self.ml_confidence.tolist(),
+            self.liquidity_ok.tolist(), expected_out, *args
+        )
+        actual = trade_kernel.simulate_trades_jit(
+            self.close, atr, self.signals, self.ml_confidence, self.liquidity_ok, actual_out, *args
+        )
+
+        self.assertEqual(expected, actual)
+        self.assertGreater(expected[0], 0)
+        np.testing.assert_array_equal(actual_out, expected_out)
+
+    def test_empty_input_keeps_fallback_behaviour(self):
+        indicators = technical_indicators.TechnicalIndicators()
+        self.assertEqual(len(indicators._calculate_parabolic_sar(np.array([]), np.array([]))), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Tests del registro de modelos en memoria
+========================================
+
+Cada artefacto debe leerse de disco una sola vez y recargarse cuando su
+fichero cambia; MLModelManager.load_model debe servir el modelo desde el registro.
+"""
+
+import os
+import pickle
+import tempfile
+import unittest
+
+from models.model_registry import ModelRegistry, get_model_registry
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class ModelRegistryTest(unittest.TestCase):
+    """Caché de artefactos invalidada por mtime."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, 'model.pkl')
+        self._write({'version': 1})
+
+    def _write(self, payload):
+        with open(self.path, 'wb') as f:
+            pickle.dump(payload, f)
+
+    def _load(self):
+        self.loads += 1
+        with open(self.path, 'rb') as f:
+            return pickle.load(f)
+
+    def test_loads_once_and_reloads_on_change(self):
+        registry = ModelRegistry()
+        self.loads = 0
+
+        first = registry.get('model', [self.path], self._load)
+        self.assertIs(registry.get('model', [self.path], self._load), first)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(registry.stats['hits'], 1)
+
+        self._write({'version': 2})
+        stat = os.stat(self.path)
+        os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(registry.get('model', [self.path], self._load), {'version': 2})
+        self.assertEqual(registry.stats['reloads'], 1)
+
+        os.remove(self.path)
+        self.assertIsNone(registry.get('model', [self.path], self._load))
+        self.assertEqual(len(registry), 0)
+
+    def test_directory_listing_is_refreshed(self):
+        registry = ModelRegistry()
+        self.assertEqual(registry.list_dir(self.tmp.name), ['model.pkl'])
+        self.assertEqual(registry.list_dir(os.path.join(self.tmp.name, 'missing')), [])
+
+        with open(os.path.join(self.tmp.name, 'RandomForest_1.joblib'), 'wb'):
+            pass
+        stat = os.stat(self.tmp.name)
+        os.utime(self.tmp.name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(registry.list_dir(self.tmp.name), ['RandomForest_1.joblib', 'model.pkl'])
+
+    def test_manager_serves_models_from_registry(self):
+        manager = MLModelManager(model_dir=self.tmp.name, config={})
+        manager.save_model('TESTUSDT', 'random_forest', {'trees': 1}, {'scaler': 1})
+
+        model, scaler = manager.load_model('TESTUSDT', 'random_forest')
+        again, _ = MLModelManager(model_dir=self.tmp.name, config={}).load_model('TESTUSDT', 'random_forest')
+        self.assertEqual(model, {'trees': 1})
+        self.assertIs(again, model)
+
+        manager.save_model('TESTUSDT', 'random_forest', {'trees': 2}, {'scaler': 2})
+        self.assertEqual(manager.load_model('TESTUSDT', 'random_forest')[0], {'trees': 2})
+        self.assertEqual(manager.load_model('MISSINGUSDT', 'random_forest'), (None, None))
+        get_model_registry().clear()
+
+
+if __name__ == '__main__':
+    unittest.main()
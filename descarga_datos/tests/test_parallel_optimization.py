@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Tests del modo paralelo de StrategyOptimizer
+============================================
+
+Los workers deben repartirse los trials sobre un único estudio Optuna guardado
+en un JournalFileStorage local, y cada trial debe valer lo mismo que la
+función objetivo evaluada en el proceso principal.
+"""
+
+import tempfile
+import unittest
+
+import optuna
+
+from config.config_loader import load_config_from_yaml
+from market_fixtures import TEST_MODEL_SYMBOL, TrainedModelTestCase
+from optimizacion.strategy_optimizer import StrategyOptimizer, journal_storage
+
+
+class ParallelOptimizationTest(TrainedModelTestCase):
+    """Estudio compartido entre procesos."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.config = load_config_from_yaml()
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.results_dir = tmp.name
+
+    def _optimizer(self, **kwargs):
+        optimizer = StrategyOptimizer(symbol=TEST_MODEL_SYMBOL, timeframe='4h', study_name='parallel_test',
+                                      config=self.config, model_dir=self.model_dir,
+                                      results_dir=self.results_dir, **kwargs)
+        optimizer.data = self.data
+        optimizer.build_trial_context()
+        return optimizer
+
+    def test_workers_share_study(self):
+        optimizer = self._optimizer(n_trials=7, n_jobs=2)
+        study = optimizer._optimize_study()
+
+        trials = study.get_trials(states=(optuna.trial.TrialState.COMPLETE,))
+        self.assertEqual(len(trials), 7)
+        self.assertTrue(optimizer.storage_path.exists())
+        # El estudio persiste en el fichero compartido
+        stored = optuna.load_study(study_name='parallel_test', storage=journal_storage(optimizer.storage_path))
+        self.assertEqual(len(stored.trials), 7)
+
+        for trial in trials[:3]:
+            expected = optimizer.objective(optuna.trial.FixedTrial(trial.params))
+            self.assertEqual(tuple(trial.values), tuple(expected))
+
+        # Una nueva ejecución empieza un estudio vacío
+        self.assertEqual(len(self._optimizer(n_trials=2, n_jobs=2)._optimize_study().trials), 2)
+
+    def test_parallel_is_opt_in_and_capped_by_config(self):
+        workers = self.config.backtesting.max_workers
+        self.assertEqual(StrategyOptimizer(symbol=TEST_MODEL_SYMBOL, n_trials=100, config=self.config,
+                                           results_dir=self.results_dir).n_jobs, 1)
+        self.assertEqual(StrategyOptimizer(symbol=TEST_MODEL_SYMBOL, n_trials=100, config=self.config,
+                                           n_jobs=workers + 8, results_dir=self.results_dir).n_jobs, workers)
+        self.assertEqual(StrategyOptimizer(symbol=TEST_MODEL_SYMBOL, n_trials=1, config=self.config,
+                                           n_jobs=workers, results_dir=self.results_dir).n_jobs, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests del barrido vectorizado de parámetros
+===========================================
+
+ParameterSweep.evaluate debe devolver, para cada conjunto de parámetros, las
+mismas métricas que TrialContext.run (sin la lista de trades), y
+StrategyOptimizer.run_sweep los mismos valores objetivo que objective().
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import optuna
+
+from backtesting import trade_kernel
+from market_fixtures import TrialContextTestCase
+from optimizacion.parameter_sweep import ParameterSweep
+from optimizacion.strategy_optimizer import StrategyOptimizer
+
+EDGE_CASES = [
+    {'ml_threshold': 0.9, 'kelly_fraction': 0.5},           # Sin entradas
+    {'max_concurrent_trades': 0},                            # Entradas bloqueadas
+    {'liquidity_score_min': 40, 'max_drawdown': 0.03},      # Filtro de liquidez y parada por drawdown
+    {},                                                      # Valores por defecto de la estrategia
+]
+
+
+class ParameterSweepTest(TrialContextTestCase):
+    """Paridad del barrido por lotes con la ejecución trial a trial."""
+
+    CONFIDENCE_SEED = 5
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.optimizer = StrategyOptimizer(symbol='SOL/USDT', timeframe='1h', n_trials=1, config=self.config,
+                                           pruning={'enabled': False}, results_dir=tmp.name)
+        self.optimizer.trial_context = self.context
+
+    def _assert_matches_run(self, param_sets, results):
+        for params, actual in zip(param_sets, results):
+            with self.subTest(params=params):
+                expected = self.context.run(dict(params))
+                expected.pop('trades')
+                self.assertEqual(actual, expected)
+
+    def test_matches_trial_run(self):
+        param_sets = self.optimizer.sample_parameter_sets(30, seed=7) + EDGE_CASES
+        # Candidatos que solo difieren en parámetros sin efecto se evalúan una vez
+        param_sets.append(dict(param_sets[0], stoch_overbought=60, cci_threshold=250))
+        results = ParameterSweep(self.context).evaluate(param_sets, batch_size=8)
+
+        self.assertEqual(len(results), len(param_sets))
+        self.assertGreater(max(r['total_trades'] for r in results), 0)
+        self.assertEqual(results[-1], results[0])
+        self._assert_matches_run(param_sets, results)
+
+    def test_python_fallback_matches_jit(self):
+        param_sets = self.optimizer.sample_parameter_sets(5, seed=11)
+        expected = ParameterSweep(self.context).evaluate(param_sets)
+        with mock.patch.object(trade_kernel, 'simulate_batch_jit', None):
+            self.assertEqual(ParameterSweep(self.context).evaluate(param_sets), expected)
+
+    def test_entry_masks_shape(self):
+        sweep = ParameterSweep(self.context)
+        param_sets = self.optimizer.sample_parameter_sets(6, seed=3)
+        masks = sweep.entry_masks(sweep.effective_params(param_sets))
+        self.assertEqual(masks.shape, (6, len(self.context)))
+        self.assertFalse((masks & (self.context.arrays['signals'] == 0)).any())
+
+    def test_sweep_objectives_match_objective(self):
+        param_sets = self.optimizer.sample_parameter_sets(12, seed=1)
+        sweep = self.optimizer.run_sweep(param_sets=param_sets)
+
+        self.assertEqual(len(sweep), len(param_sets))
+        self.assertTrue(sweep['objective_0'].is_monotonic_decreasing)
+        self.assertIn('result_max_drawdown', sweep.columns)
+        names = list(StrategyOptimizer.PARAMETER_SPACE)
+        for row in sweep.head(4).to_dict('records'):
+            params = {name: row[name] for name in names}
+            expected = self.optimizer.objective(optuna.trial.FixedTrial(params))
+            self.assertEqual(tuple(row[f'objective_{i}'] for i in range(4)), expected)
+
+    def test_samples_stay_on_grid(self):
+        for params in self.optimizer.sample_parameter_sets(50, seed=2):
+            for name, (kind, low, high, step) in StrategyOptimizer.PARAMETER_SPACE.items():
+                value = params[name]
+                self.assertTrue(low <= value <= high, name)
+                self.assertAlmostEqual((value - low) / step, round((value - low) / step), msg=name)
+                if kind == 'int':
+                    self.assertIsInstance(value, int)
+
+
+if __name__ == '__main__':
+    unittest.main()
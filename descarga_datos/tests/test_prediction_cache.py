@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests de la caché de predicciones ML
+====================================
+
+predict_signal debe devolver la misma serie ml_confidence desde la caché sin
+volver a construir features, y dejar de usarla cuando el modelo se reentrena
+o los datos cambian.
+"""
+
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from market_fixtures import synthetic_ohlcv
+from models.model_registry import get_model_registry
+from models.prediction_cache import PredictionCache, configure_prediction_cache
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager
+
+
+class PredictionCacheTest(unittest.TestCase):
+    """Reutilización de ml_confidence entre llamadas."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.data = synthetic_ohlcv('BTC/USDT', n_bars=600)
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(get_model_registry().clear)
+        self.addCleanup(configure_prediction_cache)
+        self.manager = MLModelManager(model_dir=self.tmp.name, config={})
+
+    def _train(self, seed):
+        features = self.manager.prepare_features(self.data)
+        target = np.random.default_rng(seed).choice([-1, 0, 1], size=len(features))
+        scaler = StandardScaler().fit(features)
+        model = RandomForestClassifier(n_estimators=10, max_depth=5, random_state=seed)
+        model.fit(scaler.transform(features), target)
+        self.manager.save_model('TESTUSDT', 'random_forest', model, scaler)
+
+    def test_second_call_skips_feature_building(self):
+        cache = configure_prediction_cache()
+        self._train(seed=1)
+
+        first = self.manager.predict_signal(self.data, 'TESTUSDT')
+        with mock.patch.object(MLModelManager, 'prepare_features', side_effect=AssertionError):
+            second = MLModelManager(model_dir=self.tmp.name, config={}).predict_signal(self.data, 'TESTUSDT')
+        np.testing.assert_array_equal(second.to_numpy(), first.to_numpy())
+        self.assertTrue(second.index.equals(self.data.index))
+        self.assertEqual(cache.stats['hits'], 1)
+
+        # Datos distintos o modelo reentrenado -> nueva entrada
+        self.manager.predict_signal(self.data.iloc[:-1], 'TESTUSDT')
+        self._train(seed=2)
+        retrained = self.manager.predict_signal(self.data, 'TESTUSDT')
+        self.assertEqual(cache.stats['misses'], 3)
+        self.assertFalse(np.array_equal(retrained.to_numpy(), first.to_numpy()))
+
+    def test_disk_tier_stores_float32(self):
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = PredictionCache(disk_dir=disk_dir)
+            values = np.linspace(0, 1, 50)
+            stored = cache.put('key', values)
+            self.assertEqual(stored.dtype, np.float32)
+
+            reopened = PredictionCache(disk_dir=disk_dir)
+            np.testing.assert_array_equal(reopened.get('key'), stored)
+            self.assertEqual(reopened.stats['disk_hits'], 1)
+            self.assertIsNone(reopened.get('missing'))
+
+
+if __name__ == '__main__':
+    unittest.main()
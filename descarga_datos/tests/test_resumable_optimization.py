@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests de estudios de optimización reanudables
+=============================================
+
+Con resume=True StrategyOptimizer debe continuar el estudio guardado sin repetir
+los trials terminados, y tanto el estudio como la copia en disco del contexto
+de trials deben invalidarse solo cuando cambian los datos o el modelo.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import optuna
+
+from config.config_loader import load_config_from_yaml
+from market_fixtures import TEST_MODEL_SYMBOL, prepared_test_data, train_test_model
+from models.model_registry import get_model_registry
+from optimizacion.strategy_optimizer import StrategyOptimizer
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+
+
+class ResumableOptimizationTest(unittest.TestCase):
+    """Reanudación del estudio y caché del contexto por huella."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.config = load_config_from_yaml()
+        cls.data, cls.prepared = prepared_test_data()
+
+    def setUp(self):
+        # Cada test reentrena el modelo: directorio de modelos y de resultados propios
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.addCleanup(get_model_registry().clear)
+        self.model_dir = os.path.join(tmp.name, 'models')
+        self.results_dir = os.path.join(tmp.name, 'results')
+        train_test_model(self.model_dir, self.prepared)
+
+    def _optimizer(self, n_trials, resume):
+        optimizer = StrategyOptimizer(symbol=TEST_MODEL_SYMBOL, timeframe='4h', n_trials=n_trials,
+                                      study_name='resume_test', config=self.config, n_jobs=1, resume=resume,
+                                      model_dir=self.model_dir, results_dir=self.results_dir)
+        optimizer.data = self.data
+        return optimizer
+
+    def test_resume_reuses_finished_trials(self):
+        first = self._optimizer(4, resume=False)._optimize_study()
+        self.assertEqual(len(first.trials), 4)
+
+        # Interrupción a mitad de un trial: queda RUNNING en el almacenamiento
+        first.ask()
+
+        objective = mock.Mock(wraps=StrategyOptimizer.objective)
+        with mock.patch.object(StrategyOptimizer, 'objective', autospec=True, side_effect=objective):
+            resumed = self._optimizer(6, resume=True)._optimize_study()
+        self.assertEqual(objective.call_count, 2)
+
+        states = [trial.state for trial in resumed.trials]
+        self.assertEqual(states.count(optuna.trial.TrialState.FAIL), 1)
+        finished = [t for t in resumed.trials if t.state != optuna.trial.TrialState.FAIL]
+        self.assertEqual(len(finished), 6)
+        for before, after in zip(first.trials[:4], resumed.trials[:4]):
+            self.assertEqual((before.params, before.values), (after.params, after.values))
+
+        # Nada pendiente: no se ejecuta ningún trial
+        self.assertEqual(len(self._optimizer(6, resume=True)._optimize_study().trials), 7)
+        # Sin resume se empieza de cero
+        self.assertEqual(len(self._optimizer(2, resume=False)._optimize_study().trials), 2)
+
+    def test_context_cache_follows_fingerprint(self):
+        optimizer = self._optimizer(2, resume=False)
+        optimizer.build_trial_context()
+        self.assertTrue(optimizer.context_path.exists())
+
+        # Mismos datos y modelo: el contexto se lee de disco sin preparar datos ni predecir
+        with mock.patch.object(UltraDetailedHeikinAshiMLStrategy, '_prepare_data') as prepare:
+            cached = self._optimizer(2, resume=True)
+            cached.build_trial_context()
+        prepare.assert_not_called()
+        self.assertEqual(cached.fingerprint, optimizer.fingerprint)
+        self.assertEqual(cached.trial_context.signals.tolist(), optimizer.trial_context.signals.tolist())
+
+        optimizer._optimize_study()
+        # Modelo reentrenado: nueva huella, se reconstruye el contexto y se descarta el estudio
+        train_test_model(self.model_dir, self.prepared.iloc[:-50])
+        retrained = self._optimizer(3, resume=True)
+        study = retrained._optimize_study()
+        self.assertNotEqual(retrained.fingerprint, optimizer.fingerprint)
+        self.assertEqual(len(study.trials), 3)
+        self.assertEqual(study.user_attrs['fingerprint'], retrained.fingerprint)
+
+        # Datos distintos: también cambia la huella
+        other = self._optimizer(2, resume=True)
+        other.data = self.data.iloc[:-10]
+        other.build_trial_context()
+        self.assertNotEqual(other.fingerprint, retrained.fingerprint)
+
+
+if __name__ == '__main__':
+    unittest.main()
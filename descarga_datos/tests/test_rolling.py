@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests de las primitivas de ventanas móviles
+===========================================
+
+rolling_min_max y rolling_std deben coincidir exactamente con rolling() de
+pandas (incluida la semántica de NaN), las versiones con y sin Numba entre sí y
+RollingStd con rolling_std.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_fixtures import load_market_data
+from indicators import rolling
+from indicators.rolling import RollingStd, rolling_min_max, rolling_std
+
+WINDOWS = [3, 14, 20, 50]
+
+
+class RollingPrimitivesTest(unittest.TestCase):
+    """Paridad de las primitivas con pandas y entre backends."""
+
+    @classmethod
+    def setUpClass(cls):
+        data = load_market_data('BTC/USDT', n_bars=1500)
+        close = data['close'].to_numpy()
+        returns = data['close'].pct_change().to_numpy()
+        with_gaps = close.copy()
+        with_gaps[[100, 101, 700]] = np.nan
+        cls.series = {'close': close, 'returns': returns, 'with_gaps': with_gaps}
+
+    def test_min_max_and_std_match_pandas(self):
+        for name, values in self.series.items():
+            minimum, maximum = rolling_min_max(values, WINDOWS)
+            std = rolling_std(values, WINDOWS)
+            std_population = rolling_std(values, WINDOWS, ddof=0)
+            for row, window in enumerate(WINDOWS):
+                with self.subTest(series=name, window=window):
+                    expected = pd.Series(values).rolling(window)
+                    np.testing.assert_array_equal(minimum[row], expected.min().to_numpy())
+                    np.testing.assert_array_equal(maximum[row], expected.max().to_numpy())
+                    np.testing.assert_array_equal(std[row], expected.std().to_numpy())
+                    np.testing.assert_array_equal(std_population[row], expected.std(ddof=0).to_numpy())
+
+    def test_streaming_std_matches_batch(self):
+        for name, values in self.series.items():
+            for ddof in (0, 1):
+                with self.subTest(series=name, ddof=ddof):
+                    streaming = RollingStd(20, ddof=ddof)
+                    online = np.array([streaming.update(v) for v in values])
+                    np.testing.assert_array_equal(online, rolling_std(values, [20], ddof=ddof)[0])
+
+    def test_fallback_without_jit(self):
+        values = self.series['with_gaps']
+        compiled = (rolling._rolling_extrema_loop_jit, rolling._rolling_std_loop_jit)
+        rolling._rolling_extrema_loop_jit = rolling._rolling_std_loop_jit = None
+        try:
+            fallback = (rolling_min_max(values, WINDOWS), rolling_std(values, WINDOWS))
+        finally:
+            rolling._rolling_extrema_loop_jit, rolling._rolling_std_loop_jit = compiled
+
+        np.testing.assert_array_equal(fallback[0][0], rolling_min_max(values, WINDOWS)[0])
+        np.testing.assert_array_equal(fallback[0][1], rolling_min_max(values, WINDOWS)[1])
+        np.testing.assert_array_equal(fallback[1], rolling_std(values, WINDOWS))
+
+    def test_edge_cases(self):
+        short = np.array([1.0, 2.0])
+        self.assertTrue(np.isnan(rolling_std(short, [5])).all())
+        self.assertEqual(rolling_min_max(np.empty(0), [3])[0].shape, (1, 0))
+        np.testing.assert_array_equal(rolling_std(np.full(10, 7.0), [4])[0][3:], np.zeros(7))
+        with self.assertRaises(ValueError):
+            rolling_std(short, [0])
+
+
+if __name__ == '__main__':
+    unittest.main()
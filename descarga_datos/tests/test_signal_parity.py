@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests de paridad del generador de señales vectorizado
+======================================================
+
+Verifica que UltraDetailedHeikinAshiMLStrategy._generate_signals (máscaras NumPy)
+produce exactamente las mismas señales que el bucle original vela a vela
+(_generate_signals_legacy) sobre los símbolos almacenados.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from market_fixtures import STORED_SYMBOLS, load_market_data, synthetic_ml_confidence
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import UltraDetailedHeikinAshiMLStrategy
+
+
+class SignalParityTest(unittest.TestCase):
+    """Paridad bit a bit entre el motor de señales vectorizado y el legacy."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.strategy = UltraDetailedHeikinAshiMLStrategy(config={'symbol': 'BNB/USDT', 'timeframe': '1h'})
+
+    def _prepared(self, symbol):
+        data = load_market_data(symbol)
+        return self.strategy._prepare_data(data.copy())
+
+    def test_vectorized_matches_legacy_on_stored_symbols(self):
+        for seed, symbol in enumerate(STORED_SYMBOLS):
+            with self.subTest(symbol=symbol):
+                data = self._prepared(symbol)
+                ml_confidence = synthetic_ml_confidence(data.index, seed=seed)
+
+                expected = self.strategy._generate_signals_legacy(data, symbol, ml_confidence)
+                actual = self.strategy._generate_signals(data, symbol, ml_confidence)
+
+                pd.testing.assert_series_equal(actual, expected)
+                self.assertGreater((expected != 0).sum(), 0)
+
+    def test_vectorized_handles_nan_indicators(self):
+        data = self._prepared('BNB/USDT')
+        data.loc[data.index[5:40], ['rsi', 'stoch_k', 'volume_ratio', 'atr']] = np.nan
+        data.loc[data.index[50], 'close'] = 0.0
+        ml_confidence = pd.Series(0.9, index=data.index)
+
+        expected = self.strategy._generate_signals_legacy(data, 'BNB/USDT', ml_confidence)
+        actual = self.strategy._generate_signals(data, 'BNB/USDT', ml_confidence)
+
+        pd.testing.assert_series_equal(actual, expected)
+
+    def test_requires_ml_confidence(self):
+        data = self._prepared('BNB/USDT')
+        with self.assertRaises(ValueError):
+            self.strategy._generate_signals(data, 'BNB/USDT', None)
+
+
+if __name__ == '__main__':
+    unittest.main()
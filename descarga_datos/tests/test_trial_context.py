@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tests del contexto precalculado de trials
+=========================================
+
+TrialContext.run(params) debe devolver exactamente los mismos resultados que
+UltraDetailedHeikinAshiMLStrategy.run en modo optimización, sin volver a
+preparar los datos ni a ejecutar la inferencia ML.
+"""
+
+import unittest
+from unittest import mock
+
+from market_fixtures import TEST_MODEL_SYMBOL, TrainedModelTestCase
+from optimizacion.trial_context import TrialContext
+from strategies.ultra_detailed_heikin_ashi_ml_strategy import MLModelManager, UltraDetailedHeikinAshiMLStrategy
+
+TRIAL_PARAMS = [
+    {'ml_threshold': 0.3, 'max_drawdown': 0.08, 'kelly_fraction': 0.5, 'max_concurrent_trades': 5},
+    {'ml_threshold': 0.45, 'max_drawdown': 0.03, 'kelly_fraction': 0.25, 'max_concurrent_trades': 3,
+     'liquidity_score_min': 20, 'backtest_engine': 'legacy'},
+]
+
+
+class TrialContextTest(TrainedModelTestCase):
+    """Paridad con strategy.run y trabajo por trial limitado al backtest."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.context = TrialContext.build(cls.data, TEST_MODEL_SYMBOL, '4h', cls.strategy_config)
+
+    def test_matches_strategy_run(self):
+        for params in TRIAL_PARAMS:
+            with self.subTest(params=params):
+                strategy = UltraDetailedHeikinAshiMLStrategy(config=dict(params, **self.strategy_config))
+                strategy._optimization_mode = True
+                expected = strategy.run(self.data, TEST_MODEL_SYMBOL, '4h')
+                actual = self.context.run(dict(params))
+
+                self.assertGreater(expected['total_trades'], 0)
+                self.assertEqual(actual, expected)
+
+    def test_trial_skips_preparation_and_inference(self):
+        with mock.patch.object(UltraDetailedHeikinAshiMLStrategy, '_prepare_data') as prepare, \
+                mock.patch.object(MLModelManager, 'predict_signal') as predict:
+            results = self.context.run(dict(TRIAL_PARAMS[0]))
+        prepare.assert_not_called()
+        predict.assert_not_called()
+        self.assertGreater(results['total_trades'], 0)
+
+    def test_requires_trained_model(self):
+        with self.assertRaises(ValueError):
+            TrialContext.build(self.data, 'MISSINGUSDT', '4h', self.strategy_config)
+
+
+if __name__ == '__main__':
+    unittest.main()
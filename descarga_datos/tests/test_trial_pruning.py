@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests de checkpoints y parada anticipada de trials
+==================================================
+
+Simular el histórico por tramos debe dar los mismos trades que una sola pasada,
+y StrategyOptimizer.objective debe abortar los trials que ya no pueden cumplir
+min_trades (o superan el drawdown configurado) sin simular el resto.
+"""
+
+import tempfile
+import unittest
+
+import numpy as np
+import optuna
+
+from backtesting import trade_kernel
+from market_fixtures import TrialContextTestCase
+from optimizacion.strategy_optimizer import StrategyOptimizer
+
+PARAMS = {
+    'ml_threshold': 0.3, 'stoch_overbought': 80, 'stoch_oversold': 20, 'cci_threshold': 100,
+    'volume_ratio_min': 0.5, 'sar_acceleration': 0.05, 'sar_maximum': 0.2, 'atr_period': 14,
+    'stop_loss_atr_multiplier': 2.0, 'take_profit_atr_multiplier': 4.0, 'ema_trend_period': 50,
+    'max_drawdown': 0.12, 'max_portfolio_heat': 0.1, 'max_concurrent_trades': 5, 'kelly_fraction': 0.5,
+}
+
+
+class TrialPruningTest(TrialContextTestCase):
+    """Checkpoints del kernel y kill switch del optimizador."""
+
+    CONFIDENCE_SEED = 3
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.results_dir = tmp.name
+
+    def _kernel_inputs(self):
+        arrays = self.context.arrays
+        liquidity_ok = trade_kernel.liquidity_mask(arrays['volume_ratio'], arrays['atr'], arrays['close'], 5)
+        return (arrays['close'], arrays['atr'], arrays['signals'], arrays['ml_confidence'], liquidity_ok,
+                10000.0, 0.3, 0.5, 0.5)
+
+    def test_checkpointed_run_matches_single_pass(self):
+        expected = trade_kernel.run_array_backtest(*self._kernel_inputs())
+        reports = []
+        actual = trade_kernel.run_array_backtest(*self._kernel_inputs(), checkpoints=7,
+                                                 on_checkpoint=lambda report: reports.append(report))
+
+        self.assertFalse(actual['pruned'])
+        self.assertEqual(len(reports), 6)
+        self.assertEqual(actual['checkpoints'], reports)
+        np.testing.assert_array_equal(actual['trades'], expected['trades'])
+        for key in ('n_closed', 'capital', 'max_drawdown'):
+            self.assertEqual(actual[key], expected[key])
+        trades = [report['n_trades'] for report in reports]
+        self.assertEqual(trades, sorted(trades))
+        self.assertLessEqual(trades[-1], expected['n_closed'])
+
+    def test_callback_aborts_simulation(self):
+        result = trade_kernel.run_array_backtest(*self._kernel_inputs(), checkpoints=4,
+                                                 on_checkpoint=lambda report: True)
+        self.assertTrue(result['pruned'])
+        self.assertEqual(len(result['checkpoints']), 1)
+        self.assertEqual(result['n_closed'], result['checkpoints'][0]['n_trades'])
+
+    def _optimizer(self, min_trades, pruning=None):
+        targets = {'maximize': ['total_pnl', 'win_rate', 'profit_factor'], 'minimize': ['max_drawdown'],
+                   'constraints': {'min_trades': min_trades, 'max_drawdown_limit': 0.15, 'min_win_rate': 0.55}}
+        optimizer = StrategyOptimizer(symbol='SOL/USDT', timeframe='1h', n_trials=1, config=self.config,
+                                      optimization_targets=targets, pruning=pruning, results_dir=self.results_dir)
+        optimizer.trial_context = self.context
+        return optimizer
+
+    def test_prunes_trials_that_cannot_reach_min_trades(self):
+        total_signals = self.context.remaining_signals(0)
+        trial = optuna.trial.FixedTrial(PARAMS)
+        with self.assertRaises(optuna.TrialPruned):
+            self._optimizer(min_trades=total_signals + 1).objective(trial)
+        # Se abortó en el primer checkpoint
+        self.assertEqual(len(trial.user_attrs['checkpoints']), 1)
+
+        # Sin parada anticipada el trial se simula entero y se penaliza con ceros
+        values = self._optimizer(min_trades=total_signals + 1, pruning={'enabled': False}).objective(
+            optuna.trial.FixedTrial(PARAMS))
+        self.assertEqual(values, (0.0, 0.0, 0.0, 0.0))
+
+    def test_values_unchanged_when_not_pruned(self):
+        with_pruning = self._optimizer(min_trades=1).objective(optuna.trial.FixedTrial(PARAMS))
+        without = self._optimizer(min_trades=1, pruning={'enabled': False}).objective(optuna.trial.FixedTrial(PARAMS))
+        self.assertEqual(with_pruning, without)
+        self.assertNotEqual(with_pruning, (0.0, 0.0, 0.0, 0.0))
+
+    def test_drawdown_kill_switch(self):
+        trial = optuna.trial.FixedTrial(PARAMS)
+        with self.assertRaises(optuna.TrialPruned):
+            self._optimizer(min_trades=1, pruning={'max_drawdown': 0.0}).objective(trial)
+        self.assertEqual(trial.user_attrs['checkpoints'][-1]['prune_reason'], 'max_drawdown')
+
+
+if __name__ == '__main__':
+    unittest.main()
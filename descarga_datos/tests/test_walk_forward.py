@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests del entrenamiento walk-forward en paralelo
+================================================
+
+Los folds de varios símbolos repartidos en un pool de procesos deben dar los
+mismos modelos y métricas que el cálculo en serie, leyendo las features desde
+memoria compartida, y dejar un informe con los tiempos de cada fold.
+"""
+
+import asyncio
+import json
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+from optimizacion import walk_forward
+from optimizacion.run_optimization_pipeline2 import OptimizationPipeline
+from optimizacion.walk_forward import FINAL_FOLD, WalkForwardTrainer
+from utils.shared_arrays import SharedArrays
+
+
+def _split(seed, n_rows=400, n_train=300):
+    rng = np.random.default_rng(seed)
+    X = pd.DataFrame(rng.normal(size=(n_rows, 6)), columns=[f'f{i}' for i in range(6)])
+    y = pd.Series((X['f0'] + rng.normal(scale=0.5, size=n_rows) > 0).astype(float))
+    return X.iloc[:n_train], y.iloc[:n_train], X.iloc[n_train:], y.iloc[n_train:]
+
+
+class WalkForwardTrainerTest(unittest.TestCase):
+    """Folds y símbolos en paralelo."""
+
+    def _run(self, max_workers, report_dir=None):
+        trainer = WalkForwardTrainer(max_workers=max_workers, n_splits=3, report_dir=report_dir)
+        for seed, symbol in enumerate(('BTC/USDT', 'ETH/USDT')):
+            models = {'RandomForest': RandomForestClassifier(n_estimators=10, max_depth=4, random_state=seed)}
+            trainer.add_symbol(symbol, *_split(seed), models)
+        return trainer, trainer.run()
+
+    def test_pool_matches_serial(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            trainer, parallel = self._run(max_workers=2, report_dir=tmp)
+            with open(trainer.report_path) as f:
+                report = json.load(f)
+        _, serial = self._run(max_workers=1)
+
+        for symbol in ('BTC/USDT', 'ETH/USDT'):
+            results, best_model = parallel[symbol]
+            expected, _ = serial[symbol]
+            self.assertEqual(best_model, 'RandomForest')
+            for key in ('cv_scores', 'val_auc', 'val_accuracy', 'confusion_matrix'):
+                self.assertEqual(results['RandomForest'][key], expected['RandomForest'][key])
+            self.assertEqual(len(results['RandomForest']['cv_scores']), 3)
+
+            X_train, y_train, X_val, _ = _split(0 if symbol == 'BTC/USDT' else 1)
+            reference = RandomForestClassifier(n_estimators=10, max_depth=4,
+                                               random_state=0 if symbol == 'BTC/USDT' else 1)
+            reference.fit(X_train.to_numpy(), y_train.to_numpy())
+            np.testing.assert_array_equal(results['RandomForest']['model'].predict_proba(X_val.to_numpy()),
+                                          reference.predict_proba(X_val.to_numpy()))
+
+        # 2 símbolos x (3 folds + ajuste final)
+        self.assertEqual(len(report['folds']), 8)
+        self.assertEqual(sum(row['fold'] == FINAL_FOLD for row in report['folds']), 2)
+        self.assertTrue(all(row['timings']['fit'] > 0 for row in report['folds']))
+
+    def test_shared_arrays_attach(self):
+        owner = SharedArrays({'X': np.arange(12.0).reshape(3, 4), 'y': np.array([1, 0, 1])})
+        self.addCleanup(owner.close)
+        attached = SharedArrays.attach(owner.spec())
+        np.testing.assert_array_equal(attached['X'], owner['X'])
+        owner['y'][0] = 7
+        self.assertEqual(attached['y'][0], 7)
+        attached.close()
+
+
+    def test_pipeline_walk_forward_is_opt_in(self):
+        with mock.patch.object(walk_forward, 'WalkForwardTrainer') as trainer:
+            # Con la configuración por defecto el pipeline no entrena walk-forward
+            self.assertEqual(asyncio.run(OptimizationPipeline()._train_ml_models_walk_forward()), set())
+            trainer.assert_not_called()
+
+            # Activado explícitamente (sin descargar datos: el trainer del símbolo falla)
+            with mock.patch('optimizacion.ml_trainer.MLTrainer', side_effect=RuntimeError('sin datos')):
+                pipeline = OptimizationPipeline(walk_forward=True)
+                self.assertEqual(asyncio.run(pipeline._train_ml_models_walk_forward()), set())
+            trainer.assert_called_once()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de los kernels secuenciales: Python puro vs Numba JIT.
+
+Uso (desde descarga_datos/):
+    python -m utils.benchmark_kernels --bars 200000 --repeat 3
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.jit import NUMBA_AVAILABLE
+from indicators import technical_indicators
+from utils import talib_wrapper
+from backtesting import trade_kernel
+
+
+def _best_time(func, args, repeat):
+    """Mejor tiempo de `repeat` ejecuciones (segundos)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _synthetic_inputs(n_bars, seed=42):
+    """Serie OHLC sintética con señales y confianza ML aleatorias"""
+    rng = np.random.default_rng(seed)
+    close = 100 + np.cumsum(rng.normal(0, 1, n_bars))
+    close = np.abs(close) + 1.0
+    high = close + rng.random(n_bars)
+    low = close - rng.random(n_bars) * 0.5
+    atr = np.full(n_bars, 1.0)
+    signals = rng.choice([-1, 0, 0, 0, 1], size=n_bars).astype(np.int64)
+    ml_confidence = rng.random(n_bars)
+    liquidity_ok = np.ones(n_bars, dtype=bool)
+    return high, low, close, atr, signals, ml_confidence, liquidity_ok
+
+
+def run_benchmark(n_bars=200000, repeat=3):
+    """
+    Medir cada kernel en Python puro y compilado.
+
+    Returns:
+        Lista de tuplas (kernel, segundos_python, segundos_jit o None)
+    """
+    high, low, close, atr, signals, ml_confidence, liquidity_ok = _synthetic_inputs(n_bars)
+
+    def trades_args():
+        out = np.zeros(int(np.count_nonzero(signals)) + 1, dtype=trade_kernel.TRADE_DTYPE)
+        return (close, atr, signals, ml_confidence, liquidity_ok, out, 10000.0, 0.5, 0.25, 0.5)
+
+    kernels = [
+        ('parabolic_sar (TechnicalIndicators)', technical_indicators._parabolic_sar_loop,
+         technical_indicators._parabolic_sar_loop_jit, (high, low, 0.02, 0.2)),
+        ('SAR (TalibWrapper)', talib_wrapper._sar_loop, talib_wrapper._sar_loop_jit, (high, low, 0.02)),
+        ('simulate_trades (backtest + trailing stop)', trade_kernel.simulate_trades,
+         trade_kernel.simulate_trades_jit, trades_args()),
+    ]
+
+    results = []
+    for name, python_func, jit_func, args in kernels:
+        python_time = _best_time(python_func, args, repeat)
+        jit_time = None
+        if jit_func is not None:
+            jit_func(*args)  # Compilación fuera de la medición
+            jit_time = _best_time(jit_func, args, repeat)
+        results.append((name, python_time, jit_time))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de kernels Python vs Numba')
+    parser.add_argument('--bars', type=int, default=200000, help='Número de velas sintéticas')
+    parser.add_argument('--repeat', type=int, default=3, help='Repeticiones por kernel')
+    args = parser.parse_args()
+
+    print(f"Numba disponible: {NUMBA_AVAILABLE} | velas: {args.bars:,}")
+    print(f"{'kernel':<45}{'python (s)':>12}{'jit (s)':>12}{'speedup':>10}")
+    for name, python_time, jit_time in run_benchmark(args.bars, args.repeat):
+        if jit_time is None:
+            print(f"{name:<45}{python_time:>12.4f}{'-':>12}{'-':>10}")
+        else:
+            print(f"{name:<45}{python_time:>12.4f}{jit_time:>12.4f}{python_time / jit_time:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
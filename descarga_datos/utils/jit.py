@@ -0,0 +1,45 @@
+"""
+Backend compilado opcional (Numba) para los bucles secuenciales críticos.
+
+Algunos kernels son inherentemente secuenciales (Parabolic SAR, máquina de
+estados del backtest) y no se pueden vectorizar. Si Numba está instalado se
+compilan con njit; si no, se usa la implementación en Python puro.
+
+Numba se detecta al importar este módulo. Se puede desactivar el backend
+compilado con la variable de entorno BOT_TRADER_DISABLE_JIT=1.
+"""
+
+import os
+from typing import Callable, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    if os.environ.get('BOT_TRADER_DISABLE_JIT', '').lower() in ('1', 'true', 'yes'):
+        raise ImportError('JIT desactivado por BOT_TRADER_DISABLE_JIT')
+    import numba  # type: ignore
+    NUMBA_AVAILABLE = True
+except ImportError:
+    numba = None
+    NUMBA_AVAILABLE = False
+
+
+def jit_compile(func: Callable) -> Optional[Callable]:
+    """
+    Compilar una función en modo nopython (compilación perezosa en la primera llamada).
+
+    Args:
+        func: Kernel en Python puro, escrito solo con escalares y arrays NumPy
+
+    Returns:
+        Versión compilada de func, o None si Numba no está disponible
+    """
+    if not NUMBA_AVAILABLE:
+        return None
+    try:
+        return numba.njit(cache=True, nogil=True)(func)
+    except Exception as e:
+        logger.warning(f"No se pudo preparar la versión JIT de {func.__name__}: {e}")
+        return None
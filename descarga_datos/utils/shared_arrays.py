@@ -0,0 +1,88 @@
+"""
+Arrays NumPy en memoria compartida entre procesos (multiprocessing.shared_memory).
+
+El proceso que crea los arrays es el propietario: copia cada array una sola vez
+a un bloque compartido y lo libera (unlink) en close() o al destruirse el
+objeto. Los demás procesos reciben spec(), que solo contiene el nombre, la
+forma y el dtype de cada bloque, y abren los arrays sin copiarlos con attach().
+
+Lo usan el entrenamiento walk-forward (optimizacion.walk_forward) y el banco de
+indicadores (indicators.indicator_bank).
+"""
+
+import weakref
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# nombre -> (bloque, forma, dtype)
+SharedArraysSpec = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+class SharedArrays:
+    """
+    Conjunto de arrays NumPy en memoria compartida.
+
+    El proceso que los crea es el propietario y libera los bloques en close();
+    los workers los abren con attach(spec()).
+
+    Args:
+        arrays: Arrays a copiar en memoria compartida por nombre
+        dtype: Convertir todos los arrays a este dtype (por defecto se conserva el suyo)
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], dtype: Optional[np.dtype] = None):
+        self._shm: Dict[str, shared_memory.SharedMemory] = {}
+        self._owner = True
+        self.arrays: Dict[str, np.ndarray] = {}
+        for name, source in arrays.items():
+            source = np.ascontiguousarray(source, dtype=dtype)
+            shm = shared_memory.SharedMemory(create=True, size=max(source.nbytes, 1))
+            array = np.ndarray(source.shape, dtype=source.dtype, buffer=shm.buf)
+            array[:] = source
+            self._shm[name] = shm
+            self.arrays[name] = array
+        weakref.finalize(self, SharedArrays._release, list(self._shm.values()), True)
+
+    @staticmethod
+    def _release(blocks: List[shared_memory.SharedMemory], unlink: bool) -> None:
+        for shm in blocks:
+            try:
+                shm.close()
+            except BufferError:
+                # Todavía hay vistas NumPy vivas sobre el bloque
+                pass
+            if unlink:
+                try:
+                    shm.unlink()
+                except FileNotFoundError:
+                    pass
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def spec(self) -> SharedArraysSpec:
+        """Descripción serializable para abrir los arrays en otro proceso"""
+        return {name: (self._shm[name].name, array.shape, array.dtype.str) for name, array in self.arrays.items()}
+
+    @classmethod
+    def attach(cls, spec: SharedArraysSpec) -> 'SharedArrays':
+        """Abrir (sin copiar) arrays creados en otro proceso"""
+        shared = cls.__new__(cls)
+        shared._shm = {}
+        shared._owner = False
+        shared.arrays = {}
+        for name, (block_name, shape, dtype) in spec.items():
+            shm = shared_memory.SharedMemory(name=block_name)
+            shared._shm[name] = shm
+            shared.arrays[name] = np.ndarray(tuple(shape), dtype=np.dtype(dtype), buffer=shm.buf)
+        weakref.finalize(shared, SharedArrays._release, list(shared._shm.values()), False)
+        return shared
+
+    def close(self) -> None:
+        """Cerrar la memoria compartida (y liberarla si este proceso la creó)"""
+        blocks = list(self._shm.values())
+        self.arrays = {}
+        self._shm = {}
+        self._release(blocks, self._owner)
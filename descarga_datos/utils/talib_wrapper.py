@@ -6,6 +6,31 @@ Proporciona la misma interfaz que talib sin dependencias externas problemáticas
 import pandas as pd
 import numpy as np
 
+from utils.jit import jit_compile
+
+
+def _sar_loop(high_arr, low_arr, acceleration):
+    """Bucle secuencial de TalibWrapper.SAR (compilable con Numba)"""
+    sar = np.zeros(len(high_arr), dtype=np.float64)
+    sar[0] = low_arr[0]  # Inicializar con el primer low
+
+    for i in range(1, len(high_arr)):
+        if high_arr[i-1] > sar[i-1]:
+            # Tendencia alcista
+            sar[i] = sar[i-1] + acceleration * (high_arr[i-1] - sar[i-1])
+            sar[i] = min(sar[i], low_arr[i])  # No puede estar por encima del low actual
+        else:
+            # Tendencia bajista
+            sar[i] = sar[i-1] - acceleration * (sar[i-1] - low_arr[i-1])
+            sar[i] = max(sar[i], high_arr[i])  # No puede estar por debajo del high actual
+
+    return sar
+
+
+# Versión compilada (None si Numba no está disponible)
+_sar_loop_jit = jit_compile(_sar_loop)
+
+
 class TalibWrapper:
     """Wrapper que emula la interfaz de talib usando numpy/pandas"""
 
@@ -91,19 +116,12 @@ class TalibWrapper:
         high_arr = high.values
         low_arr = low.values
 
-        sar = np.zeros(len(high_arr), dtype=float)
-        sar[0] = low_arr[0]  # Inicializar con el primer low
-
-        # Vectorizar el cálculo donde sea posible
-        for i in range(1, len(high_arr)):
-            if high_arr[i-1] > sar[i-1]:
-                # Tendencia alcista
-                sar[i] = sar[i-1] + acceleration * (high_arr[i-1] - sar[i-1])
-                sar[i] = min(sar[i], low_arr[i])  # No puede estar por encima del low actual
-            else:
-                # Tendencia bajista
-                sar[i] = sar[i-1] - acceleration * (sar[i-1] - low_arr[i-1])
-                sar[i] = max(sar[i], high_arr[i])  # No puede estar por debajo del high actual
+        if _sar_loop_jit is not None and len(high_arr) > 0:
+            sar = _sar_loop_jit(np.ascontiguousarray(high_arr, dtype=np.float64),
+                                np.ascontiguousarray(low_arr, dtype=np.float64),
+                                float(acceleration))
+        else:
+            sar = _sar_loop(high_arr, low_arr, acceleration)
 
         return pd.Series(sar, index=high.index)
 